@@ -0,0 +1,108 @@
+#!/usr/bin/env python2.7
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+# Benchmarks the write and read throughput and the size of the artifact cache's artifact formats.
+#
+# usage: benchmark_artifact_formats.py [--compression-levels=1,5,9] [--iterations=3] [dir ...]
+#
+# Each given directory (e.g. a zinc classes directory or a python sources directory under
+# .pants.d) is benchmarked as a separate artifact. If none are given, synthetic JVM-like
+# (many small .class files) and python-like (fewer, larger source files) trees are generated.
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'src', 'python'))
+
+from pants.cache.artifact import ARTIFACT_FORMATS, create_artifact  # isort:skip
+
+
+_WORDS = ['java/lang/Object', 'java/lang/String', 'scala/collection/immutable/List', '<init>',
+          'Code', 'LineNumberTable', 'LocalVariableTable', 'StackMapTable', 'SourceFile', 'apply',
+          'def', 'return', 'self', 'import', 'from', 'class', 'for', 'in', 'if', 'else']
+
+
+def _write_synthetic_tree(root, num_files, words_per_file, extension):
+  rng = random.Random(num_files)
+  for i in range(num_files):
+    path = os.path.join(root, 'pkg{}'.format(i % 20), 'File{}.{}'.format(i, extension))
+    if not os.path.isdir(os.path.dirname(path)):
+      os.makedirs(os.path.dirname(path))
+    with open(path, 'wb') as f:
+      words = [rng.choice(_WORDS) for _ in range(words_per_file)]
+      # Mix in some incompressible bytes, as found in constant pools and bytecode.
+      f.write(' '.join(words).encode('utf-8') + os.urandom(words_per_file // 4))
+
+
+def _tree_size(root):
+  return sum(os.path.getsize(os.path.join(d, f)) for d, _, files in os.walk(root) for f in files)
+
+
+def _benchmark(name, source_dir, artifact_format, compression, iterations, work_dir):
+  artifact_root = os.path.dirname(source_dir)
+  artifact_path = os.path.join(work_dir, 'artifact.{}'.format(artifact_format))
+  write_secs = read_secs = 0.0
+  for _ in range(iterations):
+    start = time.time()
+    create_artifact(artifact_format, artifact_root, artifact_path, compression).collect([source_dir])
+    write_secs += time.time() - start
+
+    extract_root = os.path.join(work_dir, 'extracted')
+    start = time.time()
+    create_artifact(artifact_format, extract_root, artifact_path, compression).extract()
+    read_secs += time.time() - start
+    shutil.rmtree(extract_root)
+
+  input_mb = _tree_size(source_dir) / (1024 * 1024)
+  print('{:<24} {:<5} {:>5} {:>10.1f} {:>10.1f} {:>10.2f}'.format(
+    name,
+    artifact_format,
+    compression if artifact_format != 'tar' else '-',
+    input_mb * iterations / write_secs,
+    input_mb * iterations / read_secs,
+    os.path.getsize(artifact_path) / (input_mb * 1024 * 1024)))
+  os.unlink(artifact_path)
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--compression-levels', default='1,5,9')
+  parser.add_argument('--iterations', type=int, default=3)
+  parser.add_argument('dirs', nargs='*')
+  args = parser.parse_args()
+
+  compression_levels = [int(c) for c in args.compression_levels.split(',')]
+  work_dir = tempfile.mkdtemp()
+  try:
+    if args.dirs:
+      trees = [(os.path.basename(os.path.abspath(d)), os.path.abspath(d)) for d in args.dirs]
+    else:
+      trees = [('synthetic-jvm-classes', os.path.join(work_dir, 'inputs', 'classes')),
+               ('synthetic-python-sources', os.path.join(work_dir, 'inputs', 'sources'))]
+      _write_synthetic_tree(trees[0][1], num_files=5000, words_per_file=200, extension='class')
+      _write_synthetic_tree(trees[1][1], num_files=500, words_per_file=2000, extension='py')
+
+    print('{:<24} {:<5} {:>5} {:>10} {:>10} {:>10}'.format(
+      'input', 'fmt', 'level', 'write MB/s', 'read MB/s', 'size ratio'))
+    for name, source_dir in trees:
+      for artifact_format in ARTIFACT_FORMATS:
+        levels = compression_levels if artifact_format != 'tar' else [0]
+        for compression in levels:
+          _benchmark(name, source_dir, artifact_format, compression, args.iterations, work_dir)
+  finally:
+    shutil.rmtree(work_dir)
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python2.7
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+# Benchmarks ClasspathProducts queries over a synthetic target graph.
+#
+# usage: benchmark_classpath_products.py [--targets=50000] [--jars=5000] [--roots=20]
+#                                        [--iterations=5]
+#
+# Each target has an internal classes directory and a few third party jars, shared with other
+# targets, and depends on a few of the targets created before it. Queries are made for the
+# transitive closures of the last created targets, as compile, junit and bundle do, both cold and
+# memoized, and after an unrelated target's classpath changes.
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import argparse
+import os
+import random
+import sys
+import time
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir, os.pardir, 'src', 'python'))
+
+from pants.backend.jvm.targets.jvm_target import JvmTarget  # isort:skip
+from pants.backend.jvm.tasks.classpath_products import ClasspathProducts  # isort:skip
+from pants.build_graph.address import Address  # isort:skip
+from pants.build_graph.mutable_build_graph import MutableBuildGraph  # isort:skip
+from pants.java.jar.exclude import Exclude  # isort:skip
+from pants.java.jar.jar_dependency_utils import M2Coordinate, ResolvedJar  # isort:skip
+
+
+_WORKDIR = '/pants.d'
+
+
+def _build_graph(num_targets, num_jars, rng):
+  build_graph = MutableBuildGraph(address_mapper=None)
+  classpath_products = ClasspathProducts(_WORKDIR)
+  jars = [ResolvedJar(M2Coordinate(org='org{}'.format(i % 100), name='jar{}'.format(i)),
+                      cache_path='/ivy/jar{}.jar'.format(i),
+                      pants_path=os.path.join(_WORKDIR, 'ivy', 'jar{}.jar'.format(i)))
+          for i in range(num_jars)]
+  targets = []
+  for i in range(num_targets):
+    address = Address('src/java/pkg{}'.format(i % 1000), 'target{}'.format(i))
+    # Exclude an org from some targets, so that queries filter by excludes.
+    excludes = [Exclude('org0')] if i % 5000 == 0 else None
+    target = JvmTarget(name=address.target_name, address=address, build_graph=build_graph,
+                       excludes=excludes)
+    dependencies = rng.sample(targets, min(len(targets), 3))
+    build_graph.inject_target(target, dependencies=[dep.address for dep in dependencies])
+    classpath_products.add_for_target(
+      target, [('default', os.path.join(_WORKDIR, 'classes', target.id))])
+    classpath_products.add_jars_for_targets([target], 'default', rng.sample(jars, 3))
+    targets.append(target)
+
+  classpath_products.add_excludes_for_targets(targets)
+  return targets, classpath_products
+
+
+def _time_queries(classpath_products, closures, iterations):
+  start = time.time()
+  for _ in range(iterations):
+    for closure in closures:
+      classpath_products.get_for_targets(closure)
+  return (time.time() - start) / (iterations * len(closures))
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--targets', type=int, default=50000)
+  parser.add_argument('--jars', type=int, default=5000)
+  parser.add_argument('--roots', type=int, default=20)
+  parser.add_argument('--iterations', type=int, default=5)
+  args = parser.parse_args()
+
+  rng = random.Random(0)
+  start = time.time()
+  targets, classpath_products = _build_graph(args.targets, args.jars, rng)
+  print('built {} targets in {:.2f}s'.format(len(targets), time.time() - start))
+
+  closures = [root.closure(bfs=True) for root in targets[-args.roots:]]
+  mean_size = sum(len(closure) for closure in closures) / len(closures)
+  print('{} closures of {:.0f} targets on average'.format(len(closures), mean_size))
+
+  print('{:<40} {:>12}'.format('query', 'ms/query'))
+  print('{:<40} {:>12.2f}'.format('cold', 1000 * _time_queries(classpath_products, closures, 1)))
+  print('{:<40} {:>12.2f}'.format('memoized', 1000 * _time_queries(classpath_products, closures,
+                                                                   args.iterations)))
+  classpath_products.add_for_target(targets[0], [('default', os.path.join(_WORKDIR, 'extra'))])
+  print('{:<40} {:>12.2f}'.format('after add_for_target',
+                                  1000 * _time_queries(classpath_products, closures, 1)))
+
+
+if __name__ == '__main__':
+  main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python2.7
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+# Benchmarks the throughput of simultaneous pailgun clients of a single pantsd.
+#
+# usage: benchmark_pantsd_clients.py [--clients=4] [--rounds=3] [--pants=./pants] [goal args...]
+#
+# For example, from the root of a repo:
+#
+#   benchmark_pantsd_clients.py --clients=8 list ::
+#
+# A first run starts pantsd and warms its product graph. Each round then runs the given goals with
+# one client at a time and with all of the clients at once, and reports the wall time and the
+# throughput in runs per second of both. The daemon is killed when the benchmark completes.
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+
+def _run_clients(command, num_clients):
+  """Runs the command in num_clients simultaneous processes, and returns their wall time."""
+  start = time.time()
+  with open(os.devnull, 'w') as devnull:
+    processes = [subprocess.Popen(command, stdout=devnull, stderr=subprocess.STDOUT)
+                 for _ in range(num_clients)]
+    failures = [process for process in processes if process.wait() != 0]
+  if failures:
+    sys.exit('{} of {} clients failed running: {}'.format(len(failures), num_clients,
+                                                          ' '.join(command)))
+  return time.time() - start
+
+
+def main():
+  parser = argparse.ArgumentParser()
+  parser.add_argument('--clients', type=int, default=4)
+  parser.add_argument('--rounds', type=int, default=3)
+  parser.add_argument('--pants', default='./pants')
+  parser.add_argument('args', nargs=argparse.REMAINDER)
+  args = parser.parse_args()
+
+  command = [args.pants, '--enable-pantsd'] + (args.args or ['list', '::'])
+  try:
+    print('warming pantsd in {:.2f}s'.format(_run_clients(command, 1)))
+
+    print('{:<10} {:>12} {:>12} {:>12} {:>12}'.format('round', 'serial s', 'serial r/s',
+                                                       'parallel s', 'parallel r/s'))
+    for i in range(args.rounds):
+      serial = sum(_run_clients(command, 1) for _ in range(args.clients))
+      parallel = _run_clients(command, args.clients)
+      print('{:<10} {:>12.2f} {:>12.2f} {:>12.2f} {:>12.2f}'.format(
+        i, serial, args.clients / serial, parallel, args.clients / parallel))
+  finally:
+    subprocess.call([args.pants, 'kill-pantsd'])
+
+
+if __name__ == '__main__':
+  main()
@@ -11,13 +11,16 @@ import logging
 import os
 import pkgutil
 import threading
+import xml.etree.cElementTree as cElementTree
 import xml.etree.ElementTree as ET
 from abc import abstractmethod
 from collections import OrderedDict, defaultdict, namedtuple
+from hashlib import sha1
 
 import six
 from twitter.common.collections import OrderedSet
 
+from pants.backend.jvm.maven_artifact_fetcher import MavenArtifactFetcher
 from pants.backend.jvm.subsystems.jar_dependency_management import (JarDependencyManagement,
                                                                     PinnedJarArtifactSet)
 from pants.backend.jvm.targets.jar_library import JarLibrary
@@ -131,6 +134,17 @@ class IvyResolutionStep(object):
 class IvyFetchStep(IvyResolutionStep):
   """Resolves ivy artifacts using the coordinates from a previous resolve."""
 
+  def __init__(self, confs, hash_name, pinned_artifacts, soft_excludes, ivy_cache_dir,
+               global_ivy_workdir, artifact_fetcher=None):
+    """
+    :param artifact_fetcher: An optional fetcher to fetch the artifacts of the previous resolve
+                             with instead of Ivy. Ivy still fetches them if it fails.
+    :type artifact_fetcher: :class:`pants.backend.jvm.maven_artifact_fetcher.MavenArtifactFetcher`
+    """
+    super(IvyFetchStep, self).__init__(confs, hash_name, pinned_artifacts, soft_excludes,
+                                       ivy_cache_dir, global_ivy_workdir)
+    self._artifact_fetcher = artifact_fetcher
+
   def required_load_files_exist(self):
     return (all(os.path.isfile(report) for report in self.workdir_reports_by_conf.values()) and
                 os.path.isfile(self.ivy_cache_classpath_filename) and
@@ -164,8 +178,9 @@ class IvyFetchStep(IvyResolutionStep):
       logger.debug('Failed to load {}: {}'.format(self.frozen_resolve_file, e))
       return NO_RESOLVE_RUN_RESULT
 
-    self._do_fetch(executor, extra_args, frozen_resolutions, jvm_options,
-                           workunit_name, workunit_factory)
+    if not self._fetch_without_ivy(frozen_resolutions):
+      self._do_fetch(executor, extra_args, frozen_resolutions, jvm_options,
+                             workunit_name, workunit_factory)
     result = self._load_from_fetch(frozen_resolutions)
 
     if not result.all_linked_artifacts_exist():
@@ -180,7 +195,66 @@ class IvyFetchStep(IvyResolutionStep):
                                  symlink_map,
                                  self.hash_name,
                                  self.workdir_reports_by_conf,
-                                 frozen_resolutions)
+                                 frozen_resolutions,
+                                 cache_parsed_reports=True)
+
+  def _fetch_without_ivy(self, frozen_resolutions):
+    """Fetches the artifacts of the frozen resolutions with the artifact fetcher, if there is one.
+
+    Writes the raw classpath and the reports an Ivy fetch would have, so that the result loads the
+    same way.
+
+    :returns: `True` if all the artifacts were fetched, or `False` if Ivy should fetch them.
+    """
+    if self._artifact_fetcher is None:
+      return False
+
+    coordinates_by_conf = OrderedDict()
+    types_by_coordinate = {}
+    for conf in self.confs:
+      resolution = frozen_resolutions.get(conf)
+      if resolution is None:
+        logger.debug("Couldn't find the frozen resolution for the {!r} ivy conf.".format(conf))
+        return False
+      if any(attributes.get('url') for attributes in resolution.coordinate_to_attributes.values()):
+        # Jars with explicit urls are not in the repository, so leave them to Ivy.
+        logger.debug('Fetching jars with urls for the {!r} ivy conf using ivy.'.format(conf))
+        return False
+      coordinates_by_conf[conf] = resolution.all_resolved_coordinates
+      types_by_coordinate.update(resolution.coordinate_to_type)
+
+    all_coordinates = OrderedDict.fromkeys(coordinate
+                                           for coordinates in coordinates_by_conf.values()
+                                           for coordinate in coordinates)
+    try:
+      cache_paths = self._artifact_fetcher.fetch(all_coordinates, types_by_coordinate)
+    except MavenArtifactFetcher.Error as e:
+      logger.debug('Falling back to fetching with ivy: {}'.format(e))
+      return False
+
+    for conf, coordinates in coordinates_by_conf.items():
+      self._write_fetch_report(conf, coordinates, cache_paths)
+    with safe_concurrent_creation(self.ivy_cache_classpath_filename) as raw_classpath:
+      with open(raw_classpath, 'w') as fp:
+        fp.write(os.pathsep.join(OrderedSet(cache_paths.values())))
+    return True
+
+  def _write_fetch_report(self, conf, coordinates, cache_paths):
+    root = ET.Element('ivy-report', version='1.0')
+    ET.SubElement(root, 'info', organisation=IvyUtils.INTERNAL_ORG_NAME,
+                  module='{}-fetch'.format(self.hash_name), conf=conf)
+    dependencies = ET.SubElement(root, 'dependencies')
+    for coordinate in coordinates:
+      module = ET.SubElement(dependencies, 'module', organisation=coordinate.org,
+                             name=coordinate.name)
+      revision = ET.SubElement(module, 'revision', name=coordinate.rev)
+      artifacts = ET.SubElement(revision, 'artifacts')
+      artifact = ET.SubElement(artifacts, 'artifact', name=coordinate.name, ext=coordinate.ext,
+                               location=cache_paths[coordinate])
+      if coordinate.classifier:
+        artifact.set('extra-classifier', coordinate.classifier)
+    with safe_concurrent_creation(self.workdir_reports_by_conf[conf]) as report:
+      ET.ElementTree(root).write(report, encoding='UTF-8')
 
   def _do_fetch(self, executor, extra_args, frozen_resolution, jvm_options, workunit_name,
                         workunit_factory):
@@ -227,7 +301,8 @@ class IvyResolveStep(IvyResolutionStep):
     return IvyResolveResult(artifact_paths,
                             symlink_map,
                             self.hash_name,
-                            self.workdir_reports_by_conf)
+                            self.workdir_reports_by_conf,
+                            cache_parsed_reports=True)
 
   def exec_and_load(self, executor, extra_args, targets, jvm_options,
                        workunit_name, workunit_factory):
@@ -282,6 +357,8 @@ class FrozenResolution(object):
     self.target_to_resolved_coordinates = defaultdict(OrderedSet)
     self.all_resolved_coordinates = OrderedSet()
     self.coordinate_to_attributes = OrderedDict()
+    # The Ivy types of the resolved artifacts whose type is not their extension.
+    self.coordinate_to_type = OrderedDict()
 
   @property
   def jar_dependencies(self):
@@ -294,6 +371,14 @@ class FrozenResolution(object):
     coords = [j.coordinate for j in resolved_jars]
     self.add_resolution_coords(target, coords)
 
+    for j in resolved_jars:
+      if j.cache_path:
+        # Ivy caches artifacts in a directory named for their type, by its `[type]s` cache pattern.
+        type_dir = os.path.basename(os.path.dirname(j.cache_path))
+        artifact_type = type_dir[:-1] if type_dir.endswith('s') else None
+        if artifact_type and artifact_type != j.coordinate.ext:
+          self.coordinate_to_type[j.coordinate] = artifact_type
+
     # Assuming target is a jar library.
     for j in target.jar_dependencies:
       url = j.get_url(relative=True)
@@ -347,6 +432,10 @@ class FrozenResolution(object):
         m2 = m2_for(coord)
         resolution.coordinate_to_attributes[m2] = attr_dict
 
+      # Not recorded by older versions.
+      for coord, artifact_type in serialized_resolution.get('coord_to_type', {}).items():
+        resolution.coordinate_to_type[m2_for(coord)] = artifact_type
+
       for spec, coord_strs in serialized_resolution['target_to_coords'].items():
         t = target_lookup.get(spec, None)
         if t is None:
@@ -364,7 +453,9 @@ class FrozenResolution(object):
       res[conf] = OrderedDict([
         ['target_to_coords',resolution.target_spec_to_coordinate_strings()],
         ['coord_to_attrs', OrderedDict([str(c), attrs]
-                                       for c, attrs in resolution.coordinate_to_attributes.items())]
+                                       for c, attrs in resolution.coordinate_to_attributes.items())],
+        ['coord_to_type', OrderedDict([str(c), artifact_type]
+                                      for c, artifact_type in resolution.coordinate_to_type.items())]
       ])
 
     with safe_concurrent_creation(filename) as tmp_filename:
@@ -379,11 +470,18 @@ class IvyResolveResult(object):
   and the targets that requested them and the hash name of the resolve.
   """
 
-  def __init__(self, resolved_artifact_paths, symlink_map, resolve_hash_name, reports_by_conf):
+  def __init__(self, resolved_artifact_paths, symlink_map, resolve_hash_name, reports_by_conf,
+               cache_parsed_reports=False):
+    """
+    :param bool cache_parsed_reports: True to cache the parsed reports next to the reports, which
+                                      must then be in a writable workdir.
+    """
     self._reports_by_conf = reports_by_conf
     self.resolved_artifact_paths = resolved_artifact_paths
     self.resolve_hash_name = resolve_hash_name
     self._symlink_map = symlink_map
+    self._cache_parsed_reports = cache_parsed_reports
+    self._ivy_info_by_conf = {}
 
   @property
   def has_resolved_artifacts(self):
@@ -445,8 +543,16 @@ class IvyResolveResult(object):
     return target.jar_dependencies
 
   def _ivy_info_for(self, conf):
-    report_path = self._reports_by_conf.get(conf)
-    return IvyUtils.parse_xml_report(conf, report_path)
+    ivy_info = self._ivy_info_by_conf.get(conf)
+    if ivy_info is None:
+      report_path = self._reports_by_conf.get(conf)
+      # Reports in the workdir are rewritten in place by later resolves, so a parsed report is
+      # only used while its report is unchanged.
+      cache_path = (IvyUtils.parsed_report_path(report_path)
+                    if self._cache_parsed_reports and report_path else None)
+      ivy_info = IvyUtils.parse_xml_report(conf, report_path, cache_path=cache_path)
+      self._ivy_info_by_conf[conf] = ivy_info
+    return ivy_info
 
   def _new_resolved_jar_with_symlink_path(self, conf, target, resolved_jar_without_symlink):
     def candidate_cache_paths():
@@ -483,9 +589,10 @@ class IvyFetchResolveResult(IvyResolveResult):
   """A resolve result that uses the frozen resolution to look up dependencies."""
 
   def __init__(self, resolved_artifact_paths, symlink_map, resolve_hash_name, reports_by_conf,
-               frozen_resolutions):
+               frozen_resolutions, cache_parsed_reports=False):
     super(IvyFetchResolveResult, self).__init__(resolved_artifact_paths, symlink_map,
-                                                resolve_hash_name, reports_by_conf)
+                                                resolve_hash_name, reports_by_conf,
+                                                cache_parsed_reports=cache_parsed_reports)
     self._frozen_resolutions = frozen_resolutions
 
   def _jar_dependencies_for_target(self, conf, target):
@@ -886,14 +993,29 @@ class IvyUtils(object):
     return os.path.join(cache_dir, '{}-{}-{}.xml'.format(IvyUtils.INTERNAL_ORG_NAME,
                                                          resolve_hash_name, conf))
 
+  # Bump when the serialized form of parsed reports changes.
+  _PARSED_REPORT_VERSION = 1
+
   @classmethod
-  def parse_xml_report(cls, conf, path):
+  def parsed_report_path(cls, report_path):
+    """The path to cache the parsed form of the given ivy xml report at.
+
+    :param string report_path: The path of an ivy xml report.
+    :rtype: string
+    """
+    return '{}.parsed.json'.format(report_path)
+
+  @classmethod
+  def parse_xml_report(cls, conf, path, cache_path=None):
     """Parse the ivy xml report corresponding to the name passed to ivy.
 
     :API: public
 
     :param string conf: the ivy conf name (e.g. "default")
     :param string path: The path to the ivy report file.
+    :param string cache_path: An optional path to cache the parsed report at. If the report has not
+                              changed since it was cached, it is loaded from the cache instead of
+                              being parsed.
     :returns: The info in the xml report.
     :rtype: :class:`IvyInfo`
     :raises: :class:`IvyResolveMappingError` if no report exists.
@@ -901,33 +1023,123 @@ class IvyUtils(object):
     if not os.path.exists(path):
       raise cls.IvyResolveReportError('Missing expected ivy output file {}'.format(path))
 
+    report_hash = None
+    if cache_path:
+      report_hash = cls._hash_report(path)
+      modules = cls._load_parsed_report(cache_path, report_hash)
+      if modules is not None:
+        logger.debug("Loaded parsed ivy report {} from {}".format(path, cache_path))
+        return cls._ivy_info_for_modules(conf, modules)
+
     logger.debug("Parsing ivy report {}".format(path))
+    modules = list(cls._parse_xml_report_modules(path))
+    if cache_path:
+      cls._save_parsed_report(cache_path, report_hash, modules)
+    return cls._ivy_info_for_modules(conf, modules)
+
+  @staticmethod
+  def _ivy_info_for_modules(conf, modules):
     ret = IvyInfo(conf)
-    etree = ET.parse(path)
-    doc = etree.getroot()
-    for module in doc.findall('dependencies/module'):
-      org = module.get('organisation')
-      name = module.get('name')
-      for revision in module.findall('revision'):
-        rev = revision.get('name')
-        callers = []
-        for caller in revision.findall('caller'):
-          callers.append(IvyModuleRef(caller.get('organisation'),
-                                      caller.get('name'),
-                                      caller.get('callerrev')))
-
-        for artifact in revision.findall('artifacts/artifact'):
-          classifier = artifact.get('extra-classifier')
-          ext = artifact.get('ext')
-          ivy_module_ref = IvyModuleRef(org=org, name=name, rev=rev,
-                                        classifier=classifier, ext=ext)
-
-          artifact_cache_path = artifact.get('location')
-          ivy_module = IvyModule(ivy_module_ref, artifact_cache_path, tuple(callers))
-
-          ret.add_module(ivy_module)
+    for ivy_module in modules:
+      ret.add_module(ivy_module)
     return ret
 
+  @staticmethod
+  def _hash_report(path):
+    hasher = sha1()
+    with open(path, 'rb') as fp:
+      for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+  @classmethod
+  def _load_parsed_report(cls, cache_path, report_hash):
+    try:
+      with open(cache_path, 'rb') as fp:
+        parsed = json.load(fp)
+    except (IOError, OSError, ValueError) as e:
+      logger.debug('Not loading parsed ivy report from {}: {!r}'.format(cache_path, e))
+      return None
+    if (parsed.get('version') != cls._PARSED_REPORT_VERSION or
+        parsed.get('report_hash') != report_hash):
+      return None
+    refs = [IvyModuleRef(*ref_fields) for ref_fields in parsed['refs']]
+    return [IvyModule(refs[ref], artifact, tuple(refs[caller] for caller in callers))
+            for ref, artifact, callers in parsed['modules']]
+
+  @classmethod
+  def _save_parsed_report(cls, cache_path, report_hash, modules):
+    # Callers recur across modules, so each distinct ref is stored once, and referred to by index.
+    index_by_ref = OrderedDict()
+
+    def ref_index(ref):
+      return index_by_ref.setdefault(ref, len(index_by_ref))
+
+    parsed_modules = [[ref_index(module.ref), module.artifact,
+                       [ref_index(caller) for caller in module.callers]] for module in modules]
+    parsed = {
+      'version': cls._PARSED_REPORT_VERSION,
+      'report_hash': report_hash,
+      'refs': [[ref.org, ref.name, ref.rev, ref.classifier, ref.ext] for ref in index_by_ref],
+      'modules': parsed_modules,
+    }
+    try:
+      with safe_concurrent_creation(cache_path) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          json.dump(parsed, fp)
+    except (IOError, OSError) as e:
+      logger.debug('Failed to cache parsed ivy report at {}: {!r}'.format(cache_path, e))
+
+  @staticmethod
+  def _parse_xml_report_modules(path):
+    """Yields the IvyModules of the resolved artifacts in the given ivy xml report.
+
+    The report is parsed incrementally, and each module's elements are discarded once it has been
+    read, so memory use is bounded by the size of the largest module rather than of the report.
+    """
+    module_path = ('dependencies', 'module')
+    revision_path = module_path + ('revision',)
+    caller_path = revision_path + ('caller',)
+    artifact_path = revision_path + ('artifacts', 'artifact')
+
+    # The tags of the elements from the root element to the current one.
+    tags = []
+    dependencies = None
+    org = name = rev = None
+    callers = []
+    artifacts = []
+    for event, elem in cElementTree.iterparse(path, events=(b'start', b'end')):
+      if event == b'start':
+        tags.append(elem.tag)
+        # NB: The attributes of an element are available at its start, but its children are not.
+        element_path = tuple(tags[1:])
+        if element_path == ('dependencies',):
+          dependencies = elem
+        elif element_path == module_path:
+          org = elem.get('organisation')
+          name = elem.get('name')
+        elif element_path == revision_path:
+          rev = elem.get('name')
+          callers = []
+          artifacts = []
+        elif element_path == caller_path:
+          callers.append(IvyModuleRef(elem.get('organisation'),
+                                      elem.get('name'),
+                                      elem.get('callerrev')))
+        elif element_path == artifact_path:
+          artifacts.append((elem.get('extra-classifier'), elem.get('ext'), elem.get('location')))
+      else:
+        element_path = tuple(tags[1:])
+        if element_path == revision_path:
+          for classifier, ext, artifact_cache_path in artifacts:
+            ivy_module_ref = IvyModuleRef(org=org, name=name, rev=rev,
+                                          classifier=classifier, ext=ext)
+            yield IvyModule(ivy_module_ref, artifact_cache_path, tuple(callers))
+        elif element_path == module_path:
+          # The module has been read: discard it, so that the tree does not grow with the report.
+          dependencies.clear()
+        tags.pop()
+
   @classmethod
   def generate_ivy(cls, targets, jars, excludes, ivyxml, confs, resolve_hash_name=None,
                    pinned_artifacts=None, jar_dep_manager=None):
@@ -0,0 +1,171 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
+
+import requests
+
+from pants.net.http.fetcher import Fetcher
+from pants.util.dirutil import safe_concurrent_creation, safe_delete
+
+
+logger = logging.getLogger(__name__)
+
+
+class MavenArtifactFetcher(object):
+  """Fetches the artifacts of resolved coordinates from a Maven layout repository into an Ivy cache.
+
+  This does the work of an Ivy fetch of an already frozen resolution without starting Ivy: each
+  artifact missing from the Ivy cache is downloaded from the repository, concurrently, and verified
+  against the sha1 checksum the repository publishes next to it.
+  """
+
+  class Error(Exception):
+    """Indicates a failure to fetch an artifact."""
+
+  # The Ivy artifact types of these classifiers, for artifacts whose type is not known; other such
+  # artifacts are assumed to have the type of their extension.
+  _TYPE_BY_CLASSIFIER = {
+    'javadoc': 'javadoc',
+    'sources': 'source',
+    'tests': 'test-jar',
+  }
+
+  class _ContentListener(Fetcher.Listener):
+    def __init__(self):
+      self.chunks = []
+
+    def recv_chunk(self, data):
+      self.chunks.append(data)
+
+    @property
+    def content(self):
+      return b''.join(self.chunks)
+
+  def __init__(self, repository_url, ivy_cache_dir, concurrency=8, timeout_secs=10,
+               proxies=None, root_dir=None):
+    """
+    :param string repository_url: The url of the Maven layout repository to fetch from; either an
+                                  http(s) or a `file://` url.
+    :param string ivy_cache_dir: The Ivy cache directory to fetch artifacts into.
+    :param int concurrency: The maximum number of artifacts to fetch at once.
+    :param int timeout_secs: Time out a fetch if its connection is idle for longer than this.
+    :param dict proxies: An optional map of url scheme to the proxy url to use for it.
+    :param string root_dir: The directory to find relative `file://` urls against; the current
+                            directory by default.
+    """
+    self._repository_url = repository_url.rstrip('/')
+    self._ivy_cache_dir = ivy_cache_dir
+    self._concurrency = concurrency
+    self._timeout_secs = timeout_secs
+
+    session = requests.Session()
+    if proxies:
+      session.proxies.update(proxies)
+    self._fetcher = Fetcher(root_dir or os.getcwd(), requests_api=session)
+
+  def artifact_url(self, coordinate):
+    """Returns the url of the artifact of the given coordinate in the repository.
+
+    :param coordinate: The coordinate of a resolved artifact; must have a rev.
+    :type coordinate: :class:`pants.java.jar.M2Coordinate`
+    """
+    return '/'.join([self._repository_url,
+                     coordinate.org.replace('.', '/'),
+                     coordinate.name,
+                     coordinate.rev,
+                     self._artifact_filename(coordinate)])
+
+  def cache_path(self, coordinate, artifact_type=None):
+    """Returns the path the artifact of the given coordinate has in the Ivy cache.
+
+    Ivy caches artifacts in a directory named for their type (the default `[type]s` cache pattern),
+    which is not always that of their extension: e.g. the jar of a `bundle` packaged module.
+
+    :param coordinate: The coordinate of a resolved artifact; must have a rev.
+    :type coordinate: :class:`pants.java.jar.M2Coordinate`
+    :param string artifact_type: The Ivy type of the artifact, if known.
+    """
+    artifact_type = artifact_type or self._TYPE_BY_CLASSIFIER.get(coordinate.classifier,
+                                                                  coordinate.ext)
+    return os.path.join(self._ivy_cache_dir, coordinate.org, coordinate.name,
+                        '{}s'.format(artifact_type), self._artifact_filename(coordinate))
+
+  def fetch(self, coordinates, types_by_coordinate=None):
+    """Ensures the artifacts of the given coordinates are in the Ivy cache.
+
+    :param coordinates: The coordinates of resolved artifacts.
+    :type coordinates: :class:`collections.Iterable` of :class:`pants.java.jar.M2Coordinate`
+    :param dict types_by_coordinate: The Ivy types of the artifacts of coordinates, where known.
+    :returns: The Ivy cache path of the artifact of each coordinate, in order.
+    :rtype: :class:`collections.OrderedDict` of :class:`pants.java.jar.M2Coordinate` to string
+    :raises: :class:`MavenArtifactFetcher.Error` if any artifact could not be fetched.
+    """
+    types_by_coordinate = types_by_coordinate or {}
+    cache_paths = OrderedDict()
+    for coordinate in coordinates:
+      if not coordinate.rev:
+        raise self.Error('Cannot fetch {} without a rev.'.format(coordinate))
+      cache_paths[coordinate] = self.cache_path(coordinate, types_by_coordinate.get(coordinate))
+
+    missing = [(coordinate, path) for coordinate, path in cache_paths.items()
+               if not os.path.isfile(path)]
+    if missing:
+      logger.debug('Fetching {} of {} artifacts from {}'.format(len(missing), len(cache_paths),
+                                                                self._repository_url))
+      pool = ThreadPool(processes=min(self._concurrency, len(missing)))
+      try:
+        pool.map(self._fetch_artifact, missing, chunksize=1)
+      except Exception:
+        # Don't start fetching the remaining artifacts once one has failed.
+        pool.terminate()
+        raise
+      else:
+        pool.close()
+      finally:
+        pool.join()
+    return cache_paths
+
+  @staticmethod
+  def _artifact_filename(coordinate):
+    if coordinate.classifier:
+      return '{}-{}-{}.{}'.format(coordinate.name, coordinate.rev, coordinate.classifier,
+                                  coordinate.ext)
+    return '{}-{}.{}'.format(coordinate.name, coordinate.rev, coordinate.ext)
+
+  def _fetch_artifact(self, coordinate_and_path):
+    coordinate, path = coordinate_and_path
+    url = self.artifact_url(coordinate)
+    try:
+      expected_sha1 = self._fetch_sha1(url)
+      with safe_concurrent_creation(path) as tmp_path:
+        try:
+          listener = Fetcher.ChecksumListener(digest=hashlib.sha1())
+          self._fetcher.download(url, listener=listener, path_or_fd=tmp_path,
+                                 timeout_secs=self._timeout_secs)
+          if listener.checksum != expected_sha1:
+            raise self.Error('The sha1 of {} is {}, expected {}.'.format(url, listener.checksum,
+                                                                         expected_sha1))
+        except BaseException:
+          # Leave no partial or corrupt artifact behind in the Ivy cache.
+          safe_delete(tmp_path)
+          raise
+    except (Fetcher.Error, IOError, OSError) as e:
+      raise self.Error('Failed to fetch {}: {}'.format(url, e))
+
+  def _fetch_sha1(self, url):
+    listener = self._ContentListener()
+    self._fetcher.fetch('{}.sha1'.format(url), listener, timeout_secs=self._timeout_secs)
+    # Checksum files contain the hex digest, optionally followed by the name of the file.
+    fields = listener.content.decode('ascii', 'replace').split()
+    if not fields:
+      raise self.Error('The checksum of {} is empty.'.format(url))
+    return fields[0].lower()
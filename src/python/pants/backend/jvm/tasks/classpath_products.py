@@ -5,10 +5,11 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import itertools
 import os
 import re
-
-from twitter.common.collections import OrderedSet
+import threading
+from collections import OrderedDict
 
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
@@ -86,6 +87,7 @@ class ArtifactClasspathEntry(ClasspathEntry):
     super(ArtifactClasspathEntry, self).__init__(path)
     self._coordinate = coordinate
     self._cache_path = cache_path
+    self._hash = None
 
   @property
   def coordinate(self):
@@ -115,7 +117,11 @@ class ArtifactClasspathEntry(ClasspathEntry):
     return any(_matches_exclude(self.coordinate, exclude) for exclude in excludes)
 
   def __hash__(self):
-    return hash((self.path, self.coordinate, self.cache_path))
+    # Entries are hashed repeatedly when deduplicating classpaths, and hashing the coordinate is not
+    # cheap.
+    if self._hash is None:
+      self._hash = hash((self.path, self.coordinate, self.cache_path))
+    return self._hash
 
   def __eq__(self, other):
     return (isinstance(other, ArtifactClasspathEntry) and
@@ -143,10 +149,31 @@ def _matches_exclude(coordinate, exclude):
 
 
 def _not_excluded_filter(excludes):
+  # Index the excludes by org and by (org, name), so that filtering a classpath is not proportional
+  # to the number of excludes.
+  excluded_orgs = set()
+  excluded_names = set()
+  for exclude in excludes:
+    if exclude.name:
+      excluded_names.add((exclude.org, exclude.name))
+    else:
+      excluded_orgs.add(exclude.org)
+
+  def is_excluded(classpath_entry):
+    entry_type = type(classpath_entry)
+    if entry_type is ArtifactClasspathEntry:
+      coordinate = classpath_entry.coordinate
+      return (coordinate.org in excluded_orgs or
+              (coordinate.org, coordinate.name) in excluded_names)
+    elif entry_type is ClasspathEntry:
+      return False
+    else:
+      return classpath_entry.is_excluded_by(excludes)
+
   def not_excluded(product_to_target):
     path_tuple = product_to_target[0]
     conf, classpath_entry = path_tuple
-    return not classpath_entry.is_excluded_by(excludes)
+    return not is_excluded(classpath_entry)
   return not_excluded
 
 
@@ -159,10 +186,22 @@ class ClasspathProducts(object):
   :API: public
   """
 
+  # The maximum number of memoized classpaths. Each is linear in the size of a classpath, and they
+  # are dropped in least recently used order.
+  _MAX_MEMOIZED_CLASSPATHS = 256
+
   def __init__(self, pants_workdir, classpaths=None, excludes=None):
     self._classpaths = classpaths or UnionProducts()
     self._excludes = excludes or UnionProducts()
     self._pants_workdir = pants_workdir
+    # (entry type, conf, classpath entry) -> the one (conf, classpath entry) tuple added for it, so
+    # that an entry added for many targets is stored once.
+    self._interned = {}
+    # The classpaths and exclude closures computed for sets of targets, as tuples. They are
+    # invalidated by any change to the classpaths or excludes, which bumps the generation.
+    self._memoized = OrderedDict()
+    self._generation = 0
+    self._lock = threading.Lock()
 
   @staticmethod
   def init_func(pants_workdir):
@@ -293,6 +332,35 @@ class ClasspathProducts(object):
                              classpaths=self._classpaths.copy(),
                              excludes=self._excludes.copy())
 
+  def _invalidate(self):
+    with self._lock:
+      self._generation += 1
+      self._memoized.clear()
+
+  def _memoized_tuple(self, key, compute):
+    """Returns the memoized tuple for the given key, computing and memoizing it if needed.
+
+    Results computed concurrently with a change to this ClasspathProducts are not memoized.
+    """
+    with self._lock:
+      value = self._memoized.pop(key, None)
+      if value is not None:
+        self._memoized[key] = value
+        return value
+      generation = self._generation
+    value = tuple(compute())
+    with self._lock:
+      if generation == self._generation:
+        if len(self._memoized) >= self._MAX_MEMOIZED_CLASSPATHS:
+          self._memoized.popitem(last=False)
+        self._memoized[key] = value
+    return value
+
+  def _intern(self, classpath_tuple):
+    conf, classpath_entry = classpath_tuple
+    key = (type(classpath_entry), conf, classpath_entry)
+    return self._interned.setdefault(key, classpath_tuple)
+
   def add_for_targets(self, targets, classpath_elements):
     """Adds classpath path elements to the products of all the provided targets."""
     for target in targets:
@@ -312,7 +380,7 @@ class ClasspathProducts(object):
       if not jar.pants_path:
         raise TaskError('Jar: {!s} has no specified path.'.format(jar.coordinate))
       cp_entry = ArtifactClasspathEntry(jar.pants_path, jar.coordinate, jar.cache_path)
-      classpath_entries.append((conf, cp_entry))
+      classpath_entries.append(self._intern((conf, cp_entry)))
 
     for target in targets:
       self._add_elements_for_target(target, classpath_entries)
@@ -327,10 +395,12 @@ class ClasspathProducts(object):
     """
     for target in targets:
       self._add_excludes_for_target(target)
+    self._invalidate()
 
   def remove_for_target(self, target, classpath_elements):
     """Removes the given entries for the target."""
     self._classpaths.remove_for_target(target, self._wrap_path_elements(classpath_elements))
+    self._invalidate()
 
   def get_for_target(self, target):
     """Gets the classpath products for the given target.
@@ -367,10 +437,16 @@ class ClasspathProducts(object):
     :returns: The ordered (conf, classpath entry) tuples.
     :rtype: list of (string, :class:`ClasspathEntry`)
     """
+    targets = tuple(targets)
 
-    # remove the duplicate, preserve the ordering.
-    return list(OrderedSet([cp for cp, target in self.get_product_target_mappings_for_targets(
-                            targets, respect_excludes)]))
+    def compute():
+      # remove the duplicate, preserve the ordering.
+      seen = set()
+      for cp, target in self.get_product_target_mappings_for_targets(targets, respect_excludes):
+        if cp not in seen:
+          seen.add(cp)
+          yield cp
+    return list(self._memoized_tuple(('entries', targets, respect_excludes), compute))
 
   def get_product_target_mappings_for_targets(self, targets, respect_excludes=True):
     """Gets the classpath products-target associations for the given targets.
@@ -381,11 +457,15 @@ class ClasspathProducts(object):
     :param bool respect_excludes: `True` to respect excludes; `False` to ignore them.
     :returns: The ordered (classpath products, target) tuples.
     """
-    classpath_target_tuples = self._classpaths.get_product_target_mappings_for_targets(targets)
-    if respect_excludes:
-      return self._filter_by_excludes(classpath_target_tuples, targets)
-    else:
-      return classpath_target_tuples
+    targets = tuple(targets)
+
+    def compute():
+      classpath_target_tuples = self._classpaths.get_product_target_mappings_for_targets(targets)
+      if respect_excludes:
+        return self._filter_by_excludes(classpath_target_tuples, targets)
+      else:
+        return classpath_target_tuples
+    return list(self._memoized_tuple(('mappings', targets, respect_excludes), compute))
 
   def get_artifact_classpath_entries_for_targets(self, targets, respect_excludes=True):
     """Gets the artifact classpath products for the given targets.
@@ -427,12 +507,20 @@ class ClasspathProducts(object):
       self._classpaths.add_for_target(target, products)
     for target, products in other._excludes._products_by_target.items():
       self._excludes.add_for_target(target, products)
+    self._invalidate()
 
   def _filter_by_excludes(self, classpath_target_tuples, root_targets):
     # Excludes are always applied transitively, so regardless of whether a transitive
     # set of targets was included here, their closure must be included.
-    closure = BuildGraph.closure(root_targets, bfs=True)
-    excludes = self._excludes.get_for_targets(closure)
+    def compute():
+      # The order of the excludes does not matter, so avoid building an ordered set of them.
+      closure = BuildGraph.closure(root_targets, bfs=True)
+      excludes_by_target = self._excludes._products_by_target
+      return set(itertools.chain.from_iterable(excludes_by_target.get(target, ())
+                                               for target in closure))
+    excludes = self._memoized_tuple(('excludes', root_targets), compute)
+    if not excludes:
+      return classpath_target_tuples
     return filter(_not_excluded_filter(excludes), classpath_target_tuples)
 
   def _add_excludes_for_target(self, target):
@@ -443,11 +531,13 @@ class ClasspathProducts(object):
       self._excludes.add_for_target(target, target.excludes)
 
   def _wrap_path_elements(self, classpath_elements):
-    return [(element[0], ClasspathEntry(element[1])) for element in classpath_elements]
+    return [self._intern((element[0], ClasspathEntry(element[1])))
+            for element in classpath_elements]
 
   def _add_elements_for_target(self, target, elements):
     self._validate_classpath_tuples(elements, target)
     self._classpaths.add_for_target(target, elements)
+    self._invalidate()
 
   def _validate_classpath_tuples(self, classpath, target):
     """Validates that all files are located within the working directory, to simplify relativization.
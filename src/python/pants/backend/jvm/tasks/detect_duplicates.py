@@ -5,15 +5,17 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import itertools
 import os
 import re
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.backend.jvm.tasks.jar_contents_index import JarContentsIndex
 from pants.backend.jvm.tasks.jvm_binary_task import JvmBinaryTask
 from pants.base.exceptions import TaskError
 from pants.java.jar.manifest import Manifest
-from pants.util.memo import memoized_property
+from pants.util.memo import memoized_method, memoized_property
 
 
 EXCLUDED_FILES = ['.DS_Store', 'cmdline.arg.info.txt.1', 'dependencies',
@@ -65,14 +67,25 @@ class DuplicateDetector(JvmBinaryTask):
   def exclude_patterns(self):
     return [re.compile(x) for x in set(self.get_options().exclude_patterns or [])]
 
+  @memoized_property
+  def _jar_contents_index(self):
+    return JarContentsIndex(os.path.join(self.workdir, 'jar_contents'))
+
   def execute(self):
     if self.get_options().skip:
       self.context.log.debug("Duplicate checking is disabled.")
       return None
 
+    artifacts_by_binary = OrderedDict((binary_target, self._get_artifacts(binary_target))
+                                      for binary_target in filter(self.is_binary,
+                                                                  self.context.targets()))
+    all_artifacts = set(itertools.chain.from_iterable(artifacts_by_binary.values()))
+    duplicated_file_names = self._get_duplicated_file_names(all_artifacts)
+
     conflicts_by_binary = {}
-    for binary_target in filter(self.is_binary, self.context.targets()):
-      conflicts_by_artifacts = self.detect_duplicates_for_target(binary_target)
+    for binary_target, artifacts in artifacts_by_binary.items():
+      conflicts_by_artifacts = self._detect_duplicates(binary_target, artifacts,
+                                                       duplicated_file_names)
       if conflicts_by_artifacts:
         conflicts_by_binary[binary_target] = conflicts_by_artifacts
 
@@ -80,18 +93,15 @@ class DuplicateDetector(JvmBinaryTask):
     return conflicts_by_binary
 
   def detect_duplicates_for_target(self, binary_target):
-    artifacts_by_file_name = defaultdict(set)
-
-    # Extract external dependencies on libraries (jars)
-    external_deps = self._get_external_dependencies(binary_target)
-    for (file_name, jar_names) in external_deps.items():
-      artifacts_by_file_name[file_name].update(jar_names)
-
-    # Extract internal dependencies on classes and resources
-    internal_deps = self._get_internal_dependencies(binary_target)
-    for (file_name, target_specs) in internal_deps.items():
-      artifacts_by_file_name[file_name].update(target_specs)
+    artifacts = self._get_artifacts(binary_target)
+    return self._detect_duplicates(binary_target, artifacts,
+                                   self._get_duplicated_file_names(artifacts))
 
+  def _detect_duplicates(self, binary_target, artifacts, duplicated_file_names):
+    artifacts_by_file_name = defaultdict(set)
+    for entry, artifact in artifacts:
+      for file_name in self._entry_contents(entry) & duplicated_file_names:
+        artifacts_by_file_name[file_name].add(artifact)
     return self._check_conflicts(artifacts_by_file_name, binary_target)
 
   def _check_conflicts(self, artifacts_by_file_name, binary_target):
@@ -102,27 +112,52 @@ class DuplicateDetector(JvmBinaryTask):
         raise TaskError('Failing build for target {}.'.format(binary_target))
     return conflicts_by_artifacts
 
-  def _get_internal_dependencies(self, binary_target):
+  def _get_duplicated_file_names(self, artifacts):
+    """Returns the names of the files that are provided by more than one of the given artifacts.
+
+    Only these files can conflict on the classpath of any binary whose artifacts are among the
+    given ones, so checking a binary need only look them up, rather than merge all of its files.
+    """
     artifacts_by_file_name = defaultdict(set)
+    for entry, artifact in set(artifacts):
+      for file_name in self._entry_contents(entry):
+        artifacts_by_file_name[file_name].add(artifact)
+    return frozenset(file_name for file_name, owners in artifacts_by_file_name.items()
+                     if len(owners) > 1)
+
+  @memoized_method
+  def _entry_contents(self, entry):
+    """Returns the files in the given classpath entry that are subject to the duplicate check."""
+    if ClasspathUtil.is_jar(entry):
+      contents = self._jar_contents_index.contents(entry)
+    else:
+      # Class directories are rewritten by compiles, so are not worth indexing across runs.
+      contents = ClasspathUtil.classpath_entries_contents([entry])
+    return frozenset(file_name for file_name in contents if not self._is_excluded(file_name))
+
+  def _get_artifacts(self, binary_target):
+    """Returns the (classpath entry, artifact name) pairs on the classpath of the given binary."""
+    return self._get_external_artifacts(binary_target) + self._get_internal_artifacts(binary_target)
+
+  def _get_internal_artifacts(self, binary_target):
+    artifacts = []
     classpath_products = self.context.products.get_data('runtime_classpath')
 
     # Select classfiles from the classpath - we want all the direct products of internal targets,
     # no external JarLibrary products.
     def record_file_ownership(target):
-      entries = ClasspathUtil.internal_classpath([target], classpath_products)
-      for f in ClasspathUtil.classpath_entries_contents(entries):
-        artifacts_by_file_name[f].add(target.address.reference())
+      for entry in ClasspathUtil.internal_classpath([target], classpath_products):
+        artifacts.append((entry, target.address.reference()))
 
     binary_target.walk(record_file_ownership)
-    return artifacts_by_file_name
+    return artifacts
 
-  def _get_external_dependencies(self, binary_target):
-    artifacts_by_file_name = defaultdict(set)
+  def _get_external_artifacts(self, binary_target):
+    artifacts = []
     for external_dep, coordinate in self.list_external_jar_dependencies(binary_target):
       self.context.log.debug('  scanning {} from {}'.format(coordinate, external_dep))
-      for qualified_file_name in ClasspathUtil.classpath_entries_contents([external_dep]):
-        artifacts_by_file_name[qualified_file_name].add(coordinate.artifact_filename)
-    return artifacts_by_file_name
+      artifacts.append((external_dep, coordinate.artifact_filename))
+    return artifacts
 
   def _is_excluded(self, path):
     if self._isdir(path) or Manifest.PATH == path:
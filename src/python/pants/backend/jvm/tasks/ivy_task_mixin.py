@@ -10,9 +10,11 @@ import logging
 import os
 
 from pants.backend.jvm.ivy_utils import NO_RESOLVE_RUN_RESULT, IvyFetchStep, IvyResolveStep
+from pants.backend.jvm.maven_artifact_fetcher import MavenArtifactFetcher
 from pants.backend.jvm.subsystems.jar_dependency_management import JarDependencyManagement
 from pants.backend.jvm.targets.jar_library import JarLibrary
 from pants.backend.jvm.targets.jvm_target import JvmTarget
+from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import TaskError
 from pants.base.fingerprint_strategy import FingerprintStrategy
 from pants.invalidation.cache_manager import VersionedTargetSet
@@ -111,6 +113,20 @@ class IvyTaskMixin(TaskBase):
     # TODO(John Sirois): Fixup the IvySubsystem to encapsulate its properties.
     return IvySubsystem.global_instance().get_options().cache_dir
 
+  @memoized_property
+  def _maven_artifact_fetcher(self):
+    """The fetcher to re-fetch previous resolves with instead of Ivy, or `None` to use Ivy."""
+    ivy_subsystem = IvySubsystem.global_instance()
+    options = ivy_subsystem.get_options()
+    if not options.fetch_repository_url:
+      return None
+    return MavenArtifactFetcher(options.fetch_repository_url,
+                                self.ivy_cache_dir,
+                                concurrency=options.fetch_concurrency,
+                                timeout_secs=options.fetch_timeout_secs,
+                                proxies=ivy_subsystem.proxies(),
+                                root_dir=get_buildroot())
+
   def resolve(self, executor, targets, classpath_products, confs=None, extra_args=None,
               invalidate_dependents=False):
     """Resolves external classpath products (typically jars) for the given targets.
@@ -238,7 +254,8 @@ class IvyTaskMixin(TaskBase):
                            pinned_artifacts,
                            self.get_options().soft_excludes,
                            self.ivy_cache_dir,
-                           global_ivy_workdir)
+                           global_ivy_workdir,
+                           artifact_fetcher=self._maven_artifact_fetcher)
       resolve = IvyResolveStep(confs,
                                resolve_hash_name,
                                pinned_artifacts,
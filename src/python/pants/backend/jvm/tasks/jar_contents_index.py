@@ -0,0 +1,77 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import json
+import logging
+import os
+from hashlib import sha1
+
+from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.util.dirutil import safe_concurrent_creation
+
+
+logger = logging.getLogger(__name__)
+
+
+class JarContentsIndex(object):
+  """A persistent index of the names of the entries in jars.
+
+  The same third party jars are typically on the classpaths of many binaries. The index lists each
+  jar at most once per run, and persists the listing under a key derived from the jar's path, size
+  and modification time, so that later runs need only stat the jar.
+  """
+
+  def __init__(self, index_dir):
+    """
+    :param string index_dir: The directory to persist listings under.
+    """
+    self._index_dir = index_dir
+    # Key -> tuple of entry names.
+    self._contents = {}
+
+  def _key(self, jar_path):
+    stat = os.stat(jar_path)
+    fingerprint = '{}:{}:{}'.format(os.path.realpath(jar_path), stat.st_size, stat.st_mtime)
+    return sha1(fingerprint.encode('utf-8')).hexdigest()
+
+  def _index_path(self, key):
+    return os.path.join(self._index_dir, key[:2], key)
+
+  def _load(self, key):
+    try:
+      with open(self._index_path(key), 'rb') as fp:
+        return tuple(json.load(fp))
+    except (IOError, OSError, ValueError) as e:
+      logger.debug('no usable index for key {}: {!r}'.format(key, e))
+      return None
+
+  def _save(self, key, contents):
+    try:
+      with safe_concurrent_creation(self._index_path(key)) as tmp_path:
+        with open(tmp_path, 'wb') as fp:
+          json.dump(contents, fp)
+    except (IOError, OSError) as e:
+      logger.debug('failed to index key {}: {!r}'.format(key, e))
+
+  def contents(self, jar_path):
+    """Returns the names of the entries of the given jar.
+
+    Directories are included and differentiated via a trailing forward slash, as in
+    `ClasspathUtil.classpath_entries_contents`.
+
+    :param string jar_path: The path of an existing jar.
+    :rtype: tuple of string
+    """
+    key = self._key(jar_path)
+    contents = self._contents.get(key)
+    if contents is None:
+      contents = self._load(key)
+      if contents is None:
+        contents = tuple(ClasspathUtil.classpath_entries_contents([jar_path]))
+        self._save(key, contents)
+      self._contents[key] = contents
+    return contents
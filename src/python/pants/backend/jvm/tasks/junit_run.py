@@ -5,9 +5,12 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import glob
 import os
 import sys
+import threading
 from abc import abstractmethod
+from collections import Counter
 from contextlib import contextmanager
 
 from six.moves import range
@@ -26,6 +29,8 @@ from pants.backend.jvm.tasks.jvm_tool_task_mixin import JvmToolTaskMixin
 from pants.backend.jvm.tasks.reports.junit_html_report import JUnitHtmlReport
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import ErrorWhileTesting, TargetDefinitionException, TaskError
+from pants.base.hash_utils import Sharder
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.target import Target
 from pants.build_graph.target_scopes import Scopes
@@ -38,6 +43,7 @@ from pants.util import desktop
 from pants.util.argutil import ensure_arg, remove_arg
 from pants.util.contextutil import environment_as
 from pants.util.dirutil import safe_mkdir, safe_rmtree
+from pants.util.durations import balance_by_duration
 from pants.util.memo import memoized_method
 from pants.util.meta import AbstractClass
 from pants.util.strutil import pluralize
@@ -135,6 +141,11 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     super(JUnitRun, cls).register_options(register)
     register('--batch-size', advanced=True, type=int, default=sys.maxint,
              help='Run at most this many tests in a single test process.')
+    register('--forks', advanced=True, type=int, default=1,
+             help='Run up to this many batches of tests concurrently, each in its own JVM. Use '
+                  'with --batch-size to split the tests into batches. With --fail-fast, no more '
+                  'batches are started after one fails, but running batches complete. Ignored '
+                  'with --coverage.')
     register('--test', type=list,
              help='Force running of just these tests.  Tests can be specified using any of: '
                   '[classname], [classname]#[methodname], [filename] or [filename]#[methodname]')
@@ -212,6 +223,7 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     self._failure_summary = options.failure_summary
     self._open = options.open
     self._html_report = self._open or options.html_report
+    self._spawn_lock = threading.Lock()
 
   @memoized_method
   def _args(self, output_dir):
@@ -259,7 +271,7 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     args.append('-parallel-threads')
     args.append(str(options.parallel_threads))
 
-    if options.test_shard:
+    if options.test_shard and not self._balance_shards_by_duration:
       args.append('-test-shard')
       args.append(options.test_shard)
 
@@ -286,13 +298,19 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
     :param Executor executor: the java subprocess executor to use. If not specified, construct
       using the distribution.
     :param Distribution distribution: The JDK or JRE installed.
+    :param env_vars: An optional sequence of environment variable name, value pairs to spawn the
+      process with.
     :rtype: ProcessHandler
     """
 
     actual_executor = executor or SubprocessExecutor(distribution)
-    return distribution.execute_java_async(*args,
-                                           executor=actual_executor,
-                                           **kwargs)
+    env_vars = kwargs.pop('env_vars', ())
+    # NB: The environment is process-global, so when batches run concurrently it is only
+    # modified while holding a lock, for as long as it takes to spawn a test process with it.
+    with self._spawn_lock, environment_as(**dict(env_vars)):
+      return distribution.execute_java_async(*args,
+                                             executor=actual_executor,
+                                             **kwargs)
 
   def execute_java_for_targets(self, targets, *args, **kwargs):
     """Execute java for targets using the test mixin spawn and wait.
@@ -368,63 +386,80 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         lambda tgt: tgt.concurrency,
         lambda tgt: tgt.threads)
 
+    if self.get_options().test_shard and self._balance_shards_by_duration:
+      tests_by_properties = self._shard_by_duration(tests_by_properties)
+
     # the below will be None if not set, and we'll default back to runtime_classpath
     classpath_product = self.context.products.get_data('instrument_classpath')
 
-    result = 0
-    for properties, tests in tests_by_properties.items():
+    def run_batch(properties, batch, batch_output_dir):
       (workdir, platform, target_jvm_options, target_env_vars, concurrency, threads) = properties
-      for batch in self._partition(tests):
-        # Batches of test classes will likely exist within the same targets: dedupe them.
-        relevant_targets = {test_registry.get_owning_target(t) for t in batch}
-        complete_classpath = OrderedSet()
-        complete_classpath.update(classpath_prepend)
-        complete_classpath.update(JUnit.global_instance().runner_classpath(self.context))
-        complete_classpath.update(self.classpath(relevant_targets,
-                                                 classpath_product=classpath_product))
-        complete_classpath.update(classpath_append)
-        distribution = JvmPlatform.preferred_jvm_distribution([platform], self._strict_jvm_version)
-
-        # Override cmdline args with values from junit_test() target that specify concurrency:
-        args = self._args(output_dir) + [u'-xmlreport']
-
-        if concurrency is not None:
-          args = remove_arg(args, '-default-parallel')
-          if concurrency == JUnitTests.CONCURRENCY_SERIAL:
-            args = ensure_arg(args, '-default-concurrency', param='SERIAL')
-          elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES:
-            args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES')
-          elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_METHODS:
-            args = ensure_arg(args, '-default-concurrency', param='PARALLEL_METHODS')
-          elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES_AND_METHODS:
-            args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES_AND_METHODS')
-
-        if threads is not None:
-          args = remove_arg(args, '-parallel-threads', has_param=True)
-          args += ['-parallel-threads', str(threads)]
-
-        batch_test_specs = [test.render_test_spec() for test in batch]
-        with argfile.safe_args(batch_test_specs, self.get_options()) as batch_tests:
-          self.context.log.debug('CWD = {}'.format(workdir))
-          self.context.log.debug('platform = {}'.format(platform))
-          with environment_as(**dict(target_env_vars)):
-            result += abs(self._spawn_and_wait(
-              executor=SubprocessExecutor(distribution),
-              distribution=distribution,
-              classpath=complete_classpath,
-              main=JUnit.RUNNER_MAIN,
-              jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
-              args=args + batch_tests,
-              workunit_factory=self.context.new_workunit,
-              workunit_name='run',
-              workunit_labels=[WorkUnitLabel.TEST],
-              cwd=workdir,
-              synthetic_jar_dir=output_dir,
-              create_synthetic_jar=self.synthetic_classpath,
-            ))
-
-          if result != 0 and self._fail_fast:
-            break
+      # Batches of test classes will likely exist within the same targets: dedupe them.
+      relevant_targets = {test_registry.get_owning_target(t) for t in batch}
+      complete_classpath = OrderedSet()
+      complete_classpath.update(classpath_prepend)
+      complete_classpath.update(JUnit.global_instance().runner_classpath(self.context))
+      complete_classpath.update(self.classpath(relevant_targets,
+                                               classpath_product=classpath_product))
+      complete_classpath.update(classpath_append)
+      distribution = JvmPlatform.preferred_jvm_distribution([platform], self._strict_jvm_version)
+
+      # Override cmdline args with values from junit_test() target that specify concurrency:
+      args = self._args(output_dir) + [u'-xmlreport']
+      if batch_output_dir != output_dir:
+        args = ensure_arg(args, '-outdir', param=batch_output_dir)
+
+      if concurrency is not None:
+        args = remove_arg(args, '-default-parallel')
+        if concurrency == JUnitTests.CONCURRENCY_SERIAL:
+          args = ensure_arg(args, '-default-concurrency', param='SERIAL')
+        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES:
+          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES')
+        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_METHODS:
+          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_METHODS')
+        elif concurrency == JUnitTests.CONCURRENCY_PARALLEL_CLASSES_AND_METHODS:
+          args = ensure_arg(args, '-default-concurrency', param='PARALLEL_CLASSES_AND_METHODS')
+
+      if threads is not None:
+        args = remove_arg(args, '-parallel-threads', has_param=True)
+        args += ['-parallel-threads', str(threads)]
+
+      batch_test_specs = [test.render_test_spec() for test in batch]
+      with argfile.safe_args(batch_test_specs, self.get_options()) as batch_tests:
+        self.context.log.debug('CWD = {}'.format(workdir))
+        self.context.log.debug('platform = {}'.format(platform))
+        return abs(self._spawn_and_wait(
+          executor=SubprocessExecutor(distribution),
+          distribution=distribution,
+          env_vars=target_env_vars,
+          classpath=complete_classpath,
+          main=JUnit.RUNNER_MAIN,
+          jvm_options=self.jvm_options + extra_jvm_options + list(target_jvm_options),
+          args=args + batch_tests,
+          workunit_factory=self.context.new_workunit,
+          workunit_name='run',
+          workunit_labels=[WorkUnitLabel.TEST],
+          cwd=workdir,
+          synthetic_jar_dir=batch_output_dir,
+          create_synthetic_jar=self.synthetic_classpath,
+        ))
+
+    batches = [(properties, batch)
+               for properties, tests in tests_by_properties.items()
+               for batch in self._partition(tests)]
+
+    # Coverage data is accumulated in a single file per run, so coverage runs are not forked.
+    forks = 1 if coverage else min(self.get_options().forks, len(batches))
+    if forks > 1:
+      result = self._run_forked_batches(run_batch, batches, output_dir, forks)
+    else:
+      result = 0
+      for properties, batch in batches:
+        result += run_batch(properties, batch, output_dir)
+        if result != 0 and self._fail_fast:
+          break
+
+    self._record_test_durations(glob.glob(os.path.join(output_dir, 'TEST-*.xml')))
 
     if result != 0:
       def error_handler(parse_error):
@@ -452,10 +487,105 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
       )
       raise ErrorWhileTesting('\n'.join(error_message_lines), failed_targets=list(failed_targets))
 
+  def _run_forked_batches(self, run_batch, batches, output_dir, forks):
+    """Runs the given batches concurrently in up to `forks` JVMs, and returns the sum of their
+    exit codes.
+
+    Each batch writes its reports to its own directory, which are merged into the output_dir once
+    all batches have completed. With --fail-fast, no further batches are started after a batch
+    fails, but batches that are already running are allowed to complete.
+    """
+    failed = threading.Event()
+    aborted = threading.Event()
+    forks_dir = os.path.join(output_dir, '_forks')
+
+    def run_fork(index, properties, batch):
+      if aborted.is_set() or (failed.is_set() and self._fail_fast):
+        return 0
+      batch_output_dir = os.path.join(forks_dir, str(index))
+      safe_mkdir(batch_output_dir)
+      try:
+        batch_result = run_batch(properties, batch, batch_output_dir)
+      except Exception:
+        # The error is raised to the caller as soon as it occurs: don't start any more batches.
+        aborted.set()
+        raise
+      if batch_result != 0:
+        failed.set()
+      return batch_result
+
+    with self.context.new_workunit('forks') as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, forks)
+      try:
+        work = Work(run_fork, [(i, properties, batch)
+                               for i, (properties, batch) in enumerate(batches)])
+        return sum(worker_pool.submit_work_and_wait(work, workunit_parent=workunit))
+      finally:
+        worker_pool.shutdown()
+        self._merge_fork_outputs(forks_dir, output_dir)
+
+  @staticmethod
+  def _merge_fork_outputs(forks_dir, output_dir):
+    """Moves the outputs of each fork into the output_dir.
+
+    Reports are named for the test classes they cover, but other outputs (such as synthetic jars)
+    may be written by every fork: a file that would replace one already merged is namespaced with
+    the index of its fork (e.g. `TEST-Foo.xml` -> `TEST-Foo.fork3.xml`) instead.
+    """
+    if not os.path.isdir(forks_dir):
+      return
+    for fork in sorted(os.listdir(forks_dir), key=int):
+      fork_dir = os.path.join(forks_dir, fork)
+      for name in os.listdir(fork_dir):
+        dest = os.path.join(output_dir, name)
+        if os.path.lexists(dest):
+          root, ext = os.path.splitext(name)
+          dest = os.path.join(output_dir, '{}.fork{}{}'.format(root, fork, ext))
+        os.rename(os.path.join(fork_dir, name), dest)
+    safe_rmtree(forks_dir)
+
+  def _shard_by_duration(self, tests_by_properties):
+    """Returns the tests in this --test-shard, with shards balanced by recorded test durations.
+
+    Shards are made up of whole test classes, so that every shard assigns each class to the same
+    shard, regardless of how the tests of a class were specified.
+    """
+    try:
+      sharder = Sharder(self.get_options().test_shard)
+    except Sharder.InvalidShardSpec as e:
+      raise TaskError(e)
+    classnames = sorted({test.classname
+                         for tests in tests_by_properties.values() for test in tests})
+    shards = balance_by_duration(classnames, sharder.nshards,
+                                 self._test_durations.predict(classnames))
+    shard = set(shards[sharder.shard])
+    self.context.log.info('Running {} of {} test classes in shard {} of {}.'
+                          .format(len(shard), len(classnames), sharder.shard, sharder.nshards))
+    tests_in_shard = {}
+    for properties, tests in tests_by_properties.items():
+      tests = tuple(test for test in tests if test.classname in shard)
+      if tests:
+        tests_in_shard[properties] = tests
+    return tests_in_shard
+
   def _partition(self, tests):
     stride = min(self._batch_size, len(tests))
-    for i in range(0, len(tests), stride):
-      yield tests[i:i + stride]
+    num_batches = (len(tests) + stride - 1) // stride
+    if num_batches > 1 and any(self._test_durations.get(test.classname) is not None
+                               for test in tests):
+      # Balance the batches by the recorded durations of their tests, so that the slowest batch
+      # (which determines the duration of the run with --forks) is as fast as possible.
+      tests_per_class = Counter(test.classname for test in tests)
+      class_durations = self._test_durations.predict(list(tests_per_class))
+      durations = {test: class_durations[test.classname] / tests_per_class[test.classname]
+                   for test in tests}
+      for batch in balance_by_duration(list(tests), num_batches, durations,
+                                       max_partition_size=stride):
+        if batch:
+          yield tuple(batch)
+    else:
+      for i in range(0, len(tests), stride):
+        yield tests[i:i + stride]
 
   def _get_possible_tests_to_run(self):
     buildroot = get_buildroot()
@@ -548,7 +678,7 @@ class JUnitRun(TestRunnerTaskMixin, JvmToolTaskMixin, JvmTask):
         # Kill everything except the isolated runs/ dir.
         for name in os.listdir(self.workdir):
           path = os.path.join(self.workdir, name)
-          if name not in (run_dir, lock_file):
+          if name not in (run_dir, lock_file, self._TEST_DURATIONS_FILE):
             if os.path.isdir(path):
               safe_rmtree(path)
             else:
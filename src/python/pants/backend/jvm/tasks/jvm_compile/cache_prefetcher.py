@@ -0,0 +1,109 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import sys
+import threading
+import time
+from collections import deque
+
+
+class CachePrefetcher(object):
+  """Fetches the results of a function for a set of items on background threads, in order.
+
+  Used to check the artifact cache for compile jobs before they are ready to run, so that the
+  round trip is off of the critical path. A consumer that needs the result for an item that has not
+  been fetched yet fetches it itself, rather than waiting for the items ahead of it.
+  """
+
+  class _Slot(object):
+    def __init__(self):
+      self.done = threading.Event()
+      self.value = None
+      self.exc_info = None
+
+  def __init__(self, fetch, num_workers, run_tracker=None, parent_workunit=None):
+    """
+    :param fetch: A function from an item to its result.
+    :param int num_workers: The number of background threads to fetch with.
+    :param run_tracker: If given, the background threads are registered with it, so that fetches
+                        may log via the context.
+    :param parent_workunit: The workunit to register the background threads under.
+    """
+    self._fetch = fetch
+    self._num_workers = num_workers
+    self._run_tracker = run_tracker
+    self._parent_workunit = parent_workunit
+    self._lock = threading.Lock()
+    self._pending = deque()
+    self._slots = {}
+    self._threads = []
+
+  def start(self, items):
+    """Starts fetching the given items, in the given order."""
+    with self._lock:
+      self._pending.extend(items)
+    for _ in range(self._num_workers):
+      thread = threading.Thread(target=self._work, name='cache-prefetch')
+      thread.daemon = True
+      thread.start()
+      self._threads.append(thread)
+
+  def stop(self):
+    """Abandons unstarted fetches, and waits for started fetches to complete."""
+    with self._lock:
+      self._pending.clear()
+    for thread in self._threads:
+      thread.join()
+    self._threads = []
+
+  def _claim(self, item):
+    # Must be called with the lock held: returns a new slot if the item was unclaimed, else None.
+    if item in self._slots:
+      return None
+    slot = self._slots[item] = self._Slot()
+    return slot
+
+  def _run(self, item, slot):
+    try:
+      slot.value = self._fetch(item)
+    except Exception:
+      slot.exc_info = sys.exc_info()
+    slot.done.set()
+
+  def _work(self):
+    if self._run_tracker:
+      self._run_tracker.register_thread(self._parent_workunit)
+    while True:
+      with self._lock:
+        slot = None
+        while self._pending and slot is None:
+          item = self._pending.popleft()
+          slot = self._claim(item)
+        if slot is None:
+          return
+      self._run(item, slot)
+
+  def result(self, item):
+    """Returns the result for the given item, fetching it now if it has not been started.
+
+    :returns: A tuple of the result, and the number of seconds spent waiting for it.
+    :raises: The exception raised by the fetch, if any.
+    """
+    start = time.time()
+    with self._lock:
+      slot = self._claim(item)
+      owned = slot is not None
+      if not owned:
+        slot = self._slots[item]
+    if owned:
+      self._run(item, slot)
+    else:
+      slot.done.wait()
+    waited = time.time() - start
+    if slot.exc_info:
+      raise slot.exc_info[0], slot.exc_info[1], slot.exc_info[2]
+    return slot.value, waited
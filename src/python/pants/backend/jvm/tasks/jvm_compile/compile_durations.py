@@ -0,0 +1,41 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+from pants.util.durations import DurationHistory
+
+
+class CompileDurations(DurationHistory):
+  """A persistent record of how long the compiles of targets took in previous runs, by target id."""
+
+  def estimate_sizes(self, estimated_sizes):
+    """Converts estimated sizes to predicted durations, preferring recorded durations.
+
+    Estimated sizes (in the units of a size estimator) of targets without a recorded duration are
+    scaled to seconds by the ratio of recorded durations to estimated sizes over the targets that
+    have both, or if those have no estimated size, replaced by their mean recorded duration. If no
+    target has a recorded duration, the estimated sizes are returned unchanged.
+
+    :param dict estimated_sizes: A dict from target id to estimated size.
+    :returns: A tuple of a dict from target id to size, and True if the sizes are in seconds.
+    """
+    known = {target_id: self.get(target_id) for target_id in estimated_sizes}
+    known = {target_id: secs for target_id, secs in known.items() if secs is not None}
+    if not known:
+      return dict(estimated_sizes), False
+
+    known_estimated_size = sum(estimated_sizes[target_id] for target_id in known)
+    if known_estimated_size:
+      secs_per_unit = sum(known.values()) / known_estimated_size
+      estimate = lambda estimated_size: estimated_size * secs_per_unit
+    else:
+      mean_secs = sum(known.values()) / len(known)
+      estimate = lambda _: mean_secs
+    sizes = {}
+    for target_id, estimated_size in estimated_sizes.items():
+      secs = known.get(target_id)
+      sizes[target_id] = secs if secs is not None else estimate(estimated_size)
+    return sizes, True
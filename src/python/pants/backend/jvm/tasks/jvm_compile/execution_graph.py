@@ -7,6 +7,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import Queue as queue
 import threading
+import time
 import traceback
 from collections import defaultdict, deque
 from heapq import heappop, heappush
@@ -176,6 +177,8 @@ class ExecutionGraph(object):
       raise NoRootJobError()
 
     self._job_priority = self._compute_job_priorities(job_list)
+    # Job key -> the wall time of the job's work in seconds, once it has run.
+    self._job_durations = {}
 
   def format_dependee_graph(self):
     return "\n".join([
@@ -201,15 +204,16 @@ class ExecutionGraph(object):
   def _compute_job_priorities(self, job_list):
     """Walks the dependency graph breadth-first, starting from the most dependent tasks,
      and computes the job priority as the sum of the jobs sizes along the critical path."""
+    return self._critical_path_priorities({job.key: job.size for job in job_list})
 
-    job_size = {job.key: job.size for job in job_list}
+  def _critical_path_priorities(self, job_size):
     job_priority = defaultdict(int)
 
     bfs_queue = deque()
-    for job in job_list:
-      if len(self._dependees[job.key]) == 0:
-        job_priority[job.key] = job_size[job.key]
-        bfs_queue.append(job.key)
+    for job_key in self._job_keys_as_scheduled:
+      if len(self._dependees[job_key]) == 0:
+        job_priority[job_key] = job_size[job_key]
+        bfs_queue.append(job_key)
 
     satisfied_dependees_count = defaultdict(int)
     while len(bfs_queue) > 0:
@@ -224,6 +228,27 @@ class ExecutionGraph(object):
 
     return job_priority
 
+  def job_keys_by_priority(self):
+    """Returns the keys of all jobs, in descending order of priority."""
+    return sorted(self._job_keys_as_scheduled, key=lambda key: -self._job_priority[key])
+
+  @property
+  def job_durations(self):
+    """A dict from job key to the wall time in seconds of the work of each job that has run."""
+    return self._job_durations
+
+  def critical_path_length(self, job_sizes=None):
+    """Returns the largest sum of job sizes along any path through the graph.
+
+    :param dict job_sizes: Sizes to use for the jobs by key, or None to use the sizes of the Jobs.
+                           Jobs missing from the dict have size 0.
+    """
+    if job_sizes is None:
+      job_sizes = {key: job.size for key, job in self._jobs.items()}
+    else:
+      job_sizes = {key: job_sizes.get(key, 0) for key in self._jobs}
+    return max(self._critical_path_priorities(job_sizes).values() or [0])
+
   def execute(self, pool, log):
     """Runs scheduled work, ensuring all dependencies for each element are done before execution.
 
@@ -261,11 +286,13 @@ class ExecutionGraph(object):
 
     def try_to_submit_jobs_from_heap():
       def worker(worker_key, work):
+        start = time.time()
         try:
           work()
           result = (worker_key, SUCCESSFUL, None)
         except Exception as e:
           result = (worker_key, FAILED, e)
+        self._job_durations[worker_key] = time.time() - start
         finished_queue.put(result)
         jobs_in_flight.decrement()
 
@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import functools
 import hashlib
 import os
+import time
 from collections import defaultdict
 from multiprocessing import cpu_count
 
@@ -21,10 +22,12 @@ from pants.backend.jvm.targets.javac_plugin import JavacPlugin
 from pants.backend.jvm.targets.jvm_target import JvmTarget
 from pants.backend.jvm.targets.scalac_plugin import ScalacPlugin
 from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.backend.jvm.tasks.jvm_compile.cache_prefetcher import CachePrefetcher
 from pants.backend.jvm.tasks.jvm_compile.class_not_found_error_patterns import \
   CLASS_NOT_FOUND_ERROR_PATTERNS
 from pants.backend.jvm.tasks.jvm_compile.compile_context import (CompileContext, DependencyContext,
                                                                  strict_dependencies)
+from pants.backend.jvm.tasks.jvm_compile.compile_durations import CompileDurations
 from pants.backend.jvm.tasks.jvm_compile.execution_graph import (ExecutionFailure, ExecutionGraph,
                                                                  Job)
 from pants.backend.jvm.tasks.jvm_compile.missing_dependency_finder import (CompileErrorExtractor,
@@ -169,6 +172,16 @@ class JvmCompile(NailgunTaskBase):
                   'constraints). Choose \'random\' to choose random sizes for each target, which '
                   'may be useful for distributed builds.')
 
+    register('--cache-prefetch-workers', advanced=True, type=int, default=4,
+             help='The number of threads that double check the artifact cache for invalid targets '
+                  'in the background, in priority order, as soon as compilation starts. If 0, '
+                  'the cache is double checked for each target just before it is compiled.')
+
+    register('--use-compile-durations', advanced=True, type=bool, default=True,
+             help='Prioritize targets by how long they took to compile in previous runs, falling '
+                  'back to the --size-estimator for targets that have not been compiled before. '
+                  'The predicted and actual critical path lengths are reported after each run.')
+
     register('--capture-log', advanced=True, type=bool,
              fingerprint=True,
              help='Capture compilation output to per-target logs.')
@@ -530,17 +543,65 @@ class JvmCompile(NailgunTaskBase):
         extra_compile_time_classpath_elements)
 
     # Now create compile jobs for each invalid target one by one.
+    cache_prefetcher = None
+    if self.artifact_cache_reads_enabled() and self.get_options().cache_prefetch_workers > 0:
+      cache_prefetcher = CachePrefetcher(self._double_check_cache,
+                                         self.get_options().cache_prefetch_workers,
+                                         run_tracker=self.context.run_tracker,
+                                         parent_workunit=workunit.parent)
+
+    job_sizes, job_sizes_are_secs = self._compile_job_sizes(compile_contexts, invalid_targets)
     jobs = self._create_compile_jobs(classpath_products,
                                      compile_contexts,
                                      extra_compile_time_classpath,
                                      invalid_targets,
-                                     invalidation_check.invalid_vts)
+                                     invalidation_check.invalid_vts,
+                                     job_sizes,
+                                     cache_prefetcher)
 
     exec_graph = ExecutionGraph(jobs)
+    if cache_prefetcher:
+      vts_by_key = {self.exec_graph_key_for_target(vts.target): vts
+                    for vts in invalidation_check.invalid_vts}
+      cache_prefetcher.start([vts_by_key[key] for key in exec_graph.job_keys_by_priority()])
     try:
       exec_graph.execute(worker_pool, self.context.log)
     except ExecutionFailure as e:
       raise TaskError("Compilation failure: {}".format(e))
+    finally:
+      if cache_prefetcher:
+        cache_prefetcher.stop()
+      if self.get_options().use_compile_durations:
+        self._compile_durations.save()
+        self._report_critical_path(exec_graph, job_sizes_are_secs)
+
+  @memoized_property
+  def _compile_durations(self):
+    compile_durations = CompileDurations(os.path.join(self.workdir, 'compile_durations.json'))
+    compile_durations.load()
+    return compile_durations
+
+  def _compile_job_sizes(self, compile_contexts, invalid_targets):
+    """Returns the sizes to prioritize the compile jobs for the given targets by.
+
+    :returns: A tuple of a dict from target to size, and True if the sizes are predicted durations
+              in seconds rather than the units of the size estimator.
+    """
+    estimated_sizes = {target.id: self._size_estimator(compile_contexts[target].sources)
+                       for target in invalid_targets}
+    if self.get_options().use_compile_durations:
+      sizes, in_secs = self._compile_durations.estimate_sizes(estimated_sizes)
+    else:
+      sizes, in_secs = estimated_sizes, False
+    return {target: sizes[target.id] for target in invalid_targets}, in_secs
+
+  def _report_critical_path(self, exec_graph, predicted_in_secs):
+    actual = exec_graph.critical_path_length(exec_graph.job_durations)
+    if predicted_in_secs:
+      self.context.log.info('Critical path: predicted {:.1f}s, actual {:.1f}s.'
+                            .format(exec_graph.critical_path_length(), actual))
+    else:
+      self.context.log.info('Critical path: actual {:.1f}s.'.format(actual))
 
   def _record_compile_classpath(self, classpath, targets, outdir):
     text = '\n'.join(classpath)
@@ -818,8 +879,24 @@ class JvmCompile(NailgunTaskBase):
   def exec_graph_key_for_target(self, compile_target):
     return "compile({})".format(compile_target.address.spec)
 
+  def _double_check_cache(self, vts):
+    """Manually checks the artifact cache (usually shortly before compilation.)
+
+    Returns true if the cache was hit successfully, indicating that no compilation is necessary.
+    """
+    cached_vts, _, _ = self.check_artifact_cache([vts])
+    if not cached_vts:
+      self.context.log.debug('Missed cache during double check for {}'
+                             .format(vts.target.address.spec))
+      return False
+    assert cached_vts == [vts], (
+        'Cache returned unexpected target: {} vs {}'.format(cached_vts, [vts])
+    )
+    self.context.log.info('Hit cache during double check for {}'.format(vts.target.address.spec))
+    return True
+
   def _create_compile_jobs(self, classpath_products, compile_contexts, extra_compile_time_classpath,
-                           invalid_targets, invalid_vts):
+                           invalid_targets, invalid_vts, job_sizes, cache_prefetcher=None):
     class Counter(object):
       def __init__(self, size, initial=0):
         self.size = size
@@ -834,23 +911,22 @@ class JvmCompile(NailgunTaskBase):
     counter = Counter(len(invalid_vts))
 
     def check_cache(vts):
-      """Manually checks the artifact cache (usually immediately before compilation.)
+      """Double checks the artifact cache for the given vts, if it was not prefetched.
 
       Returns true if the cache was hit successfully, indicating that no compilation is necessary.
       """
       if not self.artifact_cache_reads_enabled():
         return False
-      cached_vts, _, _ = self.check_artifact_cache([vts])
-      if not cached_vts:
-        self.context.log.debug('Missed cache during double check for {}'
-                               .format(vts.target.address.spec))
-        return False
-      assert cached_vts == [vts], (
-          'Cache returned unexpected target: {} vs {}'.format(cached_vts, [vts])
-      )
-      self.context.log.info('Hit cache during double check for {}'.format(vts.target.address.spec))
-      counter()
-      return True
+      if cache_prefetcher:
+        hit, waited = cache_prefetcher.result(vts)
+        self.context.log.debug('Waited {:.3f}s for the cache double check of {}'
+                               .format(waited, vts.target.address.spec))
+        self.context.run_tracker.add_timing('cache-prefetch-wait', waited)
+      else:
+        hit = self._double_check_cache(vts)
+      if hit:
+        counter()
+      return hit
 
     def should_compile_incrementally(vts, ctx):
       """Check to see if the compile should try to re-use the existing analysis.
@@ -890,6 +966,7 @@ class JvmCompile(NailgunTaskBase):
         tgt, = vts.targets
         fatal_warnings = self._compute_language_property(tgt, lambda x: x.fatal_warnings)
         zinc_file_manager = self._compute_language_property(tgt, lambda x: x.zinc_file_manager)
+        compile_start = time.time()
         self._compile_vts(vts,
                           ctx.target,
                           ctx.sources,
@@ -904,6 +981,8 @@ class JvmCompile(NailgunTaskBase):
                           fatal_warnings,
                           zinc_file_manager,
                           counter)
+        if self.get_options().use_compile_durations:
+          self._compile_durations.record(tgt.id, time.time() - compile_start)
         self._analysis_tools.relativize(ctx.analysis_file, ctx.portable_analysis_file)
 
         # Write any additional resources for this target to the target workdir.
@@ -931,7 +1010,7 @@ class JvmCompile(NailgunTaskBase):
       jobs.append(Job(self.exec_graph_key_for_target(compile_target),
                       functools.partial(work_for_vts, ivts, compile_context),
                       [self.exec_graph_key_for_target(target) for target in invalid_dependencies],
-                      self._size_estimator(compile_context.sources),
+                      job_sizes[compile_target],
                       # If compilation and analysis work succeeds, validate the vts.
                       # Otherwise, fail it.
                       on_success=ivts.update,
@@ -10,7 +10,8 @@ import logging
 import os
 import re
 import textwrap
-from contextlib import closing
+import threading
+from contextlib import closing, contextmanager
 from hashlib import sha1
 from xml.etree import ElementTree
 
@@ -187,6 +188,16 @@ class BaseZincCompile(JvmCompile):
                   'This is unset by default, because it is generally a good precaution to cache '
                   'only clean/cold builds.')
 
+    register('--resident-compiler-cache-limit', advanced=True, type=int, default=0,
+             help='The number of warmed scala compiler instances for the zinc server to keep '
+                  'resident between compiles. Resident compilers avoid the cost of loading and '
+                  'JIT-compiling scalac for each target, at the cost of heap. Only effective '
+                  'with --use-nailgun.')
+    register('--max-concurrent-compiles', advanced=True, type=int, default=None,
+             help='The maximum number of compiles to run at once, regardless of --worker-count. '
+                  'Bounds the heap needed by the shared zinc server when many targets are ready '
+                  'to compile at once. Unbounded by default.')
+
     def sbt_jar(name, **kwargs):
       return JarDependency(org='org.scala-sbt', name=name, rev='1.0.0-X7', **kwargs)
 
@@ -257,6 +268,11 @@ class BaseZincCompile(JvmCompile):
     # A directory to contain per-target subdirectories with apt processor info files.
     self._processor_info_dir = os.path.join(self.workdir, 'apt-processor-info')
 
+    # Compiles run on the worker pool, so the semaphore must exist before any of them start.
+    max_concurrent_compiles = self.get_options().max_concurrent_compiles
+    self._compile_slots = (threading.BoundedSemaphore(max_concurrent_compiles)
+                           if max_concurrent_compiles else None)
+
     # Validate zinc options.
     ZincCompile.validate_arguments(self.context.log, self.get_options().whitelisted_args,
                                    self._args)
@@ -312,6 +328,15 @@ class BaseZincCompile(JvmCompile):
     key = hasher.hexdigest()[:12]
     return os.path.join(self.get_options().pants_bootstrapdir, 'zinc', key)
 
+  @contextmanager
+  def _compile_slot(self):
+    """Blocks until fewer than --max-concurrent-compiles compiles are running, if set."""
+    if self._compile_slots is None:
+      yield
+    else:
+      with self._compile_slots:
+        yield
+
   def compile(self, args, classpath, sources, classes_output_dir, upstream_analysis, analysis_file,
               log_file, zinc_args_file, settings, fatal_warnings, zinc_file_manager,
               javac_plugin_map, scalac_plugin_map):
@@ -378,6 +403,10 @@ class BaseZincCompile(JvmCompile):
       # on the classpath, so it's safer to prefix it to the bootclasspath.
       jvm_options.extend(['-Xbootclasspath/p:{}'.format(':'.join(self.javac_classpath()))])
 
+    resident_compiler_cache_limit = self.get_options().resident_compiler_cache_limit
+    if resident_compiler_cache_limit:
+      jvm_options.append('-Dzinc.resident.cache.limit={}'.format(resident_compiler_cache_limit))
+
     jvm_options.extend(self._jvm_options)
 
     zinc_args.extend(sources)
@@ -388,12 +417,14 @@ class BaseZincCompile(JvmCompile):
         fp.write(arg)
         fp.write(b'\n')
 
-    if self.runjava(classpath=self.zinc_classpath(),
-                    main=self._ZINC_MAIN,
-                    jvm_options=jvm_options,
-                    args=zinc_args,
-                    workunit_name=self.name(),
-                    workunit_labels=[WorkUnitLabel.COMPILER]):
+    with self._compile_slot():
+      returncode = self.runjava(classpath=self.zinc_classpath(),
+                                main=self._ZINC_MAIN,
+                                jvm_options=jvm_options,
+                                args=zinc_args,
+                                workunit_name=self.name(),
+                                workunit_labels=[WorkUnitLabel.COMPILER])
+    if returncode:
       raise TaskError('Zinc compile failed.')
 
   def _verify_zinc_classpath(self, classpath):
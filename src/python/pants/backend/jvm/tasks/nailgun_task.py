@@ -12,7 +12,7 @@ from pants.base.exceptions import TaskError
 from pants.java import util
 from pants.java.executor import SubprocessExecutor
 from pants.java.jar.jar_dependency import JarDependency
-from pants.java.nailgun_executor import NailgunExecutor, NailgunProcessGroup
+from pants.java.nailgun_executor import NailgunExecutor, NailgunPoolStats, NailgunProcessGroup
 from pants.pantsd.subsystem.subprocess import Subprocess
 from pants.task.task import Task, TaskBase
 
@@ -29,6 +29,15 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
              help='Timeout (secs) for nailgun startup.')
     register('--nailgun-connect-attempts', advanced=True, default=5, type=int,
              help='Max attempts for nailgun connects.')
+    register('--nailgun-idle-timeout-seconds', advanced=True, type=float, default=None,
+             help='Restart, rather than reuse, a nailgun server that has not been used by any run '
+                  'for this many seconds. Bounds the memory held by long-lived servers. By '
+                  'default, servers are reused regardless of how long they have been idle.')
+    register('--nailgun-pool-size', advanced=True, type=int, default=1,
+             help='The number of nailgun servers to spread concurrent runs of this task over. '
+                  'Runs with the same jvm options and classpath share a server only when all of '
+                  'them are in use, and a server is only restarted for different jvm options or '
+                  'classpath once no run is using it; the least recently used one is restarted.')
     cls.register_jvm_tool(register,
                           'nailgun-server',
                           classpath=[
@@ -52,6 +61,7 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
     self._identity = '_'.join(id_tuple)
     self._executor_workdir = os.path.join(self.context.options.for_global_scope().pants_workdir,
                                           *id_tuple)
+    self._nailgun_stats = NailgunPoolStats()
 
   def create_java_executor(self):
     """Create java executor that uses this task's ng daemon, if allowed.
@@ -65,7 +75,9 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
                              classpath,
                              self.dist,
                              connect_timeout=self.get_options().nailgun_timeout_seconds,
-                             connect_attempts=self.get_options().nailgun_connect_attempts)
+                             connect_attempts=self.get_options().nailgun_connect_attempts,
+                             idle_timeout=self.get_options().nailgun_idle_timeout_seconds,
+                             pool_size=self.get_options().nailgun_pool_size)
     else:
       return SubprocessExecutor(self.dist)
 
@@ -99,6 +111,20 @@ class NailgunTaskBase(JvmToolTaskMixin, TaskBase):
                                synthetic_jar_dir=self._executor_workdir)
     except executor.Error as e:
       raise TaskError(e)
+    finally:
+      if isinstance(executor, NailgunExecutor):
+        self._record_nailgun_stats(executor.stats)
+
+  def _record_nailgun_stats(self, stats):
+    if stats.spawn_secs:
+      self.context.run_tracker.add_timing('nailgun-spawn', stats.spawn_secs)
+    self._nailgun_stats.add(stats)
+    if self._nailgun_stats.runs:
+      self.context.log.debug('Reused a running nailgun server for {} of {} runs ({:.0%}), and spent '
+                             '{:.3f}s spawning servers.'
+                             .format(self._nailgun_stats.reuses, self._nailgun_stats.runs,
+                                     self._nailgun_stats.reuse_rate,
+                                     self._nailgun_stats.spawn_secs))
 
 
 # TODO(John Sirois): This just prevents ripple - maybe inline
@@ -62,6 +62,10 @@ class PythonSetup(Subsystem):
     register('--artifact-cache-dir', advanced=True, default=None, metavar='<dir>',
              help='The parent directory for the python artifact cache. '
                   'If unspecified, a standard path under the workdir is used.')
+    register('--installed-distributions-dir', advanced=True, default=None, metavar='<dir>',
+             help='The parent directory for the store of installed distributions that '
+                  'requirements PEXes link to. If unspecified, a standard path under the workdir '
+                  'is used. It is removed by clean-all, along with the workdir.')
 
   @property
   def interpreter_constraints(self):
@@ -109,6 +113,11 @@ class PythonSetup(Subsystem):
     return (self.get_options().artifact_cache_dir or
             os.path.join(self.scratch_dir, 'artifacts'))
 
+  @property
+  def installed_distributions_dir(self):
+    return (self.get_options().installed_distributions_dir or
+            os.path.join(self.scratch_dir, 'installed_distributions'))
+
   @property
   def scratch_dir(self):
     return os.path.join(self.get_options().pants_workdir, *self.options_scope.split('.'))
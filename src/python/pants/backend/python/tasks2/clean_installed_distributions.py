@@ -0,0 +1,31 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.backend.python.subsystems.python_setup import PythonSetup
+from pants.task.task import Task
+from pants.util.dirutil import safe_rmtree
+
+
+class CleanInstalledDistributions(Task):
+  """Delete the store of installed distributions, if it is configured outside of the workdir.
+
+  The store under the workdir is deleted along with the rest of the workdir by `clean-all`.
+  """
+
+  @classmethod
+  def subsystem_dependencies(cls):
+    return super(CleanInstalledDistributions, cls).subsystem_dependencies() + (PythonSetup,)
+
+  def execute(self):
+    root = os.path.realpath(PythonSetup.global_instance().installed_distributions_dir)
+    workdir = os.path.realpath(self.get_options().pants_workdir)
+    if os.path.commonprefix([root + os.sep, workdir + os.sep]) == workdir + os.sep:
+      return
+    self.context.log.debug('Removing installed distributions from {}'.format(root))
+    safe_rmtree(root)
@@ -0,0 +1,124 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import os
+import shutil
+import threading
+
+from pex.common import open_zip
+from pex.util import CacheHelper
+
+from pants.util.dirutil import (absolute_symlink, safe_concurrent_creation, safe_file_dump,
+                                safe_mkdir, safe_rmtree)
+
+
+class DistributionStore(object):
+  """A content-addressed store of installed distributions, shared by requirements PEXes.
+
+  Each distribution is installed, that is unpacked, into the store once per interpreter, under the
+  hash of its archive. Requirements PEX directories then link to the installed copy rather than
+  unpacking their own, so a change to a set of requirements only costs the distributions that are
+  new to the store.
+
+  The PEXes link to the store, so they must be used as directories, rather than zipped up.
+  """
+
+  # The pex hash of the installed contents of a distribution is stored under this name in its entry.
+  # The contents are stored next to it, in a directory named for the distribution, because pex and
+  # pkg_resources identify unpacked distributions by the basenames of their real paths.
+  _PEX_HASH_FILE = 'pex_hash'
+
+  def __init__(self, root_dir):
+    """
+    :param string root_dir: The directory to install distributions into.
+    """
+    # Entries are linked to by absolute path.
+    self._root_dir = os.path.realpath(root_dir)
+    self._lock = threading.Lock()
+    self._hash_by_stat = {}
+
+  def install(self, interpreter, dist):
+    """Installs the distribution into the store for the interpreter, unless it is already there.
+
+    :param interpreter: The interpreter the distribution was resolved for.
+    :type interpreter: :class:`pex.interpreter.PythonInterpreter`
+    :param dist: A distribution whose location is a zipped or unpacked distribution.
+    :type dist: :class:`pkg_resources.Distribution`
+    :returns: The path of the distribution's entry in the store.
+    :rtype: string
+    """
+    path = os.path.join(self._root_dir, str(interpreter.identity),
+                        self._distribution_hash(dist.location))
+    if not os.path.isdir(path):
+      with safe_concurrent_creation(path) as tmp_path:
+        try:
+          self._install(dist.location, self._dist_name(dist), tmp_path)
+        except BaseException:
+          # Leave no partial installation behind to be renamed into place.
+          safe_rmtree(tmp_path)
+          raise
+    return path
+
+  def add_to_pex(self, builder, interpreter, dist):
+    """Adds the distribution to the PEX being built by linking it to its installed copy.
+
+    :param builder: The builder of a PEX directory.
+    :type builder: :class:`pex.pex_builder.PEXBuilder`
+    :param interpreter: The interpreter the distribution was resolved for.
+    :type interpreter: :class:`pex.interpreter.PythonInterpreter`
+    :param dist: A distribution whose location is a zipped or unpacked distribution.
+    :type dist: :class:`pkg_resources.Distribution`
+    """
+    dist_name = self._dist_name(dist)
+    path = self.install(interpreter, dist)
+    with open(os.path.join(path, self._PEX_HASH_FILE), 'rb') as fp:
+      pex_hash = fp.read().decode('ascii')
+    absolute_symlink(os.path.join(path, dist_name),
+                     os.path.join(os.path.realpath(builder.path()), builder.info.internal_cache,
+                                  dist_name))
+    builder.info.add_distribution(dist_name, pex_hash)
+
+  @staticmethod
+  def _dist_name(dist):
+    return os.path.basename(dist.location)
+
+  def _distribution_hash(self, location):
+    # Distributions are immutable once resolved, so their hashes are memoized by their stat.
+    location = os.path.realpath(location)
+    stat = os.stat(location)
+    key = (location, stat.st_size, stat.st_mtime)
+    with self._lock:
+      dist_hash = self._hash_by_stat.get(key)
+    if dist_hash is None:
+      if os.path.isdir(location):
+        dist_hash = CacheHelper.dir_hash(location)
+      else:
+        hasher = hashlib.sha1()
+        with open(location, 'rb') as fp:
+          for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+            hasher.update(chunk)
+        dist_hash = hasher.hexdigest()
+      with self._lock:
+        self._hash_by_stat[key] = dist_hash
+    return dist_hash
+
+  def _install(self, location, dist_name, path):
+    # Unpack the distribution the way `PEXBuilder.add_distribution` does, and record the same
+    # hash of it for the PEX-INFO.
+    contents = os.path.join(path, dist_name)
+    if os.path.isdir(location):
+      shutil.copytree(location, contents)
+      pex_hash = CacheHelper.dir_hash(contents)
+    else:
+      safe_mkdir(contents)
+      with open_zip(location) as zf:
+        for name in zf.namelist():
+          if not name.endswith('/'):
+            zf.extract(name, contents)
+        pex_hash = CacheHelper.zip_hash(zf)
+    safe_file_dump(os.path.join(path, self._PEX_HASH_FILE), pex_hash)
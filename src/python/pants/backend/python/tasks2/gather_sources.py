@@ -6,12 +6,14 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import time
 
 from pex.interpreter import PythonInterpreter
 from pex.pex import PEX
 from pex.pex_builder import PEXBuilder
 
 from pants.backend.python.tasks2.pex_build_util import dump_sources, has_python_sources
+from pants.build_graph.resources import Resources
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.task.task import Task
 from pants.util.dirutil import safe_concurrent_creation
@@ -23,12 +25,20 @@ class GatherSources(Task):
   Creates an (unzipped) PEX on disk containing the local Python sources.
   This PEX can be merged with a requirements PEX to create a unified Python environment
   for running the relevant python code.
+
+  The sources of each target are first copied into that target's results dir, which is keyed by
+  the target's own cache key, so only the targets that changed are copied again. The PEX is then
+  composed from the results dirs by hard linking.
   """
   PYTHON_SOURCES = 'python_sources'
 
   @classmethod
   def implementation_version(cls):
-    return super(GatherSources, cls).implementation_version() + [('GatherSources', 3)]
+    return super(GatherSources, cls).implementation_version() + [('GatherSources', 4)]
+
+  @property
+  def create_target_dirs(self):
+    return True
 
   @classmethod
   def product_types(cls):
@@ -44,7 +54,21 @@ class GatherSources(Task):
     interpreter = self.context.products.get_data(PythonInterpreter)
 
     with self.invalidated(targets) as invalidation_check:
+      start = time.time()
+      for vt in invalidation_check.invalid_vts:
+        self._copy_sources(interpreter, vt)
+      copy_secs = time.time() - start
+      self.context.run_tracker.add_timing('gather-sources-copy', copy_secs)
+
+      start = time.time()
       pex = self._get_pex_for_versioned_targets(interpreter, invalidation_check.all_vts)
+      compose_secs = time.time() - start
+      self.context.run_tracker.add_timing('gather-sources-compose', compose_secs)
+
+      self.context.log.debug('Copied the sources of {} of {} targets in {:.3f}s, and composed '
+                             'their PEX in {:.3f}s.'
+                             .format(len(invalidation_check.invalid_vts),
+                                     len(invalidation_check.all_vts), copy_secs, compose_secs))
       self.context.products.get_data(self.PYTHON_SOURCES, lambda: pex)
 
   def _get_pex_for_versioned_targets(self, interpreter, versioned_targets):
@@ -62,11 +86,27 @@ class GatherSources(Task):
       # Note that we use the same interpreter for all targets: We know the interpreter
       # is compatible (since it's compatible with all targets in play).
       with safe_concurrent_creation(source_pex_path) as safe_path:
-        self._build_pex(interpreter, safe_path, [vt.target for vt in versioned_targets])
+        self._build_pex(interpreter, safe_path, versioned_targets)
     return PEX(source_pex_path, interpreter=interpreter)
 
-  def _build_pex(self, interpreter, path, targets):
-    builder = PEXBuilder(path=path, interpreter=interpreter, copy=True)
-    for target in targets:
-      dump_sources(builder, target, self.context.log)
+  def _copy_sources(self, interpreter, vt):
+    # The results dir of an invalid vt has been cleaned, so we copy the target's sources into it
+    # afresh, laid out as they are in the PEX. The builder is never frozen, so it writes nothing
+    # but the sources.
+    builder = PEXBuilder(path=vt.current_results_dir, interpreter=interpreter, copy=True)
+    dump_sources(builder, vt.target, self.context.log)
+
+  def _build_pex(self, interpreter, path, versioned_targets):
+    builder = PEXBuilder(path=path, interpreter=interpreter, copy=False)
+    for vt in versioned_targets:
+      self._link_sources(builder, vt)
     builder.freeze()
+
+  def _link_sources(self, builder, vt):
+    target = vt.target
+    for relpath in target.sources_relative_to_source_root():
+      src = os.path.join(vt.current_results_dir, relpath)
+      if isinstance(target, Resources):
+        builder.add_resource(src, relpath)
+      else:
+        builder.add_source(src, relpath)
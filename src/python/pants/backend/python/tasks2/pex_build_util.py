@@ -61,7 +61,8 @@ def dump_sources(builder, tgt, log):
                     'Depend on resources() targets instead.'.format(tgt.address.spec))
 
 
-def dump_requirements(builder, interpreter, req_libs, log, platforms=None):
+def dump_requirements(builder, interpreter, req_libs, log, platforms=None,
+                      distribution_store=None):
   """Multi-platform dependency resolution for PEX files.
 
   Returns a list of distributions that must be included in order to satisfy a set of requirements.
@@ -73,6 +74,8 @@ def dump_requirements(builder, interpreter, req_libs, log, platforms=None):
   :param log: Use this logger.
   :param platforms: A list of :class:`Platform`s to resolve requirements for.
                     Defaults to the platforms specified by PythonSetup.
+  :param distribution_store: An optional :class:`DistributionStore` to link the distributions into
+                             the builder from, instead of copying them into it.
   """
 
   # Gather and de-dup all requirements.
@@ -103,7 +106,10 @@ def dump_requirements(builder, interpreter, req_libs, log, platforms=None):
     for dist in dists:
       if dist.location not in locations:
         log.debug('  Dumping distribution: .../{}'.format(os.path.basename(dist.location)))
-        builder.add_distribution(dist)
+        if distribution_store:
+          distribution_store.add_to_pex(builder, interpreter, dist)
+        else:
+          builder.add_distribution(dist)
       locations.add(dist.location)
 
 
@@ -8,8 +8,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import itertools
 import os
 import shutil
+import threading
 import time
 import traceback
+from collections import OrderedDict
 from contextlib import contextmanager
 from textwrap import dedent
 
@@ -24,11 +26,14 @@ from pants.backend.python.tasks2.python_execution_task_base import PythonExecuti
 from pants.base.build_environment import get_buildroot
 from pants.base.exceptions import ErrorWhileTesting, TaskError
 from pants.base.hash_utils import Sharder
+from pants.base.worker_pool import Work, WorkerPool
 from pants.base.workunit import WorkUnitLabel
 from pants.build_graph.target import Target
 from pants.task.testrunner_task_mixin import TestRunnerTaskMixin
 from pants.util.contextutil import temporary_file, temporary_dir
 from pants.util.dirutil import safe_mkdir, safe_mkdir_for
+from pants.util.durations import balance_by_duration
+from pants.util.memo import memoized_property
 from pants.util.process_handler import SubprocessProcessHandler
 from pants.util.strutil import safe_shlex_split
 from pants.util.xml_parser import XmlParser
@@ -76,6 +81,11 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
              help='Run all tests in a single pytest invocation. If turned off, each test target '
                   'will run in its own pytest invocation, which will be slower, but isolates '
                   'tests from process-wide state created by tests in other targets.')
+    register('--parallelism', advanced=True, type=int, default=1,
+             help='With --no-fast, run up to this many test targets concurrently, each in its own '
+                  'pytest invocation. Each target collects its coverage data separately, and with '
+                  '--coverage-output-dir its coverage reports go to a subdirectory named for it. '
+                  'With --fail-fast, no further targets are started after a target fails.')
     register('--junit-xml-dir', metavar='<DIR>',
              help='Specifying a directory causes junit xml results files to be emitted under '
                   'that dir for each test run.')
@@ -157,7 +167,7 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
   def _debug(self):
     return self.get_options().level == 'debug'
 
-  def _generate_coverage_config(self, source_mappings):
+  def _generate_coverage_config(self, source_mappings, data_file=None):
     # For the benefit of macos testing, add the 'real' path the the directory as an equivalent.
     def add_realpath(path):
       realpath = os.path.realpath(path)
@@ -167,6 +177,9 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
     cp = configparser.SafeConfigParser()
     cp.readfp(StringIO(self.DEFAULT_COVERAGE_CONFIG))
 
+    if data_file:
+      cp.set('run', 'data_file', data_file)
+
     # We use the source_mappings to setup the `combine` coverage command to transform paths in
     # coverage data files into canonical form.
     # See the "[paths]" entry here: http://nedbatchelder.com/code/coverage/config.html for details.
@@ -193,8 +206,8 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
     return cp
 
   @contextmanager
-  def _cov_setup(self, source_mappings, coverage_sources=None):
-    cp = self._generate_coverage_config(source_mappings=source_mappings)
+  def _cov_setup(self, source_mappings, coverage_sources=None, data_file=None):
+    cp = self._generate_coverage_config(source_mappings=source_mappings, data_file=data_file)
     # Note that it's important to put the tmpfile under the workdir, because pytest
     # uses all arguments that look like paths to compute its rootdir, and we want
     # it to pick the buildroot.
@@ -210,7 +223,7 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
       yield args, coverage_rc
 
   @contextmanager
-  def _maybe_emit_coverage_data(self, targets, pex):
+  def _maybe_emit_coverage_data(self, targets, pex, isolated=False):
     coverage = self.get_options().coverage
     if coverage is None:
       yield []
@@ -270,8 +283,18 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
           # The source is to be interpreted as a package name.
           coverage_sources.append(source)
 
+    if isolated:
+      # Concurrent runs must not share the default .coverage file in the buildroot.
+      coverage_data_dir = os.path.join(self.workdir, 'coverage',
+                                       Target.maybe_readable_identify(targets))
+      safe_mkdir(coverage_data_dir, clean=True)
+      coverage_data_file = os.path.join(coverage_data_dir, '.coverage')
+    else:
+      coverage_data_file = '.coverage'
+
     with self._cov_setup(source_mappings,
-                         coverage_sources=coverage_sources) as (args, coverage_rc):
+                         coverage_sources=coverage_sources,
+                         data_file=coverage_data_file) as (args, coverage_rc):
       try:
         yield args
       finally:
@@ -282,17 +305,19 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
           return self._pex_run(pex, workunit_name='coverage', args=arguments, env=env)
 
         # On failures or timeouts, the .coverage file won't be written.
-        if not os.path.exists('.coverage'):
+        if not os.path.exists(coverage_data_file):
           self.context.log.warn('No .coverage file was found! Skipping coverage reporting.')
         else:
           # Normalize .coverage.raw paths using combine and `paths` config in the rc file.
           # This swaps the /tmp pex chroot source paths for the local original source paths
           # the pex was generated from and which the user understands.
-          shutil.move('.coverage', '.coverage.raw')
+          shutil.move(coverage_data_file, coverage_data_file + '.raw')
           pex_run(['combine', '--rcfile', coverage_rc])
           pex_run(['report', '-i', '--rcfile', coverage_rc])
           if self.get_options().coverage_output_dir:
             target_dir = self.get_options().coverage_output_dir
+            if isolated:
+              target_dir = os.path.join(target_dir, Target.maybe_readable_identify(targets))
           else:
             relpath = Target.maybe_readable_identify(targets)
             pants_distdir = self.context.options.for_global_scope().pants_distdir
@@ -302,7 +327,7 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
           coverage_xml = os.path.join(target_dir, 'coverage.xml')
           pex_run(['xml', '-i', '--rcfile', coverage_rc, '-o', coverage_xml])
 
-  def _get_shard_conftest_content(self):
+  def _get_shard_conftest_content(self, sources_map):
     shard_spec = self.get_options().test_shard
     if shard_spec is None:
       return ''
@@ -311,6 +336,8 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
       sharder = Sharder(shard_spec)
       if sharder.nshards < 2:
         return ''
+      if self._balance_shards_by_duration:
+        return self._get_balanced_shard_conftest_content(sharder, sources_map)
       return dedent("""
 
         ### GENERATED BY PANTS ###
@@ -335,6 +362,38 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
     except Sharder.InvalidShardSpec as e:
       raise self.InvalidShardSpecification(e)
 
+  def _get_balanced_shard_conftest_content(self, sharder, sources_map):
+    # Shards are made up of whole source files, balanced by the recorded durations of their tests.
+    # Sources are partitioned here rather than in the conftest, so that the partitioning is shared
+    # with other test runners.
+    sources = sorted(sources_map.values())
+    shards = balance_by_duration(sources, sharder.nshards, self._test_durations.predict(sources))
+    return dedent("""
+
+      ### GENERATED BY PANTS ###
+
+      # The sources, relative to the buildroot, whose tests are run by this shard.
+      _SHARD_SOURCES = frozenset({shard_sources})
+
+      def pytest_report_header(config):
+        return 'shard: {shard} of {nshards} (0-based shard numbering, balanced by duration)'
+
+      def pytest_collection_modifyitems(session, config, items):
+        total_count = len(items)
+        def in_shard(itm):
+          path = itm.nodeid.split('::', 1)[0]
+          if path not in _SOURCES_MAP:
+            # Tests outside of the sources being sharded are run by the first shard.
+            return {shard} == 0
+          return _SOURCES_MAP[path] in _SHARD_SOURCES
+        items[:] = [item for item in items if in_shard(item)]
+        reporter = config.pluginmanager.getplugin('terminalreporter')
+        reporter.write_line('Only executing {{}} of {{}} total tests in shard {shard} of '
+                            '{nshards}'.format(len(items), total_count),
+                            bold=True, invert=True, yellow=True)
+      """.format(shard_sources=shards[sharder.shard], shard=sharder.shard,
+                 nshards=sharder.nshards))
+
   def _get_conftest_content(self, sources_map):
     # A conftest hook to modify the console output, replacing the chroot-based
     # source paths with the source-tree based ones, which are more readable to the end user.
@@ -373,7 +432,7 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
           item._nodeid = real_nodeid
     """.format(sources_map))
     # Add in the sharding conftest, if any.
-    shard_conftest_content = self._get_shard_conftest_content()
+    shard_conftest_content = self._get_shard_conftest_content(sources_map)
     return (console_output_conftest_content + shard_conftest_content).encode('utf8')
 
   @contextmanager
@@ -389,14 +448,18 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
         fp.write(conftest_content)
       yield conftest
 
-  @contextmanager
-  def _test_runner(self, targets, sources_map):
+  @memoized_property
+  def _test_runner_pex(self):
     pex_info = PexInfo.default()
     pex_info.entry_point = 'pytest'
-    pex = self.create_pex(pex_info)
+    return self.create_pex(pex_info)
+
+  @contextmanager
+  def _test_runner(self, targets, sources_map, isolated=False):
+    pex = self._test_runner_pex
 
     with self._conftest(sources_map) as conftest:
-      with self._maybe_emit_coverage_data(targets, pex) as coverage_args:
+      with self._maybe_emit_coverage_data(targets, pex, isolated=isolated) as coverage_args:
         yield pex, [conftest] + coverage_args
 
   def _do_run_tests_with_args(self, pex, args):
@@ -465,25 +528,81 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
 
     return failed_targets
 
+  @staticmethod
+  def _source_for_testcase(testcase, sources_map):
+    """Returns the source path relative to the buildroot of a junit xml testcase, if known.
+
+    Test durations are recorded by source file, because the paths of the chrooted sources that
+    pytest runs vary between runs.
+    """
+    # The 'file' attribute is a relsrc, because that's what we passed in to pytest.
+    path = testcase.getAttribute('file')
+    return sources_map.get(path)
+
   def _run_tests(self, targets):
     if self.get_options().fast:
       result = self._do_run_tests(targets)
       if not result.success:
         raise ErrorWhileTesting(failed_targets=result.failed_targets)
     else:
-      results = {}
-      for target in targets:
-        rv = self._do_run_tests([target])
-        results[target] = rv
-        if not rv.success and self.get_options().fail_fast:
-          break
+      parallelism = self.get_options().parallelism
+      if parallelism > 1 and len(targets) > 1:
+        results = self._run_tests_concurrently(targets, parallelism)
+      else:
+        results = {}
+        for target in targets:
+          rv = self._do_run_tests([target])
+          results[target] = rv
+          if not rv.success and self.get_options().fail_fast:
+            break
       for target in sorted(results):
         self.context.log.info('{0:80}.....{1:>10}'.format(target.id, str(results[target])))
       failed_targets = [target for target, _rv in results.items() if not _rv.success]
       if failed_targets:
         raise ErrorWhileTesting(failed_targets=failed_targets)
 
-  def _do_run_tests(self, targets):
+  def _run_tests_concurrently(self, targets, parallelism):
+    """Runs the tests of each target in its own pytest invocation, up to `parallelism` at once.
+
+    Returns the results of the targets whose tests were run. With --fail-fast, no further targets
+    are started after a target fails.
+    """
+    results = OrderedDict()
+    results_lock = threading.Lock()
+    failed = threading.Event()
+    aborted = threading.Event()
+    fail_fast = self.get_options().fail_fast
+
+    def run_target(target):
+      if aborted.is_set() or (failed.is_set() and fail_fast):
+        return
+      try:
+        rv = self._do_run_tests([target], isolated=True)
+      except Exception:
+        # The error is raised to the caller as soon as it occurs: don't start any more targets.
+        aborted.set()
+        raise
+      if not rv.success:
+        failed.set()
+      with results_lock:
+        results[target] = rv
+
+    # The test runner pex and the test duration histories are shared by all invocations, and are
+    # memoized on first access: access them here, before the invocations start, so that concurrent
+    # invocations do not each build the pex or load (and then save over each other's) histories.
+    self._test_runner_pex
+    self._test_durations
+    self._recorded_test_durations
+    with self.context.new_workunit('parallel') as workunit:
+      worker_pool = WorkerPool(workunit, self.context.run_tracker, min(parallelism, len(targets)))
+      try:
+        worker_pool.submit_work_and_wait(Work(run_target, [(target,) for target in targets]),
+                                         workunit_parent=workunit)
+      finally:
+        worker_pool.shutdown()
+    return results
+
+  def _do_run_tests(self, targets, isolated=False):
     if not targets:
       return PythonTestResult.rc(0)
 
@@ -498,7 +617,7 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
     if not sources_map:
       return PythonTestResult.rc(0)
 
-    with self._test_runner(targets, sources_map) as (pex, test_args):
+    with self._test_runner(targets, sources_map, isolated=isolated) as (pex, test_args):
       # Validate that the user didn't provide any passthru args that conflict
       # with those we must set ourselves.
       for arg in self.get_passthru_args():
@@ -527,6 +646,9 @@ class PytestRun(TestRunnerTaskMixin, PythonExecutionTaskBase):
       if external_junit_xml_dir:
         safe_mkdir(external_junit_xml_dir)
         shutil.copy(junitxml_path, external_junit_xml_dir)
+      self._record_test_durations([junitxml_path],
+                                  key=lambda testcase: self._source_for_testcase(testcase,
+                                                                                 sources_map))
       failed_targets = self._get_failed_targets_from_junitxml(junitxml_path, targets)
       return result.with_failed_targets(failed_targets)
 
@@ -11,10 +11,13 @@ from pex.interpreter import PythonInterpreter
 from pex.pex import PEX
 from pex.pex_builder import PEXBuilder
 
+from pants.backend.python.subsystems.python_setup import PythonSetup
+from pants.backend.python.tasks2.distribution_store import DistributionStore
 from pants.backend.python.tasks2.pex_build_util import dump_requirements
 from pants.invalidation.cache_manager import VersionedTargetSet
 from pants.task.task import Task
 from pants.util.dirutil import safe_concurrent_creation
+from pants.util.memo import memoized_property
 
 
 class ResolveRequirementsTaskBase(Task):
@@ -23,6 +26,9 @@ class ResolveRequirementsTaskBase(Task):
   Creates an (unzipped) PEX on disk containing all the resolved requirements.
   This PEX can be merged with other PEXes to create a unified Python environment
   for running the relevant python code.
+
+  The PEX links its distributions from a store shared by all requirements PEXes, so resolving a
+  set of requirements that differs from a previous one only installs the new distributions.
   """
 
   @classmethod
@@ -50,7 +56,12 @@ class ResolveRequirementsTaskBase(Task):
           self._build_requirements_pex(interpreter, safe_path, req_libs)
     return PEX(path, interpreter=interpreter)
 
+  @memoized_property
+  def _distribution_store(self):
+    return DistributionStore(PythonSetup.global_instance().installed_distributions_dir)
+
   def _build_requirements_pex(self, interpreter, path, req_libs):
     builder = PEXBuilder(path=path, interpreter=interpreter, copy=True)
-    dump_requirements(builder, interpreter, req_libs, self.context.log)
+    dump_requirements(builder, interpreter, req_libs, self.context.log,
+                      distribution_store=self._distribution_store)
     builder.freeze()
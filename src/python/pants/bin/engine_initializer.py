@@ -5,16 +5,20 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import hashlib
+import json
 import logging
+import os
 from collections import namedtuple
 
 from pants.base.build_environment import get_buildroot, get_scm
 from pants.base.file_system_project_tree import FileSystemProjectTree
-from pants.engine.build_files import create_graph_rules
+from pants.engine.build_files import create_graph_rules, symbol_table_key
 from pants.engine.engine import LocalSerialEngine
 from pants.engine.fs import create_fs_rules
 from pants.engine.legacy.address_mapper import LegacyAddressMapper
 from pants.engine.legacy.change_calculator import EngineChangeCalculator
+from pants.engine.legacy.dependee_index import DependeeIndex
 from pants.engine.legacy.graph import HydratedTargets, LegacyBuildGraph, create_legacy_graph_tasks
 from pants.engine.legacy.parser import LegacyPythonCallbacksParser
 from pants.engine.legacy.structs import (GoTargetAdaptor, JavaLibraryAdaptor, JunitTestsAdaptor,
@@ -106,6 +110,18 @@ class LegacyGraphHelper(namedtuple('LegacyGraphHelper', ['scheduler', 'engine',
     return graph, address_mapper
 
 
+def _dependee_index_fingerprint(address_mapper, pants_ignore_patterns, build_ignore_patterns,
+                                exclude_target_regexps, subproject_roots):
+  """Returns a fingerprint of the inputs that determine the targets and dependencies of a repo."""
+  inputs = [symbol_table_key(address_mapper.symbol_table_cls),
+            sorted(address_mapper.build_patterns),
+            sorted(pants_ignore_patterns or ()),
+            sorted(build_ignore_patterns or ()),
+            sorted(exclude_target_regexps or ()),
+            sorted(subproject_roots or ())]
+  return hashlib.sha1(json.dumps(inputs, sort_keys=True)).hexdigest()
+
+
 class EngineInitializer(object):
   """Constructs the components necessary to run the v2 engine with v1 BuildGraph compatibility."""
 
@@ -117,7 +133,8 @@ class EngineInitializer(object):
                          symbol_table_cls=None,
                          build_ignore_patterns=None,
                          exclude_target_regexps=None,
-                         subproject_roots=None):
+                         subproject_roots=None,
+                         build_file_cache_dir=None):
     """Construct and return the components necessary for LegacyBuildGraph construction.
 
     :param list pants_ignore_patterns: A list of path ignore patterns for FileSystemProjectTree,
@@ -132,6 +149,8 @@ class EngineInitializer(object):
     :param list exclude_target_regexps: A list of regular expressions for excluding targets.
     :param list subproject_roots: Paths that correspond with embedded build roots
                                   under the current build root.
+    :param str build_file_cache_dir: If set, a directory in which to persist parsed build files
+                                     between runs.
     :returns: A tuple of (scheduler, engine, symbol_table_cls, build_graph_cls).
     """
 
@@ -147,7 +166,8 @@ class EngineInitializer(object):
                                    parser_cls=LegacyPythonCallbacksParser,
                                    build_ignore_patterns=build_ignore_patterns,
                                    exclude_target_regexps=exclude_target_regexps,
-                                   subproject_roots=subproject_roots)
+                                   subproject_roots=subproject_roots,
+                                   build_file_cache_dir=build_file_cache_dir)
 
     # Load the native backend.
     native = native or Native.Factory.global_instance().create()
@@ -163,6 +183,17 @@ class EngineInitializer(object):
     # TODO: Do not use the cache yet, as it incurs a high overhead.
     scheduler = LocalScheduler(workdir, dict(), tasks, project_tree, native)
     engine = LocalSerialEngine(scheduler, use_cache=False)
-    change_calculator = EngineChangeCalculator(scheduler, engine, symbol_table_cls, scm) if scm else None
+    change_calculator = None
+    if scm:
+      fingerprint = _dependee_index_fingerprint(address_mapper,
+                                                pants_ignore_patterns,
+                                                build_ignore_patterns,
+                                                exclude_target_regexps,
+                                                subproject_roots)
+      dependee_index = DependeeIndex(os.path.join(workdir, 'dependee_index.json'),
+                                     fingerprint=fingerprint)
+      change_calculator = EngineChangeCalculator(scheduler, engine, symbol_table_cls, scm,
+                                                 dependee_index=dependee_index,
+                                                 build_patterns=address_mapper.build_patterns)
 
     return LegacyGraphHelper(scheduler, engine, symbol_table_cls, change_calculator)
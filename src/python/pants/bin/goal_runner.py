@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
 import sys
 
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
@@ -76,7 +77,7 @@ class GoalRunnerFactory(object):
 
   def _init_graph(self, use_engine, pants_ignore_patterns, build_ignore_patterns,
                   exclude_target_regexps, target_specs, workdir, graph_helper=None,
-                  subproject_build_roots=None):
+                  subproject_build_roots=None, build_file_cache=False):
     """Determine the BuildGraph, AddressMapper and spec_roots for a given run.
 
     :param bool use_engine: Whether or not to use the v2 engine to construct the BuildGraph.
@@ -88,10 +89,13 @@ class GoalRunnerFactory(object):
     :param list target_specs: The original target specs.
     :param LegacyGraphHelper graph_helper: A LegacyGraphHelper to use for graph construction,
                                            if available. This would usually come from the daemon.
+    :param list subproject_build_roots: Paths that correspond with embedded build roots.
+    :param bool build_file_cache: Whether to persist parsed build files in the workdir.
     :returns: A tuple of (BuildGraph, AddressMapper, spec_roots).
     """
     # N.B. Use of the daemon implies use of the v2 engine.
     if graph_helper or use_engine:
+      build_file_cache_dir = os.path.join(workdir, 'build_file_cache') if build_file_cache else None
       # The daemon may provide a `graph_helper`. If that's present, use it for graph construction.
       graph_helper = (
         graph_helper
@@ -99,7 +103,8 @@ class GoalRunnerFactory(object):
                                                 workdir,
                                                 build_ignore_patterns=build_ignore_patterns,
                                                 exclude_target_regexps=exclude_target_regexps,
-                                                subproject_roots=subproject_build_roots)
+                                                subproject_roots=subproject_build_roots,
+                                                build_file_cache_dir=build_file_cache_dir)
       )
       target_roots = TargetRoots.create(options=self._options,
                                         build_root=self._root_dir,
@@ -163,6 +168,7 @@ class GoalRunnerFactory(object):
         self._global_options.pants_workdir,
         self._daemon_graph_helper,
         self._global_options.subproject_roots,
+        self._global_options.build_file_cache,
       )
       goals, is_quiet = self._determine_goals(self._requested_goals)
       target_roots = self._specs_to_targets(spec_roots)
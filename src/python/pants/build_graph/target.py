@@ -442,7 +442,9 @@ class Target(AbstractTarget):
   def mark_invalidation_hash_dirty(self):
     """Invalidates memoized fingerprints for this target, including those in payloads.
 
-    Exposed for testing.
+    Fingerprints are memoized per FingerprintStrategy for the lifetime of the target, and so are
+    shared by all tasks in a run: since the memoized transitive fingerprints of this target's
+    dependees include its fingerprint, they are invalidated as well.
 
     :API: public
     """
@@ -452,6 +454,17 @@ class Target(AbstractTarget):
     self.mark_extra_invalidation_hash_dirty()
     self.payload.mark_dirty()
 
+    if self._build_graph is not None and self._build_graph.contains_address(self.address):
+      def has_transitive_fingerprints(target):
+        # A dependee without memoized transitive fingerprints has no dependees that memoized ours.
+        return (target is self or target._cached_all_transitive_fingerprint_map or
+                target._cached_direct_transitive_fingerprint_map)
+
+      def invalidate_dependee(dependee):
+        dependee.mark_transitive_invalidation_hash_dirty()
+      self._build_graph.walk_transitive_dependee_graph([self.address], work=invalidate_dependee,
+                                                       predicate=has_transitive_fingerprints)
+
   def transitive_invalidation_hash(self, fingerprint_strategy=None, depth=0):
     """
     :API: public
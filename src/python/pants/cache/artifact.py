@@ -8,7 +8,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import errno
 import os
 import shutil
+import stat
 import tarfile
+import time
+import zipfile
 
 from pants.util.contextutil import open_tar
 from pants.util.dirutil import safe_mkdir, safe_mkdir_for, safe_walk
@@ -80,26 +83,54 @@ class DirectoryArtifact(Artifact):
         self._relpaths.add(relpath)
 
 
+def _create_parent_dirs(artifact_root, relpaths, dirs):
+  """Creates the parent directories of the given relpaths, and the given dirs, under artifact_root.
+
+  Note: We create all needed paths proactively, even though extractall() can do this for us.
+  This is because we may be called concurrently on multiple artifacts that share directories,
+  and there will be a race condition inside extractall(): task T1 A) sees that a directory
+  doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
+  the same directory, so T1 throws "File exists" in B).
+  This actually happened, and was very hard to debug.
+  Creating the paths here up front allows us to squelch that "File exists" error.
+  """
+  for d in set(dirs) | set(os.path.dirname(relpath) for relpath in relpaths):
+    try:
+      os.makedirs(os.path.join(artifact_root, d))
+    except OSError as e:
+      if e.errno != errno.EEXIST:
+        raise
+
+
 class TarballArtifact(Artifact):
   """An artifact stored in a tarball."""
 
   # TODO: Expose `dereference` for tasks.
   # https://github.com/pantsbuild/pants/issues/3961
-  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True):
+  def __init__(self, artifact_root, tarfile_, compression=9, dereference=True, compressed=True):
+    """
+    :param int compression: The gzip compression level, if compressed.
+    :param bool compressed: False to create uncompressed tarballs, which are much faster to create
+                            and extract, at the cost of size.
+    """
     super(TarballArtifact, self).__init__(artifact_root)
     self._tarfile = tarfile_
     self._compression = compression
     self._dereference = dereference
+    self._compressed = compressed
 
   def exists(self):
     return os.path.isfile(self._tarfile)
 
   def collect(self, paths):
-    # In our tests, gzip is slightly less compressive than bzip2 on .class files,
-    # but decompression times are much faster.
-    mode = 'w:gz'
-
-    tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2, 'compresslevel': self._compression}
+    tar_kwargs = {'dereference': self._dereference, 'errorlevel': 2}
+    if self._compressed:
+      # In our tests, gzip is slightly less compressive than bzip2 on .class files,
+      # but decompression times are much faster.
+      mode = 'w:gz'
+      tar_kwargs['compresslevel'] = self._compression
+    else:
+      mode = 'w'
 
     with open_tar(self._tarfile, mode, **tar_kwargs) as tarout:
       for path in paths or ():
@@ -111,28 +142,97 @@ class TarballArtifact(Artifact):
   def extract(self):
     try:
       with open_tar(self._tarfile, 'r', errorlevel=2) as tarin:
-        # Note: We create all needed paths proactively, even though extractall() can do this for us.
-        # This is because we may be called concurrently on multiple artifacts that share directories,
-        # and there will be a race condition inside extractall(): task T1 A) sees that a directory
-        # doesn't exist and B) tries to create it. But in the gap between A) and B) task T2 creates
-        # the same directory, so T1 throws "File exists" in B).
-        # This actually happened, and was very hard to debug.
-        # Creating the paths here up front allows us to squelch that "File exists" error.
-        paths = []
-        dirs = set()
-        for tarinfo in tarin.getmembers():
-          paths.append(tarinfo.name)
-          if tarinfo.isdir():
-            dirs.add(tarinfo.name)
-          else:
-            dirs.add(os.path.dirname(tarinfo.name))
-        for d in dirs:
-          try:
-            os.makedirs(os.path.join(self._artifact_root, d))
-          except OSError as e:
-            if e.errno != errno.EEXIST:
-              raise
-        tarin.extractall(self._artifact_root)
+        members = tarin.getmembers()
+        paths = [tarinfo.name for tarinfo in members]
+        _create_parent_dirs(self._artifact_root,
+                            paths,
+                            [tarinfo.name for tarinfo in members if tarinfo.isdir()])
+        tarin.extractall(self._artifact_root, members)
         self._relpaths.update(paths)
     except tarfile.ReadError as e:
       raise ArtifactError(str(e))
+
+
+class ZipArtifact(Artifact):
+  """An artifact stored in a zip file.
+
+  Unlike a gzipped tarball (which is a single compressed stream), each entry of a zip is compressed
+  separately and indexed by a central directory, so entries may be listed and read without
+  decompressing the whole archive. Symlinks are always dereferenced.
+  """
+
+  def __init__(self, artifact_root, zipfile_, compression=9):
+    """
+    :param int compression: If 0, entries are stored uncompressed: otherwise they are deflated.
+    """
+    super(ZipArtifact, self).__init__(artifact_root)
+    self._zipfile = zipfile_
+    self._compression = compression
+
+  def exists(self):
+    return os.path.isfile(self._zipfile)
+
+  def collect(self, paths):
+    compression = zipfile.ZIP_DEFLATED if self._compression else zipfile.ZIP_STORED
+    with zipfile.ZipFile(self._zipfile, 'w', compression, allowZip64=True) as zipout:
+      for path in paths or ():
+        relpath = os.path.relpath(path, self._artifact_root)
+        if os.path.isdir(path):
+          zipout.write(path, relpath)
+          for dir_name, dirnames, filenames in safe_walk(path, followlinks=True):
+            for name in dirnames + filenames:
+              abs_path = os.path.join(dir_name, name)
+              zipout.write(abs_path, os.path.relpath(abs_path, self._artifact_root))
+        else:
+          zipout.write(path, relpath)
+        self._relpaths.add(relpath)
+
+  def extract(self):
+    try:
+      with zipfile.ZipFile(self._zipfile, 'r') as zipin:
+        infos = zipin.infolist()
+        paths = [info.filename.rstrip('/') for info in infos]
+        _create_parent_dirs(self._artifact_root,
+                            paths,
+                            [info.filename for info in infos if info.filename.endswith('/')])
+        dir_infos = []
+        for info in infos:
+          if info.filename.endswith('/'):
+            dir_infos.append(info)
+          else:
+            self._restore_attributes(info, zipin.extract(info, self._artifact_root))
+        # As tarfile does, restore the attributes of directories after extracting their entries
+        # (which modifies them), deepest first.
+        for info in sorted(dir_infos, key=lambda info: info.filename, reverse=True):
+          self._restore_attributes(info, os.path.join(self._artifact_root, info.filename))
+        self._relpaths.update(paths)
+    except zipfile.BadZipfile as e:
+      raise ArtifactError(str(e))
+
+  @staticmethod
+  def _restore_attributes(info, path):
+    # Zip stores unix permissions in the high bits of the external attributes, but does not apply
+    # them (nor modification times) on extraction.
+    mode = (info.external_attr >> 16) & 0o777
+    if mode:
+      os.chmod(path, mode | stat.S_IRUSR | (stat.S_IXUSR if os.path.isdir(path) else 0))
+    # Zip modification times are local times, with a resolution of two seconds.
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    os.utime(path, (mtime, mtime))
+
+
+# Artifact formats supported by the artifact caches, by file extension.
+ARTIFACT_FORMATS = ('tgz', 'tar', 'zip')
+
+
+def create_artifact(artifact_format, artifact_root, path, compression=9, dereference=True):
+  """Returns an Artifact of the given format (one of ARTIFACT_FORMATS) stored at the given path."""
+  if artifact_format == 'tgz':
+    return TarballArtifact(artifact_root, path, compression, dereference=dereference)
+  elif artifact_format == 'tar':
+    return TarballArtifact(artifact_root, path, dereference=dereference, compressed=False)
+  elif artifact_format == 'zip':
+    return ZipArtifact(artifact_root, path, compression)
+  else:
+    raise ValueError('Unknown artifact format {!r}: must be one of {}'.format(artifact_format,
+                                                                               ARTIFACT_FORMATS))
@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import logging
 import os
 import sys
+from collections import namedtuple
 
 
 # Note throughout the distinction between the artifact_root (which is where the artifacts are
@@ -51,6 +52,11 @@ class UnreadableArtifact(object):
     return "key={} err={}".format(self.key, self.err)
 
 
+# Statistics for remote artifact reads: the number of requests, the number of bytes downloaded,
+# the summed latencies of the requests, and the wall time spent reading.
+ReadStats = namedtuple('ReadStats', ['requests', 'bytes', 'latency_secs', 'elapsed_secs'])
+
+
 class ArtifactCache(object):
   """A map from cache key to a set of build artifacts.
 
@@ -60,6 +66,10 @@ class ArtifactCache(object):
   Subclasses implement the methods below to provide this functionality.
   """
 
+  # True if callers should prefer `use_cached_files_batch` to mapping `use_cached_files` over a
+  # pool of subprocesses.
+  batches_reads = False
+
   def __init__(self, artifact_root):
     """Create an ArtifactCache.
 
@@ -135,6 +145,22 @@ class ArtifactCache(object):
     """
     pass
 
+  def use_cached_files_batch(self, requests):
+    """Use the files cached for each of the given requests.
+
+    Caches for which per-request latency dominates (i.e. remote caches) override this to perform
+    the requests concurrently.
+
+    :param list requests: A list of (CacheKey, results_dir) tuples.
+    :returns: A list of results as described on `use_cached_files`, in the order of the requests.
+    """
+    return [call_use_cached_files((self, cache_key, results_dir))
+            for cache_key, results_dir in requests]
+
+  def pop_read_stats(self):
+    """Returns and resets the ReadStats for reads since the last call, or None if not tracked."""
+    return None
+
   def delete(self, cache_key):
     """Delete the artifacts for the specified key.
 
@@ -14,8 +14,10 @@ from six.moves import range
 
 from pants.base.build_environment import get_buildroot
 from pants.base.deprecated import deprecated_conditional
+from pants.cache.artifact import ARTIFACT_FORMATS
 from pants.cache.artifact_cache import ArtifactCacheError
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
+from pants.cache.local_artifact_cache_index import local_artifact_cache_index
 from pants.cache.pinger import BestUrlSelector, Pinger
 from pants.cache.resolver import NoopResolver, Resolver, RESTfulResolver
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
@@ -74,16 +76,39 @@ class CacheSetup(Subsystem):
                   'the resolver. When resolver is \'none\' list is used as is.')
     register('--compression-level', advanced=True, type=int, default=5,
              help='The gzip compression level (0-9) for created artifacts.')
+    register('--artifact-format', advanced=True, choices=list(ARTIFACT_FORMATS), default='tgz',
+             help='The format of created artifacts. tgz: gzipped tarballs. tar: uncompressed '
+                  'tarballs, which are fastest to create and extract but largest. zip: zips of '
+                  'individually compressed entries. Artifacts of one format are not visible to '
+                  'caches configured for another.')
     register('--dereference-symlinks', type=bool, default=True, fingerprint=True,
              help='Dereference symlinks when creating cache tarball.')
     register('--max-entries-per-target', advanced=True, type=int, default=8,
              help='Maximum number of old cache files to keep per task target pair')
+    register('--local-max-size-mb', advanced=True, type=int, default=None,
+             help='The maximum total size of a local cache in megabytes: when exceeded, the least '
+                  'recently used artifacts of all tasks are evicted. Unbounded if unset.')
+    register('--local-max-age-days', advanced=True, type=int, default=None,
+             help='The maximum number of days since an artifact in a local cache was last written '
+                  'or read before it is evicted. Unbounded if unset.')
     register('--pinger-timeout', advanced=True, type=float, default=0.5,
              help='number of seconds before pinger times out')
     register('--pinger-tries', advanced=True, type=int, default=2,
              help='number of times pinger tries a cache')
     register('--write-permissions', advanced=True, type=str, default=None,
              help='Permissions to use when writing artifacts to a local cache, in octal.')
+    register('--remote-timeout', advanced=True, type=float, default=4.0,
+             help='The number of seconds before a request to a remote cache times out.')
+    register('--remote-read-parallelism', advanced=True, type=int, default=8,
+             help='The maximum number of artifacts to fetch from a remote cache concurrently.')
+
+  @staticmethod
+  def local_cache_budgets(options):
+    """Returns the (max size in bytes, max age in seconds) of local caches for the given options."""
+    max_size_mb = options.local_max_size_mb
+    max_age_days = options.local_max_age_days
+    return (max_size_mb * 1024 * 1024 if max_size_mb is not None else None,
+            max_age_days * 24 * 60 * 60 if max_age_days is not None else None)
 
   @classmethod
   def create_cache_factory_for_task(cls, task, pinger=None, resolver=None):
@@ -267,10 +292,15 @@ class CacheFactory(object):
       path = os.path.join(parent_path, self._stable_name)
       self._log.debug('{0} {1} local artifact cache at {2}'
                       .format(self._stable_name, action, path))
+      max_size_bytes, max_age_secs = CacheSetup.local_cache_budgets(self._options)
       return LocalArtifactCache(artifact_root, path, compression,
                                 self._options.max_entries_per_target,
                                 permissions=self._options.write_permissions,
-                                dereference=self._options.dereference_symlinks)
+                                dereference=self._options.dereference_symlinks,
+                                artifact_format=self._options.artifact_format,
+                                index=local_artifact_cache_index(parent_path),
+                                max_size_bytes=max_size_bytes,
+                                max_age_secs=max_age_secs)
 
     def create_remote_cache(remote_spec, local_cache):
       urls = self.get_available_urls(remote_spec.split('|'))
@@ -278,8 +308,11 @@ class CacheFactory(object):
       if len(urls) > 0:
         best_url_selector = BestUrlSelector(['{}/{}'.format(url.rstrip('/'), self._stable_name)
                                              for url in urls])
-        local_cache = local_cache or TempLocalArtifactCache(artifact_root, compression)
-        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache)
+        local_cache = local_cache or TempLocalArtifactCache(
+          artifact_root, compression, artifact_format=self._options.artifact_format)
+        return RESTfulArtifactCache(artifact_root, best_url_selector, local_cache,
+                                    timeout_secs=self._options.remote_timeout,
+                                    max_parallel_reads=self._options.remote_read_parallelism)
 
     local_cache = create_local_cache(spec.local) if spec.local else None
     remote_cache = create_remote_cache(spec.remote, local_cache) if spec.remote else None
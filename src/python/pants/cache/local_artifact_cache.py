@@ -9,7 +9,7 @@ import logging
 import os
 from contextlib import contextmanager
 
-from pants.cache.artifact import TarballArtifact
+from pants.cache.artifact import create_artifact
 from pants.cache.artifact_cache import ArtifactCache, UnreadableArtifact
 from pants.util.contextutil import temporary_file
 from pants.util.dirutil import (safe_delete, safe_mkdir, safe_mkdir_for,
@@ -21,22 +21,31 @@ logger = logging.getLogger(__name__)
 
 class BaseLocalArtifactCache(ArtifactCache):
 
-  def __init__(self, artifact_root, compression, permissions=None, dereference=True):
+  def __init__(self, artifact_root, compression, permissions=None, dereference=True,
+               artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param int compression: The gzip compression level for created artifacts.
                             Valid values are 0-9.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param str artifact_format: The format of created artifacts: one of `ARTIFACT_FORMATS`.
     """
     super(BaseLocalArtifactCache, self).__init__(artifact_root)
     self._compression = compression
     self._cache_root = None
     self._permissions = permissions
     self._dereference = dereference
+    self._artifact_format = artifact_format
+
+  @property
+  def artifact_extension(self):
+    """The file extension of artifacts in this cache, which differs per artifact format."""
+    return '.{}'.format(self._artifact_format)
 
   def _artifact(self, path):
-    return TarballArtifact(self.artifact_root, path, self._compression, dereference=self._dereference)
+    return create_artifact(self._artifact_format, self.artifact_root, path, self._compression,
+                           dereference=self._dereference)
 
   @contextmanager
   def _tmpfile(self, cache_key, use):
@@ -96,7 +105,8 @@ class LocalArtifactCache(BaseLocalArtifactCache):
   """An artifact cache that stores the artifacts in local files."""
 
   def __init__(self, artifact_root, cache_root, compression, max_entries_per_target=None,
-               permissions=None, dereference=True):
+               permissions=None, dereference=True, artifact_format='tgz', index=None,
+               max_size_bytes=None, max_age_secs=None):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     :param str cache_root: The locally cached files are stored under this directory.
@@ -104,15 +114,26 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     :param int max_entries_per_target: The maximum number of old cache files to leave behind on a cache miss.
     :param str permissions: File permissions to use when creating artifact files.
     :param bool dereference: Dereference symlinks when creating the cache tarball.
+    :param str artifact_format: The format of created artifacts: one of `ARTIFACT_FORMATS`.
+    :param LocalArtifactCacheIndex index: An index to record inserts, uses and deletes of artifacts
+                                          in, for eviction. Its root must contain cache_root.
+    :param int max_size_bytes: The maximum total size of the artifacts in the index, beyond which
+                               least recently used artifacts are evicted. Requires an index.
+    :param int max_age_secs: The maximum time since an artifact was last used before it is
+                             evicted. Requires an index.
     """
     super(LocalArtifactCache, self).__init__(
       artifact_root,
       compression,
       permissions=int(permissions.strip(), base=8) if permissions else None,
-      dereference=dereference
+      dereference=dereference,
+      artifact_format=artifact_format
     )
     self._cache_root = os.path.realpath(os.path.expanduser(cache_root))
     self._max_entries_per_target = max_entries_per_target
+    self._index = index
+    self._max_size_bytes = max_size_bytes
+    self._max_age_secs = max_age_secs
     safe_mkdir(self._cache_root)
 
   def prune(self, root):
@@ -126,7 +147,15 @@ class LocalArtifactCache(BaseLocalArtifactCache):
 
     max_entries_per_target = self._max_entries_per_target
     if os.path.isdir(root) and max_entries_per_target:
-      safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+      if self._index is not None:
+        before = set(os.listdir(root))
+        safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+        for name in before - set(os.listdir(root)):
+          self._index.record_delete(os.path.join(root, name))
+      else:
+        safe_rm_oldest_items_in_dir(root, max_entries_per_target)
+    if self._index is not None:
+      self._index.evict(self._max_size_bytes, self._max_age_secs)
 
   def has(self, cache_key):
     return self._artifact_for(cache_key).exists()
@@ -142,11 +171,13 @@ class LocalArtifactCache(BaseLocalArtifactCache):
         if results_dir is not None:
           safe_rmtree(results_dir)
         artifact.extract()
+        if self._index is not None:
+          self._index.record_access(tarfile)
         return True
     except Exception as e:
       # TODO(davidt): Consider being more granular in what is caught.
       logger.warn('Error while reading {0} from local artifact cache: {1}'.format(tarfile, e))
-      safe_delete(tarfile)
+      self.delete(cache_key)
       return UnreadableArtifact(cache_key, e)
 
     return False
@@ -156,7 +187,10 @@ class LocalArtifactCache(BaseLocalArtifactCache):
       pass
 
   def delete(self, cache_key):
-    safe_delete(self._cache_file_for_key(cache_key))
+    path = self._cache_file_for_key(cache_key)
+    safe_delete(path)
+    if self._index is not None:
+      self._index.record_delete(path)
 
   def _store_tarball(self, cache_key, src):
     dest = self._cache_file_for_key(cache_key)
@@ -164,13 +198,15 @@ class LocalArtifactCache(BaseLocalArtifactCache):
     os.rename(src, dest)
     if self._permissions:
       os.chmod(dest, self._permissions)
+    if self._index is not None:
+      self._index.record_insert(dest)
     self.prune(os.path.dirname(dest))  # Remove old cache files.
     return dest
 
   def _cache_file_for_key(self, cache_key):
     # Note: it's important to use the id as well as the hash, because two different targets
     # may have the same hash if both have no sources, but we may still want to differentiate them.
-    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + '.tgz'
+    return os.path.join(self._cache_root, cache_key.id, cache_key.hash) + self.artifact_extension
 
 
 class TempLocalArtifactCache(BaseLocalArtifactCache):
@@ -180,12 +216,13 @@ class TempLocalArtifactCache(BaseLocalArtifactCache):
   actually stores files between calls, but is useful for handling file IO for a remote cache.
   """
 
-  def __init__(self, artifact_root, compression, permissions=None):
+  def __init__(self, artifact_root, compression, permissions=None, artifact_format='tgz'):
     """
     :param str artifact_root: The path under which cacheable products will be read/written.
     """
     super(TempLocalArtifactCache, self).__init__(artifact_root, compression=compression,
-                                                 permissions=permissions)
+                                                 permissions=permissions,
+                                                 artifact_format=artifact_format)
 
   def _store_tarball(self, cache_key, src):
     return src
@@ -0,0 +1,235 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import logging
+import os
+import threading
+import time
+
+from pants.util.dirutil import safe_concurrent_creation, safe_delete, safe_mkdir
+from pants.util.memo import memoized
+
+
+logger = logging.getLogger(__name__)
+
+
+@memoized
+def local_artifact_cache_index(root):
+  """Returns the LocalArtifactCacheIndex for the given root, shared by all caches in the process."""
+  return LocalArtifactCacheIndex(os.path.realpath(os.path.expanduser(root)))
+
+
+class LocalArtifactCacheIndex(object):
+  """An index of the artifacts under a local artifact cache root, supporting LRU eviction.
+
+  The index is an append-only journal of inserted, accessed and deleted artifacts, which may be
+  shared by concurrent processes: each appended line is small enough to be written atomically.
+  Each process folds the journal into memory incrementally, so bringing the index up to date
+  costs time proportional to the operations since it was last read, rather than to the size of
+  the cache.
+
+  Entries that are missing from the journal (because they were written by an older version, or
+  because a compaction raced with an append) are found by `rebuild`, which walks the cache.
+  """
+
+  JOURNAL_NAME = '.artifact_index'
+
+  # When the size budget is exceeded, evict down to this fraction of the budget, so that evictions
+  # are infrequent.
+  _EVICTION_LOW_WATER_MARK = 0.9
+
+  # Age-based eviction walks all entries, so is only performed at most this often.
+  _AGE_CHECK_INTERVAL_SECS = 600
+
+  def __init__(self, root):
+    """
+    :param string root: The root directory of the cache: all indexed artifacts are under it.
+    """
+    self._root = root
+    self._journal = os.path.join(root, self.JOURNAL_NAME)
+    self._lock = threading.RLock()
+    self._reset()
+    self._last_age_check = 0
+
+  def _reset(self):
+    # Relpath -> [access time, size in bytes].
+    self._entries = {}
+    self._total_size = 0
+    self._journal_inode = None
+    self._journal_offset = 0
+    self._journal_lines = 0
+
+  @property
+  def root(self):
+    return self._root
+
+  @property
+  def total_size(self):
+    """The total size in bytes of all indexed artifacts."""
+    with self._lock:
+      self._refresh()
+      return self._total_size
+
+  def __len__(self):
+    with self._lock:
+      self._refresh()
+      return len(self._entries)
+
+  def _append(self, op, path, size=0):
+    relpath = os.path.relpath(path, self._root)
+    safe_mkdir(self._root)
+    # NB: Opening in append mode uses O_APPEND, so concurrent appends of short lines do not
+    # interleave.
+    with open(self._journal, 'ab') as journal:
+      journal.write('{} {:.3f} {} {}\n'.format(op, time.time(), size, relpath).encode('utf-8'))
+
+  def record_insert(self, path):
+    """Records the insertion of the artifact at the given path."""
+    try:
+      self._append('+', path, os.path.getsize(path))
+    except (IOError, OSError) as e:
+      logger.debug('failed to index artifact {}: {!r}'.format(path, e))
+
+  def record_access(self, path):
+    """Records a read of the artifact at the given path."""
+    try:
+      self._append('@', path)
+    except (IOError, OSError) as e:
+      logger.debug('failed to index access of artifact {}: {!r}'.format(path, e))
+
+  def record_delete(self, path):
+    """Records the deletion of the artifact at the given path."""
+    try:
+      self._append('-', path)
+    except (IOError, OSError) as e:
+      logger.debug('failed to index deletion of artifact {}: {!r}'.format(path, e))
+
+  def _apply(self, op, timestamp, size, relpath):
+    entry = self._entries.get(relpath)
+    if op == '+':
+      if entry:
+        self._total_size -= entry[1]
+      self._entries[relpath] = [timestamp, size]
+      self._total_size += size
+    elif op == '@':
+      if entry:
+        entry[0] = max(entry[0], timestamp)
+    elif op == '-':
+      if entry:
+        self._total_size -= entry[1]
+        del self._entries[relpath]
+
+  def _refresh(self):
+    """Folds any lines appended to the journal since it was last read into memory."""
+    try:
+      journal = open(self._journal, 'rb')
+    except (IOError, OSError) as e:
+      if e.errno != errno.ENOENT:
+        raise
+      self._reset()
+      return
+
+    with journal:
+      inode = os.fstat(journal.fileno()).st_ino
+      if inode != self._journal_inode:
+        # The journal was compacted (or created) by another process: start over.
+        self._reset()
+        self._journal_inode = inode
+      journal.seek(self._journal_offset)
+      data = journal.read()
+
+    # Only consume complete lines: a partial last line is still being appended.
+    consumed = data.rfind(b'\n') + 1
+    for line in data[:consumed].decode('utf-8').splitlines():
+      try:
+        op, timestamp, size, relpath = line.split(' ', 3)
+        self._apply(op, float(timestamp), int(size), relpath)
+      except ValueError:
+        logger.debug('ignoring malformed artifact index line: {!r}'.format(line))
+      self._journal_lines += 1
+    self._journal_offset += consumed
+
+  def _compact(self):
+    """Rewrites the journal to contain only the current entries."""
+    with safe_concurrent_creation(self._journal) as tmp_path:
+      with open(tmp_path, 'wb') as journal:
+        for relpath, (timestamp, size) in self._entries.items():
+          journal.write('+ {:.3f} {} {}\n'.format(timestamp, size, relpath).encode('utf-8'))
+    self._reset()
+    self._refresh()
+
+  def _evict(self, relpath):
+    size = self._entries[relpath][1]
+    safe_delete(os.path.join(self._root, relpath))
+    self.record_delete(os.path.join(self._root, relpath))
+    self._apply('-', time.time(), 0, relpath)
+    return size
+
+  def evict(self, max_size_bytes=None, max_age_secs=None, force_age_check=False):
+    """Evicts least recently used artifacts until the cache is within the given bounds.
+
+    :param int max_size_bytes: The maximum total size of the cache, or None for no bound.
+    :param int max_age_secs: The maximum number of seconds since an artifact was last inserted or
+                             used, or None for no bound.
+    :param bool force_age_check: True to check ages even if they were checked recently.
+    :returns: A tuple of the number of artifacts evicted and the number of bytes reclaimed.
+    """
+    with self._lock:
+      self._refresh()
+      now = time.time()
+      check_age = max_age_secs is not None and (
+        force_age_check or now - self._last_age_check > self._AGE_CHECK_INTERVAL_SECS)
+      over_budget = max_size_bytes is not None and self._total_size > max_size_bytes
+      if not (check_age or over_budget):
+        return 0, 0
+
+      evicted = reclaimed = 0
+      by_access_time = sorted(self._entries.items(), key=lambda item: item[1][0])
+      if check_age:
+        self._last_age_check = now
+        for relpath, (access_time, _) in by_access_time:
+          if now - access_time <= max_age_secs:
+            break
+          reclaimed += self._evict(relpath)
+          evicted += 1
+        by_access_time = by_access_time[evicted:]
+
+      if max_size_bytes is not None and self._total_size > max_size_bytes:
+        target_size = max_size_bytes * self._EVICTION_LOW_WATER_MARK
+        for relpath, _ in by_access_time:
+          if self._total_size <= target_size:
+            break
+          reclaimed += self._evict(relpath)
+          evicted += 1
+
+      if evicted:
+        logger.debug('evicted {} artifacts ({} bytes) from {}'.format(evicted, reclaimed,
+                                                                      self._root))
+      if self._journal_lines > 2 * len(self._entries) + 1000:
+        self._compact()
+      return evicted, reclaimed
+
+  def rebuild(self):
+    """Walks the cache to index any artifacts that are missing from the journal, and compacts it."""
+    with self._lock:
+      self._refresh()
+      found = set()
+      for dir_name, _, filenames in os.walk(self._root):
+        for filename in filenames:
+          path = os.path.join(dir_name, filename)
+          # Skip the journal, and files in the process of being created.
+          if path == self._journal or '.tmp.' in filename or filename.startswith('tmp'):
+            continue
+          relpath = os.path.relpath(path, self._root)
+          found.add(relpath)
+          if relpath not in self._entries:
+            stat = os.stat(path)
+            self._apply('+', stat.st_mtime, stat.st_size, relpath)
+      for relpath in set(self._entries) - found:
+        self._apply('-', time.time(), 0, relpath)
+      self._compact()
@@ -6,11 +6,18 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import logging
+import os
+import sys
+import threading
+import time
+from multiprocessing.pool import ThreadPool
 
 import requests
 from requests import RequestException
+from requests.adapters import HTTPAdapter
 
-from pants.cache.artifact_cache import ArtifactCache, NonfatalArtifactCacheError, UnreadableArtifact
+from pants.cache.artifact_cache import (ArtifactCache, NonfatalArtifactCacheError, ReadStats,
+                                        UnreadableArtifact)
 
 
 logger = logging.getLogger(__name__)
@@ -21,13 +28,25 @@ logging.getLogger('requests').setLevel(logging.WARNING)
 
 
 class RequestsSession(object):
+  # The maximum number of connections to keep open to each host.
+  _POOL_SIZE = 16
+
   _session = None
+  _session_pid = None
+  _lock = threading.Lock()
 
   @classmethod
   def instance(cls):
-    if cls._session is None:
-      cls._session = requests.Session()
-    return cls._session
+    # NB: A session (and its pooled connections) must not be shared with forked subprocesses.
+    with cls._lock:
+      if cls._session is None or cls._session_pid != os.getpid():
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=cls._POOL_SIZE, pool_maxsize=cls._POOL_SIZE)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        cls._session = session
+        cls._session_pid = os.getpid()
+      return cls._session
 
 
 class RESTfulArtifactCache(ArtifactCache):
@@ -35,20 +54,41 @@ class RESTfulArtifactCache(ArtifactCache):
 
   READ_SIZE_BYTES = 4 * 1024 * 1024
 
-  def __init__(self, artifact_root, best_url_selector, local):
+  batches_reads = True
+
+  def __init__(self, artifact_root, best_url_selector, local, timeout_secs=4.0,
+               max_parallel_reads=8):
     """
     :param string artifact_root: The path under which cacheable products will be read/written.
     :param BestUrlSelector best_url_selector: Url selector that supports fail-over. Each returned
       url represents prefix for some RESTful service. We must be able to PUT and GET to any path
       under this base.
     :param BaseLocalArtifactCache local: local cache instance for storing and creating artifacts
+    :param float timeout_secs: The timeout for each request to the RESTful service.
+    :param int max_parallel_reads: The maximum number of concurrent reads for a batch of requests.
     """
     super(RESTfulArtifactCache, self).__init__(artifact_root)
 
     self.best_url_selector = best_url_selector
-    self._timeout_secs = 4.0
+    self._timeout_secs = timeout_secs
+    self._max_parallel_reads = max(1, max_parallel_reads)
     self._localcache = local
 
+    self._read_stats_lock = threading.Lock()
+    self._read_stats = ReadStats(0, 0, 0.0, 0.0)
+
+  def _add_read_stats(self, requests=0, num_bytes=0, latency_secs=0.0, elapsed_secs=0.0):
+    with self._read_stats_lock:
+      self._read_stats = ReadStats(self._read_stats.requests + requests,
+                                   self._read_stats.bytes + num_bytes,
+                                   self._read_stats.latency_secs + latency_secs,
+                                   self._read_stats.elapsed_secs + elapsed_secs)
+
+  def pop_read_stats(self):
+    with self._read_stats_lock:
+      read_stats, self._read_stats = self._read_stats, ReadStats(0, 0, 0.0, 0.0)
+    return read_stats
+
   def try_insert(self, cache_key, paths):
     # Delegate creation of artifact to local cache.
     with self._localcache.insert_paths(cache_key, paths) as tarfile:
@@ -66,19 +106,65 @@ class RESTfulArtifactCache(ArtifactCache):
     if self._localcache.has(cache_key):
       return self._localcache.use_cached_files(cache_key, results_dir)
 
+    start = time.time()
     try:
       response = self._request('GET', cache_key)
       if response is not None:
         # Delegate storage and extraction to local cache
-        byte_iter = response.iter_content(self.READ_SIZE_BYTES)
+        byte_iter = self._count_bytes(response.iter_content(self.READ_SIZE_BYTES))
         return self._localcache.store_and_use_artifact(cache_key, byte_iter, results_dir)
     except Exception as e:
       logger.warn('\nError while reading from remote artifact cache: {0}\n'.format(e))
       # TODO(peiyu): clean up partially downloaded local file if any
       return UnreadableArtifact(cache_key, e)
+    finally:
+      self._add_read_stats(requests=1, latency_secs=time.time() - start)
 
     return False
 
+  def _count_bytes(self, byte_iter):
+    for chunk in byte_iter:
+      self._add_read_stats(num_bytes=len(chunk))
+      yield chunk
+
+  def use_cached_files_batch(self, requests):
+    """Use the files cached for the given requests, fetching up to `max_parallel_reads` at once.
+
+    Artifacts present in the local cache are used directly, and the rest are streamed concurrently
+    over the pooled connections of a shared session. The RESTful protocol has no bulk existence
+    check, so each GET doubles as one: a 404 is a miss.
+    """
+    start = time.time()
+    results = [None] * len(requests)
+    remote_indexes = []
+    for i, (cache_key, results_dir) in enumerate(requests):
+      if self._localcache.has(cache_key):
+        results[i] = self._localcache.use_cached_files(cache_key, results_dir)
+      else:
+        remote_indexes.append(i)
+
+    def use_remote(i):
+      cache_key, results_dir = requests[i]
+      try:
+        result = self.use_cached_files(cache_key, results_dir)
+      except NonfatalArtifactCacheError as e:
+        logger.warn('Error calling use_cached_files in artifact cache: {0}'.format(e))
+        result = False
+      sys.stderr.write('.' if result else ' ')
+      return result
+
+    if remote_indexes:
+      pool = ThreadPool(processes=min(self._max_parallel_reads, len(remote_indexes)))
+      try:
+        remote_results = pool.map(use_remote, remote_indexes, chunksize=1)
+      finally:
+        pool.close()
+        pool.join()
+      for i, result in zip(remote_indexes, remote_results):
+        results[i] = result
+      self._add_read_stats(elapsed_secs=time.time() - start)
+    return results
+
   def delete(self, cache_key):
     self._localcache.delete(cache_key)
     self._request('DELETE', cache_key)
@@ -116,7 +202,7 @@ class RESTfulArtifactCache(ArtifactCache):
                                                  response.status_code, response.reason))
 
   def _url_suffix_for_key(self, cache_key):
-    return '{0}/{1}.tgz'.format(cache_key.id, cache_key.hash)
+    return '{0}/{1}{2}'.format(cache_key.id, cache_key.hash, self._localcache.artifact_extension)
 
   def _url_for_key(self, url, cache_key):
     path_prefix = url.path.rstrip(b'/')
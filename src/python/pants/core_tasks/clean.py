@@ -8,6 +8,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import logging
 import os
 
+from pants.cache.cache_setup import CacheFactory, CacheSetup
+from pants.cache.local_artifact_cache_index import local_artifact_cache_index
+from pants.engine import isolated_process
 from pants.task.task import Task
 from pants.util.contextutil import temporary_dir
 from pants.util.dirutil import safe_concurrent_rename, safe_rmtree
@@ -58,3 +61,63 @@ class Clean(Task):
         # Recursively removes pants cache; user waits patiently. 
         logger.info('For async removal, run `./pants clean-all --async`')
         safe_rmtree(pants_trash)
+
+
+class CleanCache(Task):
+  """Evict artifacts from the local artifact caches that exceed their size and age budgets.
+
+  Budgets are configured via the `cache` scope's --local-max-size-mb and --local-max-age-days
+  options, which are otherwise applied incrementally as artifacts are written.
+
+  Also removes the content that the v2 engine stores for snapshots, and the sandboxes of its cached
+  process executions, that have not been used recently.
+  """
+
+  @classmethod
+  def register_options(cls, register):
+    super(CleanCache, cls).register_options(register)
+    register('--all', type=bool, default=False,
+             help='Evict all artifacts from the local caches, regardless of budgets.')
+    register('--engine-max-age-days', type=int, default=7,
+             help='Remove the v2 engine\'s stored snapshot content and process sandboxes that have '
+                  'not been used for this many days.')
+
+  def _local_cache_roots(self, cache_options):
+    roots = set()
+    for spec in cache_options.read_from + cache_options.write_to:
+      for alternative in spec.split('|'):
+        if CacheFactory.is_local(alternative):
+          roots.add(os.path.expanduser(alternative))
+    return sorted(roots)
+
+  def execute(self):
+    # Every task depends on a CacheSetup scoped to it, which inherits the `cache` scope's options.
+    cache_options = CacheSetup.scoped_instance(self).get_options()
+    if self.get_options().all:
+      max_size_bytes, max_age_secs = 0, None
+    else:
+      max_size_bytes, max_age_secs = CacheSetup.local_cache_budgets(cache_options)
+
+    total_evicted = total_reclaimed = 0
+    for root in self._local_cache_roots(cache_options):
+      if not os.path.isdir(root):
+        continue
+      index = local_artifact_cache_index(root)
+      index.rebuild()
+      evicted, reclaimed = index.evict(max_size_bytes, max_age_secs, force_age_check=True)
+      self.context.log.debug('Evicted {} artifacts ({:.1f} MB) from {}, leaving {:.1f} MB.'
+                             .format(evicted, reclaimed / (1024 * 1024), root,
+                                     index.total_size / (1024 * 1024)))
+      total_evicted += evicted
+      total_reclaimed += reclaimed
+    self.context.log.info('Reclaimed {:.1f} MB by evicting {} artifacts from local caches.'
+                          .format(total_reclaimed / (1024 * 1024), total_evicted))
+
+    if self.get_options().all:
+      engine_max_age_secs = 0
+    else:
+      engine_max_age_secs = self.get_options().engine_max_age_days * 24 * 60 * 60
+    removed_blobs, removed_sandboxes = isolated_process.garbage_collect(
+      self.get_options().pants_workdir, engine_max_age_secs)
+    self.context.log.info('Removed {} unused blobs from the engine\'s snapshot store, and {} unused '
+                          'process sandboxes.'.format(removed_blobs, removed_sandboxes))
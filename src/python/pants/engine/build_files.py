@@ -6,6 +6,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import collections
+import logging
+import os
+import time
 from os.path import dirname, join
 
 import six
@@ -18,13 +21,18 @@ from pants.engine.addressable import (AddressableDescriptor, BuildFileAddresses,
                                       Exactly, TypeConstraintError)
 from pants.engine.fs import FilesContent, PathGlobs, Snapshot
 from pants.engine.mapper import AddressFamily, AddressMap, AddressMapper, ResolveError
-from pants.engine.objects import Locatable, SerializableFactory, Validatable
+from pants.engine.objects import Locatable, SerializableFactory, SerializationError, Validatable
 from pants.engine.rules import SingletonRule, TaskRule, rule
 from pants.engine.selectors import Select, SelectDependencies, SelectProjection
+from pants.engine.storage import Storage
 from pants.engine.struct import Struct
+from pants.util.memo import memoized
 from pants.util.objects import datatype
+from pants.version import VERSION
 
 
+logger = logging.getLogger(__name__)
+
 _SPECS_CONSTRAINT = Exactly(SingleAddress,
                             SiblingAddresses,
                             DescendantAddresses,
@@ -64,6 +72,92 @@ def buildfile_path_globs_for_dir(address_mapper, directory):
   return BuildFileGlobs(PathGlobs.create(directory.path, include=patterns, exclude=()))
 
 
+# Cached parses that are unused for this long (because their build file changed, say) are pruned.
+_BUILD_FILE_CACHE_MAX_AGE_SECS = 7 * 24 * 60 * 60
+
+# Pruning walks the whole cache, so it happens at most once per this interval.
+_BUILD_FILE_CACHE_GC_INTERVAL_SECS = 24 * 60 * 60
+
+
+@memoized
+def _build_file_storage(build_file_cache_dir):
+  """Returns the (lazily loaded) persistent Storage for the given cache directory."""
+  storage = Storage.create(path=build_file_cache_dir)
+  marker = join(build_file_cache_dir, 'last_gc')
+  try:
+    last_gc = os.path.getmtime(marker)
+  except OSError:
+    last_gc = 0
+  if time.time() - last_gc >= _BUILD_FILE_CACHE_GC_INTERVAL_SECS:
+    # Record the collection first, so that concurrent runs are unlikely to repeat it.
+    with open(marker, 'a'):
+      os.utime(marker, None)
+    removed = storage.garbage_collect(_BUILD_FILE_CACHE_MAX_AGE_SECS)
+    logger.debug('Pruned {} unused entries from the build file cache.'.format(removed))
+  return storage
+
+
+def _qualified_name(value):
+  value = value if hasattr(value, '__name__') else type(value)
+  return '{}.{}'.format(value.__module__, value.__name__)
+
+
+def symbol_table_key(symbol_table_cls):
+  """Returns a key for the symbols that build files are parsed with.
+
+  The symbol table class is only pickled by name, so the aliases it exposes, which change with the
+  registered backends and plugins, are listed explicitly.
+  """
+  symbols = [('table', alias, _qualified_name(value))
+             for alias, value in symbol_table_cls.table().items()]
+  # A LegacySymbolTable also exposes the registered BuildFileAliases to the parser.
+  aliases = getattr(symbol_table_cls, 'aliases', None)
+  if aliases is not None:
+    registered = aliases()
+    for kind in ('target_types', 'target_macro_factories', 'objects',
+                 'context_aware_object_factories'):
+      symbols.extend((kind, alias, _qualified_name(value))
+                     for alias, value in getattr(registered, kind).items())
+  return tuple(sorted(symbols))
+
+
+def _parse_address_map(address_mapper, filecontent_product):
+  """Parse an AddressMap, consulting the AddressMapper's persistent build file cache if enabled.
+
+  Cache entries are keyed by the content of the build file and by everything else that affects
+  how it is parsed, including the registered aliases, so a changed build file is simply a cache
+  miss.
+  """
+  def parse():
+    return AddressMap.parse(filecontent_product.path,
+                            filecontent_product.content,
+                            address_mapper.symbol_table_cls,
+                            address_mapper.parser_cls,
+                            address_mapper.exclude_patterns)
+
+  if address_mapper.build_file_cache_dir is None:
+    return parse()
+
+  storage = _build_file_storage(address_mapper.build_file_cache_dir)
+  request_key = storage.key_for((VERSION,
+                                 address_mapper.symbol_table_cls,
+                                 symbol_table_key(address_mapper.symbol_table_cls),
+                                 address_mapper.parser_cls,
+                                 tuple(p.pattern for p in address_mapper.exclude_patterns),
+                                 filecontent_product.path,
+                                 filecontent_product.content))
+  result_key = storage.get_mapping(request_key)
+  address_map = storage.get(result_key) if result_key is not None else None
+  if address_map is None:
+    address_map = parse()
+    try:
+      storage.add_mapping(request_key, storage.put(address_map))
+    except SerializationError as e:
+      # E.g. a build file that embeds an unpicklable object: it is simply not cached.
+      logger.debug('Not caching the parse of {}: {}'.format(filecontent_product.path, e))
+  return address_map
+
+
 @rule(AddressFamily, [Select(AddressMapper), Select(Dir), Select(BuildFiles)])
 def parse_address_family(address_mapper, path, build_files):
   """Given the contents of the build files in one directory, return an AddressFamily.
@@ -79,11 +173,7 @@ def parse_address_family(address_mapper, path, build_files):
   for filecontent_product in files_content:
     if filecontent_product.path in ignored_paths:
       continue
-    address_maps.append(AddressMap.parse(filecontent_product.path,
-                                         filecontent_product.content,
-                                         address_mapper.symbol_table_cls,
-                                         address_mapper.parser_cls,
-                                         address_mapper.exclude_patterns))
+    address_maps.append(_parse_address_map(address_mapper, filecontent_product))
   return AddressFamily.create(path.path, address_maps)
 
 
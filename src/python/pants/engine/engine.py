@@ -86,6 +86,22 @@ class Engine(AbstractClass):
     except TaskError as e:
       return self.Result.failure(e)
 
+  def execute_iter(self, execution_requests):
+    """Lazily executes the given requests in order, yielding a Result for each as it completes.
+
+    This allows consumers of large requests that have been split into chunks (such as BuildGraph
+    indexing) to begin processing the first results without waiting for the entire execution, and
+    bounds the number of results that are held in memory at once.
+
+    NB: Requests are executed in the calling thread, because callers commonly hold the
+    scheduler's (re-entrant) lock while consuming results.
+
+    :param execution_requests: An iterable of :class:`ExecutionRequest`.
+    :returns: A generator of :class:`Engine.Result`, in the order of the input requests.
+    """
+    for execution_request in execution_requests:
+      yield self.execute(execution_request)
+
   def product_request(self, product, subjects):
     """Executes a request for a singular product type from the scheduler for one or more subjects
     and yields the products.
@@ -5,35 +5,72 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import cPickle as pickle
+import errno
+import fcntl
 import functools
 import logging
+import multiprocessing
 import os
 import subprocess
+import threading
+import time
 from abc import abstractproperty
 from binascii import hexlify
+from contextlib import contextmanager
+from distutils.spawn import find_executable
+from hashlib import sha1
 
 from pants.engine.rules import SingletonRule, TaskRule
 from pants.engine.selectors import Select
-from pants.util.contextutil import open_tar, temporary_dir
-from pants.util.dirutil import safe_mkdir
+from pants.engine.snapshot_store import SnapshotStore
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import (safe_concurrent_creation, safe_delete, safe_mkdir, safe_mkdir_for,
+                                safe_rmtree)
+from pants.util.memo import memoized
 from pants.util.objects import datatype
 
 
 logger = logging.getLogger(__name__)
 
 
+# Bounds the number of processes that may run concurrently: rules are invoked concurrently by the
+# native engine, but we should not spawn more processes than there are cores to run them.
+_process_slots = threading.BoundedSemaphore(multiprocessing.cpu_count())
+
+# In-memory memoization of process results by sandbox directory, in front of the on-disk cache.
+_process_results = {}
+
+# The extension of the file next to a cached sandbox that holds the pickled result of its process.
+# Its modification time records when the result was last used.
+_RESULT_EXTENSION = '.result'
+
+# The environment variables that processes are run with, if set. Processes do not inherit the rest
+# of the environment of pants, which would make their results specific to a shell or CI job.
+_PROCESS_ENV_VARS = ('HOME', 'LANG', 'LC_ALL', 'LC_CTYPE', 'PATH', 'TMPDIR', 'TZ')
+
+# Digests of the executables that processes run, by their path, size and mtime.
+_executable_digests = {}
+
+
+def _process_env():
+  return {name: os.environ[name] for name in _PROCESS_ENV_VARS if name in os.environ}
+
+
 def _run_command(binary, sandbox_dir, process_request):
   command = binary.prefix_of_command() + tuple(process_request.args)
   logger.debug('Running command: "{}" in {}'.format(command, sandbox_dir))
-  popen = subprocess.Popen(command,
-                           stderr=subprocess.PIPE,
-                           stdout=subprocess.PIPE,
-                           cwd=sandbox_dir)
-  # TODO At some point, we may want to replace this blocking wait with a timed one that returns
-  # some kind of in progress state.
-  popen.wait()
+  with _process_slots:
+    popen = subprocess.Popen(command,
+                             stderr=subprocess.PIPE,
+                             stdout=subprocess.PIPE,
+                             cwd=sandbox_dir,
+                             env=_process_env())
+    # NB: `communicate` (rather than `wait` followed by reads) avoids deadlocking when a process
+    # fills its stdout or stderr pipe buffer.
+    stdout, stderr = popen.communicate()
   logger.debug('Done running command in {}'.format(sandbox_dir))
-  return popen
+  return SnapshottedProcessResult(stdout, stderr, popen.returncode)
 
 
 def _snapshot_path(snapshot, archive_root):
@@ -44,41 +81,249 @@ def _snapshot_path(snapshot, archive_root):
   return os.path.join(snapshot_dir, '{}.tar'.format(fingerprint_hex))
 
 
-def _extract_snapshot(snapshot_archive_root, snapshot, sandbox_dir):
-  with open_tar(_snapshot_path(snapshot, snapshot_archive_root), errorlevel=1) as tar:
-    tar.extractall(sandbox_dir)
+def _rename_unless_exists(src, dst):
+  """Atomically renames the src directory to dst, or deletes src if dst already exists.
 
+  Used when concurrent executions may attempt to create dst, and the first one to do so wins.
+  """
+  try:
+    os.rename(src, dst)
+  except OSError as e:
+    if e.errno not in (errno.EEXIST, errno.ENOTEMPTY):
+      raise
+    safe_rmtree(src)
 
-def _snapshotted_process(input_conversion,
-                         output_conversion,
-                         snapshot_directory,
-                         binary,
-                         *args):
-  """A pickleable top-level function to execute a process.
 
-  Receives two conversion functions, some required inputs, and the user-declared inputs.
+@memoized
+def _snapshot_store(snapshot_archive_root):
+  return SnapshotStore(os.path.join(os.path.dirname(snapshot_archive_root), 'snapshot_store'))
+
+
+def _materialize_snapshot(snapshot_archive_root, snapshot, sandbox_dir):
+  """Materializes the content of the given snapshot into the sandbox from the SnapshotStore."""
+  _snapshot_store(snapshot_archive_root).materialize(hexlify(snapshot.fingerprint),
+                                                     _snapshot_path(snapshot, snapshot_archive_root),
+                                                     sandbox_dir)
+
+
+def _processes_dir(snapshot_archive_root):
+  return os.path.join(os.path.dirname(snapshot_archive_root), 'processes')
+
+
+def _cache_dir(snapshot_archive_root, fingerprint):
+  return os.path.join(_processes_dir(snapshot_archive_root), fingerprint[0:2])
+
+
+def _locks_dir(snapshot_archive_root):
+  # NB: Locks are kept apart from the sandboxes, so that they may outlive failed executions.
+  return os.path.join(os.path.dirname(snapshot_archive_root), 'process_locks')
+
+
+def _lock_path(snapshot_archive_root, fingerprint):
+  return os.path.join(_locks_dir(snapshot_archive_root), fingerprint[0:2], fingerprint)
+
+
+@contextmanager
+def _sandbox_lock(snapshot_archive_root, fingerprint, exclusive=False):
+  """Locks the sandbox of the process execution with the given fingerprint.
+
+  Executions, and the consumers of their sandboxes, hold a shared lock, and garbage collection
+  takes an exclusive lock without blocking, so that sandboxes in use are never collected.
+
+  :yields: True if the lock was acquired; only an exclusive lock may fail to be.
   """
+  path = _lock_path(snapshot_archive_root, fingerprint)
+  safe_mkdir_for(path)
+  while True:
+    with open(path, 'a') as fp:
+      try:
+        fcntl.flock(fp, (fcntl.LOCK_EX | fcntl.LOCK_NB) if exclusive else fcntl.LOCK_SH)
+      except IOError as e:
+        if e.errno not in (errno.EAGAIN, errno.EACCES):
+          raise
+        yield False
+        return
+      # The lock file may have been removed by a collection while waiting for it: if so, lock the
+      # new one instead.
+      try:
+        locked_current = os.fstat(fp.fileno()).st_ino == os.stat(path).st_ino
+      except OSError as e:
+        if e.errno != errno.ENOENT:
+          raise
+        locked_current = False
+      if locked_current:
+        yield True
+        return
+
+
+def _collect_sandbox(snapshot_archive_root, fingerprint, cutoff):
+  """Removes the sandbox of the execution with the given fingerprint, and any left behind by
+  interrupted executions of it, if it was last used before the cutoff and is not in use.
+
+  :returns: True if anything was removed.
+  """
+  cache_dir = _cache_dir(snapshot_archive_root, fingerprint)
+  sandbox_dir = os.path.join(cache_dir, fingerprint)
+  with _sandbox_lock(snapshot_archive_root, fingerprint, exclusive=True) as locked:
+    if not locked:
+      return False
+    entries = [os.path.join(cache_dir, name)
+               for name in (os.listdir(cache_dir) if os.path.isdir(cache_dir) else ())
+               if name.split('.', 1)[0] == fingerprint]
+    result_path = sandbox_dir + _RESULT_EXTENSION
+    if os.path.exists(result_path):
+      last_used = os.path.getmtime(result_path)
+    else:
+      last_used = max([os.path.getmtime(entry) for entry in entries] or [0])
+    if last_used >= cutoff:
+      return False
+    _process_results.pop(sandbox_dir, None)
+    for entry in entries:
+      if os.path.isdir(entry):
+        safe_rmtree(entry)
+      else:
+        safe_delete(entry)
+    safe_delete(_lock_path(snapshot_archive_root, fingerprint))
+    return bool(entries)
+
+
+def garbage_collect(work_dir, max_age_secs):
+  """Removes the stored content of snapshots, and the sandboxes of cached process executions, that
+  have not been used within max_age_secs.
+
+  Sandboxes that are in use by running executions are retained regardless of their age.
+
+  :param string work_dir: The pants workdir, under which the native engine keeps its snapshots.
+  :param int max_age_secs: Retain the content of snapshots and the sandboxes used at most this long
+                           ago.
+  :returns: A tuple of the number of blobs and the number of sandboxes removed.
+  """
+  snapshot_archive_root = os.path.join(work_dir, 'snapshots')
+  cutoff = time.time() - max_age_secs
+  fingerprints = set()
+  # Executions that failed leave only a lock behind.
+  for root in (_processes_dir(snapshot_archive_root), _locks_dir(snapshot_archive_root)):
+    for prefix in (os.listdir(root) if os.path.isdir(root) else ()):
+      fingerprints.update(name.split('.', 1)[0] for name in os.listdir(os.path.join(root, prefix)))
+  removed_sandboxes = sum(1 for fingerprint in sorted(fingerprints)
+                          if _collect_sandbox(snapshot_archive_root, fingerprint, cutoff))
 
-  process_request = input_conversion(*args)
+  store = _snapshot_store(snapshot_archive_root)
+  return store.garbage_collect(store.recently_used(max_age_secs)), removed_sandboxes
 
-  # TODO resolve what to do with output files, then make these tmp dirs cleaned up.
-  with temporary_dir(cleanup=False) as sandbox_dir:
-    if process_request.snapshots:
-      for snapshot in process_request.snapshots:
-        _extract_snapshot(snapshot_directory.root, snapshot, sandbox_dir)
 
-    # All of the snapshots have been checked out now.
-    if process_request.directories_to_create:
-      for d in process_request.directories_to_create:
-        safe_mkdir(os.path.join(sandbox_dir, d))
+def _executable_identity(binary):
+  """Returns the resolved path and the digest of the executable that the binary's command runs.
+
+  Executables are identified by their content, so that upgrading a tool invalidates the results of
+  the processes that ran it.
+  """
+  executable = binary.prefix_of_command()[0]
+  path = executable if os.path.dirname(executable) else find_executable(executable)
+  if path is None or not os.path.isfile(path):
+    # The executable is not found, or is relative to the sandbox and so captured by its snapshots.
+    return (executable,)
+  path = os.path.realpath(path)
+  stat = os.stat(path)
+  key = (path, stat.st_size, stat.st_mtime)
+  digest = _executable_digests.get(key)
+  if digest is None:
+    hasher = sha1()
+    with open(path, 'rb') as fp:
+      for chunk in iter(lambda: fp.read(64 * 1024), b''):
+        hasher.update(chunk)
+    digest = _executable_digests[key] = hasher.hexdigest()
+  return (path, digest)
+
+
+def _process_request_fingerprint(binary, process_request):
+  """Returns a hex fingerprint of everything that affects the execution of the given request."""
+  hasher = sha1()
+  for section in (_executable_identity(binary),
+                  tuple('{}={}'.format(k, v) for k, v in sorted(_process_env().items())),
+                  binary.prefix_of_command(),
+                  process_request.args,
+                  tuple(hexlify(s.fingerprint) for s in process_request.snapshots),
+                  process_request.directories_to_create):
+    for item in section:
+      hasher.update(item.encode('utf-8'))
+      hasher.update(b'\0')
+    hasher.update(b'\1')
+  return hasher.hexdigest()
+
+
+def _execute_process(snapshot_archive_root, binary, process_request):
+  """Executes the given request, or returns a cached result for an identical request.
+
+  Successful executions are cached in a sandbox directory named for the fingerprint of the request
+  (so that output conversions may continue to consume files from it), while the sandboxes of failed
+  executions are cleaned up. Consumers of the sandbox should hold its `_sandbox_lock` while they
+  use it.
+
+  :returns: A tuple of SnapshottedProcessResult and the sandbox directory it was executed in.
+  """
+  fingerprint = _process_request_fingerprint(binary, process_request)
+  with _sandbox_lock(snapshot_archive_root, fingerprint):
+    return _execute_locked_process(snapshot_archive_root, binary, process_request, fingerprint)
+
+
+def _execute_locked_process(snapshot_archive_root, binary, process_request, fingerprint):
+  cache_dir = _cache_dir(snapshot_archive_root, fingerprint)
+  sandbox_dir = os.path.join(cache_dir, fingerprint)
+  result_path = sandbox_dir + _RESULT_EXTENSION
+
+  process_result = _process_results.get(sandbox_dir)
+  if process_result is None and os.path.exists(result_path):
+    with open(result_path, 'rb') as fp:
+      process_result = pickle.load(fp)
+  if process_result is not None:
+    logger.debug('Using cached result for {} in {}'.format(binary, sandbox_dir))
+    # Record the use of the sandbox.
+    os.utime(result_path, None)
+    _process_results[sandbox_dir] = process_result
+    return process_result, sandbox_dir
+
+  safe_mkdir(cache_dir)
+  # NB: Temporary sandboxes are named for the fingerprint, so that they are covered by its lock.
+  with temporary_dir(root_dir=cache_dir, prefix='{}.tmp'.format(fingerprint)) as tmp_sandbox_dir:
+    for snapshot in process_request.snapshots:
+      _materialize_snapshot(snapshot_archive_root, snapshot, tmp_sandbox_dir)
 
-    popen = _run_command(binary, sandbox_dir, process_request)
+    # All of the snapshots have been checked out now.
+    for d in process_request.directories_to_create:
+      safe_mkdir(os.path.join(tmp_sandbox_dir, d))
 
-    process_result = SnapshottedProcessResult(popen.stdout.read(), popen.stderr.read(), popen.returncode)
+    process_result = _run_command(binary, tmp_sandbox_dir, process_request)
     if process_result.exit_code != 0:
       raise Exception('Running {} failed with non-zero exit code: {}'.format(binary,
                                                                              process_result.exit_code))
 
+    _rename_unless_exists(tmp_sandbox_dir, sandbox_dir)
+    # The result is recorded once the sandbox is in place: a result always has a sandbox.
+    with safe_concurrent_creation(result_path) as tmp_result_path:
+      with open(tmp_result_path, 'wb') as fp:
+        pickle.dump(process_result, fp, pickle.HIGHEST_PROTOCOL)
+
+  _process_results[sandbox_dir] = process_result
+  return process_result, sandbox_dir
+
+
+def _snapshotted_process(input_conversion,
+                         output_conversion,
+                         snapshot_directory,
+                         binary,
+                         *args):
+  """A pickleable top-level function to execute a process.
+
+  Receives two conversion functions, some required inputs, and the user-declared inputs.
+  """
+
+  process_request = input_conversion(*args)
+  fingerprint = _process_request_fingerprint(binary, process_request)
+  # Hold the sandbox until the output conversion has consumed it.
+  with _sandbox_lock(snapshot_directory.root, fingerprint):
+    process_result, sandbox_dir = _execute_locked_process(snapshot_directory.root, binary,
+                                                          process_request, fingerprint)
     return output_conversion(process_result, sandbox_dir)
 
 
@@ -5,12 +5,17 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import fnmatch
 import logging
+import os
 
-from pants.base.specs import DescendantAddresses
+from pants.base.build_environment import get_buildroot
+from pants.base.specs import DescendantAddresses, SiblingAddresses
+from pants.engine.legacy.dependee_index import DependeeIndex
 from pants.engine.legacy.graph import LegacyBuildGraph
 from pants.engine.legacy.source_mapper import EngineSourceMapper
 from pants.scm.change_calculator import ChangeCalculator
+from pants.scm.scm import Scm
 
 
 logger = logging.getLogger(__name__)
@@ -19,16 +24,93 @@ logger = logging.getLogger(__name__)
 class EngineChangeCalculator(ChangeCalculator):
   """A ChangeCalculator variant that uses the v2 engine for source mapping."""
 
-  def __init__(self, scheduler, engine, symbol_table_cls, scm):
+  def __init__(self, scheduler, engine, symbol_table_cls, scm, dependee_index=None,
+               build_patterns=('BUILD', 'BUILD.*')):
     """
     :param Engine engine: The `Engine` instance to use for computing file to target mappings.
     :param Scm engine: The `Scm` instance to use for computing changes.
+    :param DependeeIndex dependee_index: A `DependeeIndex` to compute dependees with. If None, an
+                                        in-memory index is used.
+    :param tuple build_patterns: Glob patterns matching BUILD file names.
     """
     super(EngineChangeCalculator, self).__init__(scm)
     self._scheduler = scheduler
     self._engine = engine
     self._symbol_table_cls = symbol_table_cls
     self._mapper = EngineSourceMapper(engine)
+    self._dependee_index = dependee_index or DependeeIndex()
+    self._build_patterns = build_patterns
+
+  def _build_file_dirs(self, files):
+    """Returns the directories of those of the given files that are BUILD files."""
+    return set(os.path.dirname(f) for f in files
+               if any(fnmatch.fnmatch(os.path.basename(f), p) for p in self._build_patterns))
+
+  def invalidate_files(self, files):
+    """Marks the BUILD files among the given changed files as needing to be re-indexed.
+
+    Called by pantsd with filesystem change events, to keep the in-memory dependee index current.
+    """
+    self._dependee_index.invalidate_dirs(self._build_file_dirs(files))
+
+  def _dependencies_by_address(self, specs):
+    graph = LegacyBuildGraph.create(self._scheduler, self._engine, self._symbol_table_cls)
+    for _ in graph.inject_specs_closure(specs):
+      pass
+    return {target.address: graph.dependencies_of(target.address)
+            for target in graph.targets()}
+
+  def _has_build_files(self, spec_path):
+    try:
+      return any(fnmatch.fnmatch(name, p)
+                 for name in os.listdir(os.path.join(get_buildroot(), spec_path))
+                 for p in self._build_patterns)
+    except OSError:
+      return False
+
+  def _rebuild_dependee_index(self, revision, uncommitted_files):
+    index = self._dependee_index
+    # All BUILD files are parsed, so any pending invalidations are moot.
+    index.consume_dirty_dirs()
+    index.update_all(self._dependencies_by_address([DescendantAddresses('')]))
+    index.mark_up_to_date(revision, uncommitted_files)
+    return index
+
+  def _up_to_date_dependee_index(self):
+    """Brings the dependee index up to date with the workspace, and returns it.
+
+    Only the first computation of the index (when none was persisted by a previous run) requires
+    parsing all BUILD files: afterwards, only BUILD files changed since the revision (and
+    uncommitted files) that the index was last computed for are re-parsed.
+    """
+    index = self._dependee_index
+    buildroot = get_buildroot()
+    revision = self._scm.commit_id
+    uncommitted_files = self._scm.changed_files(include_untracked=True, relative_to=buildroot)
+
+    if not index.is_populated and not index.load():
+      logger.debug('computing dependee index for all BUILD files.')
+      return self._rebuild_dependee_index(revision, uncommitted_files)
+
+    changed_files = set(uncommitted_files) | index.uncommitted_files
+    if index.revision != revision:
+      try:
+        changed_files.update(self._scm.changes_in('{}..{}'.format(index.revision, revision),
+                                                  relative_to=buildroot))
+      except Scm.LocalException as e:
+        # The indexed revision may no longer exist (e.g. after a rebase and gc).
+        logger.debug('recomputing dependee index: failed to diff against revision {}: {!r}'
+                     .format(index.revision, e))
+        return self._rebuild_dependee_index(revision, uncommitted_files)
+    dirty_dirs = self._build_file_dirs(changed_files) | index.consume_dirty_dirs()
+    if dirty_dirs:
+      logger.debug('updating dependee index for: %s', dirty_dirs)
+      specs = [SiblingAddresses(d) for d in dirty_dirs if self._has_build_files(d)]
+      dependencies_by_address = self._dependencies_by_address(specs) if specs else {}
+      index.update(dirty_dirs, dependencies_by_address)
+    if dirty_dirs or index.revision != revision or index.uncommitted_files != set(uncommitted_files):
+      index.mark_up_to_date(revision, uncommitted_files)
+    return index
 
   def iter_changed_target_addresses(self, changed_request):
     """Given a `ChangedRequest`, compute and yield all affected target addresses."""
@@ -46,21 +128,17 @@ class EngineChangeCalculator(ChangeCalculator):
     if changed_request.include_dependees not in ('direct', 'transitive'):
       return
 
-    # For dependee finding, we need to parse all build files.
-    graph = LegacyBuildGraph.create(self._scheduler, self._engine, self._symbol_table_cls)
-    for _ in graph.inject_specs_closure([DescendantAddresses('')]):
-      pass
-
+    index = self._up_to_date_dependee_index()
     if changed_request.include_dependees == 'direct':
       emitted = set()
       for address in changed_addresses:
-        for dependee in graph.dependents_of(address):
+        for dependee in index.dependees_of(address):
           if dependee not in emitted:
             emitted.add(dependee)
             yield dependee
     elif changed_request.include_dependees == 'transitive':
-      for target in graph.transitive_dependees_of_addresses(changed_addresses):
-        yield target.address
+      for address in index.transitive_dependees_of(changed_addresses):
+        yield address
 
   def changed_target_addresses(self, changed_request):
     return list(self.iter_changed_target_addresses(changed_request))
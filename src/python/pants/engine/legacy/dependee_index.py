@@ -0,0 +1,205 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import json
+import logging
+import os
+import uuid
+from collections import defaultdict, deque
+
+from pants.build_graph.address import Address
+from pants.util.dirutil import safe_concurrent_creation, safe_delete, safe_mkdir_for
+
+
+logger = logging.getLogger(__name__)
+
+
+class DependeeIndex(object):
+  """A reverse dependency index (address -> dependees) of the targets of a repo.
+
+  The index is maintained per BUILD file directory: when the BUILD files in a directory change, only
+  the targets defined in that directory need to be re-indexed. The index may be persisted to disk,
+  along with the scm revision it was computed at, so that runs may bring it up to date by
+  re-indexing only the directories changed since.
+  """
+
+  VERSION = 2
+
+  def __init__(self, path=None, fingerprint=None):
+    """
+    :param string path: A file to persist the index to, or None to keep it in memory only.
+    :param string fingerprint: A fingerprint of the inputs that the targets are parsed with (the
+                               registered aliases, ignore patterns, etc.). A persisted index is only
+                               loaded if it was computed with the same fingerprint.
+    """
+    self._path = path
+    self._fingerprint = fingerprint
+    self.clear()
+
+  def clear(self):
+    self._revision = None
+    self._uncommitted_files = frozenset()
+    self._dirty_dirs = set()
+    # Address spec -> tuple of dependency address specs.
+    self._dependencies = {}
+    # Address spec -> set of dependee address specs.
+    self._dependees = defaultdict(set)
+    # Spec path -> set of address specs defined there.
+    self._specs_by_dir = defaultdict(set)
+
+  @property
+  def is_populated(self):
+    """True if the index has been populated (by `update_all` or `load`)."""
+    return self._revision is not None
+
+  @property
+  def revision(self):
+    """The scm revision the index was last brought up to date at."""
+    return self._revision
+
+  @property
+  def uncommitted_files(self):
+    """The files that were uncommitted at the time the index was last brought up to date."""
+    return self._uncommitted_files
+
+  @property
+  def _dirty_dirs_path(self):
+    return '{}.dirty'.format(self._path)
+
+  def invalidate_dirs(self, dirs):
+    """Marks the given BUILD file directories as needing to be re-indexed.
+
+    For a persisted index the directories are appended to a journal next to the index file rather
+    than held in memory, so that they are consumed exactly once even when they are invalidated and
+    consumed by different processes (as under pantsd, where the daemon invalidates and a forked
+    client may bring the index up to date).
+    """
+    if not dirs:
+      return
+    if not self._path:
+      self._dirty_dirs.update(dirs)
+      return
+    safe_mkdir_for(self._dirty_dirs_path)
+    with open(self._dirty_dirs_path, 'ab') as fp:
+      fp.write(''.join('{}\n'.format(d) for d in dirs).encode('utf-8'))
+
+  def consume_dirty_dirs(self):
+    """Returns and clears the set of directories marked via `invalidate_dirs`."""
+    if not self._path:
+      dirty_dirs, self._dirty_dirs = self._dirty_dirs, set()
+      return dirty_dirs
+
+    # Claim the journal by renaming it, so that concurrent invalidations start a new one.
+    consumed_path = '{}.{}'.format(self._dirty_dirs_path, uuid.uuid4().hex)
+    try:
+      os.rename(self._dirty_dirs_path, consumed_path)
+    except OSError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      return set()
+    try:
+      with open(consumed_path, 'rb') as fp:
+        return set(fp.read().decode('utf-8').splitlines())
+    finally:
+      safe_delete(consumed_path)
+
+  def _remove_dir(self, spec_path):
+    for spec in self._specs_by_dir.pop(spec_path, ()):
+      for dependency in self._dependencies.pop(spec, ()):
+        self._dependees[dependency].discard(spec)
+
+  def _add(self, spec, dependency_specs):
+    self._dependencies[spec] = dependency_specs
+    self._specs_by_dir[Address.parse(spec).spec_path].add(spec)
+    for dependency in dependency_specs:
+      self._dependees[dependency].add(spec)
+
+  def update(self, dirs, dependencies_by_address):
+    """Replaces the entries for all targets defined in the given directories.
+
+    :param dirs: The spec paths (BUILD file directories) being re-indexed.
+    :param dict dependencies_by_address: A dict from Address to an iterable of its dependency
+                                         Addresses, for (at least) all targets defined in dirs.
+    """
+    dirs = set(dirs)
+    for spec_path in dirs:
+      self._remove_dir(spec_path)
+    for address, dependencies in dependencies_by_address.items():
+      if address.spec_path in dirs:
+        self._add(address.spec, tuple(d.spec for d in dependencies))
+
+  def update_all(self, dependencies_by_address):
+    """Replaces the entire index with the given dependencies.
+
+    :param dict dependencies_by_address: A dict from Address to an iterable of its dependency
+                                         Addresses, for all targets in the repo.
+    """
+    self.clear()
+    for address, dependencies in dependencies_by_address.items():
+      self._add(address.spec, tuple(d.spec for d in dependencies))
+
+  def mark_up_to_date(self, revision, uncommitted_files):
+    """Records the scm state that the index reflects, and persists it if a path was given."""
+    self._revision = revision
+    self._uncommitted_files = frozenset(uncommitted_files)
+    if self._path:
+      self.save()
+
+  def dependees_of(self, address):
+    """Returns the Addresses of the direct dependees of the given Address."""
+    return set(Address.parse(spec) for spec in self._dependees.get(address.spec, ()))
+
+  def transitive_dependees_of(self, addresses):
+    """Returns the given Addresses and the Addresses of all of their transitive dependees."""
+    seen = set(address.spec for address in addresses)
+    queue = deque(seen)
+    while queue:
+      for dependee in self._dependees.get(queue.popleft(), ()):
+        if dependee not in seen:
+          seen.add(dependee)
+          queue.append(dependee)
+    return set(Address.parse(spec) for spec in seen)
+
+  def save(self):
+    with safe_concurrent_creation(self._path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        json.dump(dict(version=self.VERSION,
+                       fingerprint=self._fingerprint,
+                       revision=self._revision,
+                       uncommitted_files=sorted(self._uncommitted_files),
+                       dependencies=self._dependencies),
+                  fp)
+
+  def load(self):
+    """Loads the persisted index, if any.
+
+    :returns: True if an index was loaded.
+    """
+    dirty_dirs = self._dirty_dirs
+    self.clear()
+    self._dirty_dirs = dirty_dirs
+    if not self._path:
+      return False
+    try:
+      with open(self._path, 'rb') as fp:
+        data = json.load(fp)
+    except (IOError, OSError, ValueError) as e:
+      logger.debug('not loading dependee index from {}: {!r}'.format(self._path, e))
+      return False
+    if data.get('version') != self.VERSION:
+      return False
+    if data.get('fingerprint') != self._fingerprint:
+      logger.debug('not loading dependee index from {}: it was computed with different inputs.'
+                   .format(self._path))
+      return False
+
+    for spec, dependency_specs in data['dependencies'].items():
+      self._add(spec, tuple(dependency_specs))
+    self._revision = data['revision']
+    self._uncommitted_files = frozenset(data['uncommitted_files'])
+    return True
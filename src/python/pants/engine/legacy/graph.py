@@ -47,27 +47,37 @@ class LegacyBuildGraph(BuildGraph):
   class InvalidCommandLineSpecError(AddressLookupError):
     """Raised when command line spec is not a valid directory"""
 
+  # The default maximum number of targets to hydrate per request when injecting specs: requests
+  # matching more targets than this are split so that indexing can begin before all targets have
+  # been hydrated.
+  DEFAULT_HYDRATION_CHUNK_SIZE = 1000
+
   @classmethod
   def create(cls, scheduler, engine, symbol_table_cls):
     """Construct a graph given a Scheduler, Engine, and a SymbolTable class."""
     return cls(scheduler, engine, cls._get_target_types(symbol_table_cls))
 
-  def __init__(self, scheduler, engine, target_types):
+  def __init__(self, scheduler, engine, target_types, hydration_chunk_size=None):
     """Construct a graph given a Scheduler, Engine, and a SymbolTable class.
 
     :param scheduler: A Scheduler that is configured to be able to resolve HydratedTargets.
     :param engine: An Engine subclass to execute calls to `inject`.
     :param symbol_table_cls: A SymbolTable class used to instantiate Target objects. Must match
       the symbol table installed in the scheduler (TODO: see comment in `_instantiate_target`).
+    :param int hydration_chunk_size: The maximum number of targets to hydrate per request.
     """
     self._scheduler = scheduler
     self._engine = engine
     self._target_types = target_types
+    self._hydration_chunk_size = hydration_chunk_size or self.DEFAULT_HYDRATION_CHUNK_SIZE
     super(LegacyBuildGraph, self).__init__()
 
   def clone_new(self):
     """Returns a new BuildGraph instance of the same type and with the same __init__ params."""
-    return LegacyBuildGraph(self._scheduler, self._engine, self._target_types)
+    return LegacyBuildGraph(self._scheduler,
+                            self._engine,
+                            self._target_types,
+                            self._hydration_chunk_size)
 
   @staticmethod
   def _get_target_types(symbol_table_cls):
@@ -224,28 +234,51 @@ class LegacyBuildGraph(BuildGraph):
     return self.get_target(address)
 
   def _inject(self, subjects):
-    """Inject Targets into the graph for each of the subjects and yield the resulting addresses."""
-    logger.debug('Injecting to %s: %s', self, subjects)
-    request = self._scheduler.execution_request([HydratedTargets, BuildFileAddresses], subjects)
+    """Inject Targets into the graph for each of the subjects and yield the resulting addresses.
 
+    Addresses are yielded as soon as the chunk of targets containing them has been hydrated and
+    indexed, and the next chunk is not hydrated until they have been consumed.
+    """
+    logger.debug('Injecting to %s: %s', self, subjects)
+    addresses = self._resolve_addresses(subjects)
+
+    if len(addresses) <= self._hydration_chunk_size:
+      address_chunks = [addresses]
+      subject_chunks = [subjects]
+    else:
+      address_chunks = [addresses[i:i + self._hydration_chunk_size]
+                        for i in range(0, len(addresses), self._hydration_chunk_size)]
+      subject_chunks = [[SingleAddress(a.spec_path, a.target_name) for a in chunk]
+                        for chunk in address_chunks]
+
+    results = self._engine.execute_iter(
+      self._scheduler.execution_request([HydratedTargets], subject_chunk)
+      for subject_chunk in subject_chunks)
+    for address_chunk in address_chunks:
+      result = next(results)
+      if result.error:
+        raise result.error
+      # Update the base class indexes for this chunk.
+      self._index(result.root_products)
+      for address in address_chunk:
+        yield address
+
+  def _resolve_addresses(self, subjects):
+    """Returns a list of the unique addresses matched by the given subjects, in order."""
+    request = self._scheduler.execution_request([BuildFileAddresses], subjects)
     result = self._engine.execute(request)
     if result.error:
       raise result.error
-    # Update the base class indexes for this request.
-    root_entries = self._scheduler.root_entries(request)
-    address_entries = {k: v for k, v in root_entries.items() if k[1].product is BuildFileAddresses}
-    target_entries = {k: v for k, v in root_entries.items() if k[1].product is HydratedTargets}
-    self._index(target_entries)
-
-    yielded_addresses = set()
-    for (subject, _), state in address_entries.items():
+
+    addresses = OrderedSet()
+    for root in request.roots:
+      subject, _ = root
+      state = result.root_products[root]
       if not state.value.dependencies:
         raise self.InvalidCommandLineSpecError(
           'Spec {} does not match any targets.'.format(subject))
-      for address in state.value.dependencies:
-        if address not in yielded_addresses:
-          yielded_addresses.add(address)
-          yield address
+      addresses.update(state.value.dependencies)
+    return list(addresses)
 
 
 class HydratedTarget(datatype('HydratedTarget', ['address', 'adaptor', 'dependencies'])):
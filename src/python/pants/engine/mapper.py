@@ -184,7 +184,8 @@ class AddressMapper(object):
                build_patterns=None,
                build_ignore_patterns=None,
                exclude_target_regexps=None,
-               subproject_roots=None):
+               subproject_roots=None,
+               build_file_cache_dir=None):
     """Create an AddressMapper.
 
     Both the set of files that define a mappable BUILD files and the parser used to parse those
@@ -198,6 +199,8 @@ class AddressMapper(object):
                                  used to resolve addresses.
     :param list build_ignore_patterns: A list of path ignore patterns used when searching for BUILD files.
     :param list exclude_target_regexps: A list of regular expressions for excluding targets.
+    :param string build_file_cache_dir: If set, a directory in which to persist parsed build files
+                                        across runs, keyed by the fingerprints of their content.
     """
     self.symbol_table_cls = symbol_table_cls
     self.parser_cls = parser_cls
@@ -206,6 +209,7 @@ class AddressMapper(object):
     self._exclude_target_regexps = exclude_target_regexps or []
     self.exclude_patterns = [re.compile(pattern) for pattern in self._exclude_target_regexps]
     self.subproject_roots = subproject_roots or []
+    self.build_file_cache_dir = build_file_cache_dir
 
   def __eq__(self, other):
     if self is other:
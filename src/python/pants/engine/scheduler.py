@@ -11,6 +11,8 @@ import threading
 import time
 from contextlib import contextmanager
 
+from twitter.common.collections import OrderedSet
+
 from pants.base.project_tree import Dir, File, Link
 from pants.base.specs import (AscendantAddresses, DescendantAddresses, SiblingAddresses,
                               SingleAddress)
@@ -258,11 +260,15 @@ class WrappedNativeScheduler(object):
   def pre_fork(self):
     self._native.lib.scheduler_pre_fork(self._scheduler)
 
-  def root_entries(self, execution_request):
+  def root_entries(self, execution_roots):
+    """Returns a dict from each of the currently added roots to its State.
+
+    :param execution_roots: The roots that were added for the current execution, in order.
+    """
     raw_roots = self._native.lib.execution_roots(self._scheduler)
     try:
       roots = {}
-      for root, raw_root in zip(execution_request.roots,
+      for root, raw_root in zip(execution_roots,
                                 self._native.unpack(raw_roots.nodes_ptr,
                                                                raw_roots.nodes_len)):
         if raw_root.state_tag is 0:
@@ -307,9 +313,13 @@ class LocalScheduler(object):
     self._product_graph_lock = graph_lock or threading.RLock()
     self._run_count = 0
 
-    # Create the ExternContext, and the native Scheduler.
-    self._execution_request = None
-
+    # The roots currently added to the native Scheduler, and requests which have been submitted
+    # to `schedule` but not yet executed. Concurrently submitted requests are coalesced into a
+    # single native execution.
+    self._execution_roots = tuple()
+    self._execution_root_set = frozenset()
+    self._pending_requests = []
+    self._pending_requests_lock = threading.Lock()
 
     # Validate and register all provided and intrinsic tasks.
     # TODO: This bounding of input Subject types allows for closed-world validation, but is not
@@ -408,13 +418,18 @@ class LocalScheduler(object):
       yield
 
   def root_entries(self, execution_request):
-    """Returns the roots for the given ExecutionRequest as a dict of tuples to State."""
+    """Returns the roots for the given ExecutionRequest as a dict of tuples to State.
+
+    The request must previously have been passed to `schedule`, but other requests may have been
+    executed since: in that case the request's roots are re-added and re-executed, which is cheap
+    for nodes that are already completed in the product Graph.
+    """
     with self._product_graph_lock:
-      if self._execution_request is not execution_request:
-        raise AssertionError(
-          "Multiple concurrent executions are not supported! {} vs {}".format(
-            self._execution_request, execution_request))
-      return self._scheduler.root_entries(execution_request)
+      if not self._execution_root_set.issuperset(execution_request.roots):
+        self._execution_add_roots([execution_request])
+        self._scheduler.run_and_return_stat()
+      entries = self._scheduler.root_entries(self._execution_roots)
+      return {root: entries[root] for root in execution_request.roots}
 
   def invalidate_files(self, filenames):
     """Calls `Graph.invalidate_files()` against an internal product Graph instance."""
@@ -432,28 +447,44 @@ class LocalScheduler(object):
     with self._product_graph_lock:
       return self._scheduler.graph_len()
 
-  def _execution_add_roots(self, execution_request):
-    if self._execution_request is not None:
-      self._scheduler.exec_reset()
-    self._execution_request = execution_request
-    for subject, selector in execution_request.roots:
+  def _execution_add_roots(self, execution_requests):
+    """Reset execution, and add the deduplicated roots of all of the given requests."""
+    self._scheduler.exec_reset()
+    self._execution_roots = tuple(OrderedSet(root
+                                             for execution_request in execution_requests
+                                             for root in execution_request.roots))
+    self._execution_root_set = frozenset(self._execution_roots)
+    for subject, selector in self._execution_roots:
       self._scheduler.add_root_selection(subject, selector)
 
   def pre_fork(self):
     self._scheduler.pre_fork()
 
   def schedule(self, execution_request):
-    """Yields batches of Steps until the roots specified by the request have been completed.
+    """Executes the given request until all of its roots have been completed.
 
-    This method should be called by exactly one scheduling thread, but the Step objects returned
-    by this method are intended to be executed in multiple threads, and then satisfied by the
-    scheduling thread.
+    This method may be called concurrently by multiple threads: any requests which are submitted
+    while another execution holds the product Graph lock are executed together in one batch by
+    the next thread to acquire it.
+
+    Executions themselves are serialized: the native Scheduler holds a single root set, and calls
+    back into python for runnables, so only one execution may run against the product Graph at a
+    time. A request that arrives mid-execution waits for at most that one execution, rather than
+    for every request queued ahead of it.
     """
+    with self._pending_requests_lock:
+      self._pending_requests.append(execution_request)
 
     with self._product_graph_lock:
+      with self._pending_requests_lock:
+        execution_requests, self._pending_requests = self._pending_requests, []
+      if not execution_requests:
+        # Our request was executed in a batch by another thread while we waited for the lock.
+        return
+
       start_time = time.time()
-      # Reset execution, and add any roots from the request.
-      self._execution_add_roots(execution_request)
+      # Reset execution, and add any roots from the requests.
+      self._execution_add_roots(execution_requests)
       # Execute in native engine.
       execution_stat = self._scheduler.run_and_return_stat()
       # Receive execution statistics.
@@ -466,10 +497,11 @@ class LocalScheduler(object):
         self.visualize_graph_to_file(os.path.join(self._scheduler.visualize_to_dir(), name))
 
       logger.debug(
-        'ran %s scheduling iterations and %s runnables in %f seconds. '
+        'ran %s scheduling iterations and %s runnables for %d requests in %f seconds. '
         'there are %s total nodes.',
         scheduling_iterations,
         runnable_count,
+        len(execution_requests),
         time.time() - start_time,
         self._scheduler.graph_len()
       )
@@ -0,0 +1,215 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import errno
+import fcntl
+import json
+import os
+import shutil
+import stat
+import time
+import uuid
+from hashlib import sha1
+
+from pants.util.contextutil import open_tar
+from pants.util.dirutil import safe_concurrent_creation, safe_delete, safe_mkdir, safe_mkdir_for
+
+
+class SnapshotStore(object):
+  """A file-level content-addressed store for the content of Snapshots.
+
+  Snapshot archives are ingested once into a set of blobs (keyed by the digest of their content)
+  and a manifest listing the directories, files and symlinks of the snapshot. Snapshots that share
+  files share blobs, and materializing a snapshot copies its blobs into place rather than
+  re-extracting the archive. Where the filesystem supports it, copies are copy-on-write reflinks, so
+  that the cost of both scales with changed rather than total bytes.
+
+  Blobs are read-only, and are copied rather than hardlinked into sandboxes, so that a process which
+  modifies its inputs in place cannot corrupt the content of the snapshots that share them.
+
+  The modification time of a manifest records when its snapshot was last used, so that snapshots
+  which have not been used recently may be garbage collected.
+  """
+
+  _BUFFER_SIZE = 64 * 1024
+
+  _EXECUTE_BITS = stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+
+  # The Linux ioctl that clones the content of a file as a copy-on-write reflink, on filesystems
+  # that support it (e.g. btrfs and xfs).
+  _FICLONE = 0x40049409
+
+  def __init__(self, root):
+    """
+    :param string root: The directory to store blobs and manifests under.
+    """
+    self._blobs_dir = os.path.join(root, 'blobs')
+    self._manifests_dir = os.path.join(root, 'manifests')
+
+  @staticmethod
+  def _is_tmp(filename):
+    # Files that are in the process of being created by a concurrent `manifest` call.
+    return filename.startswith('tmp.') or '.tmp.' in filename
+
+  def _blob_path(self, blob_key):
+    return os.path.join(self._blobs_dir, blob_key[0:2], blob_key)
+
+  def _manifest_path(self, fingerprint):
+    return os.path.join(self._manifests_dir, fingerprint[0:2], fingerprint)
+
+  def _store_blob(self, fileobj, executable):
+    """Stores the content of the given file object, and returns the key of its blob.
+
+    Executable and non-executable files are stored as different blobs, because the mode of a blob
+    is that of its copies.
+    """
+    tmp_path = os.path.join(self._blobs_dir, 'tmp.{}'.format(uuid.uuid4().hex))
+    safe_mkdir_for(tmp_path)
+    hasher = sha1()
+    with open(tmp_path, 'wb') as out:
+      for chunk in iter(lambda: fileobj.read(self._BUFFER_SIZE), b''):
+        hasher.update(chunk)
+        out.write(chunk)
+    blob_key = '{}{}'.format(hasher.hexdigest(), '.x' if executable else '')
+    blob_path = self._blob_path(blob_key)
+    if os.path.exists(blob_path):
+      safe_delete(tmp_path)
+    else:
+      mode = stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH
+      os.chmod(tmp_path, mode | (self._EXECUTE_BITS if executable else 0))
+      safe_mkdir_for(blob_path)
+      os.rename(tmp_path, blob_path)
+    return blob_key
+
+  def manifest(self, fingerprint, archive_path):
+    """Returns the manifest for the given snapshot, ingesting its archive if need be.
+
+    :param string fingerprint: The hex fingerprint of the snapshot.
+    :param string archive_path: The path of the tar archive of the snapshot.
+    :returns: A list of `[type, path, ...]` entries, where type is one of `dir`, `file` (followed by
+              a blob key) or `symlink` (followed by a link target).
+    """
+    manifest_path = self._manifest_path(fingerprint)
+    try:
+      with open(manifest_path, 'rb') as fp:
+        entries = json.load(fp)
+      # Record the use of the snapshot.
+      os.utime(manifest_path, None)
+      return entries
+    except (IOError, OSError) as e:
+      if e.errno != errno.ENOENT:
+        raise
+    except ValueError:
+      # A corrupt manifest: re-ingest below.
+      pass
+
+    entries = []
+    with open_tar(archive_path, errorlevel=1) as tar:
+      for member in tar:
+        if member.isdir():
+          entries.append(['dir', member.name])
+        elif member.issym():
+          entries.append(['symlink', member.name, member.linkname])
+        elif member.isfile() or member.islnk():
+          # The content of a hardlink is that of its target, so they share a blob.
+          executable = bool(member.mode & stat.S_IXUSR)
+          blob_key = self._store_blob(tar.extractfile(member), executable)
+          entries.append(['file', member.name, blob_key])
+        else:
+          raise ValueError('Unsupported member {} of type {!r} in snapshot archive {}.'
+                           .format(member.name, member.type, archive_path))
+
+    with safe_concurrent_creation(manifest_path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        json.dump(entries, fp)
+    return entries
+
+  def materialize(self, fingerprint, archive_path, dest_dir):
+    """Materializes the content of the given snapshot into dest_dir.
+
+    Files are copied from their blobs: as reflinks where possible, and byte for byte otherwise.
+    """
+    try:
+      self._materialize(self.manifest(fingerprint, archive_path), dest_dir)
+    except (IOError, OSError) as e:
+      if e.errno != errno.ENOENT:
+        raise
+      # A concurrent `garbage_collect` removed blobs of the manifest: ingest the archive again.
+      safe_delete(self._manifest_path(fingerprint))
+      self._materialize(self.manifest(fingerprint, archive_path), dest_dir, replace=True)
+
+  def _materialize(self, entries, dest_dir, replace=False):
+    for entry in entries:
+      entry_type, path = entry[0], os.path.join(dest_dir, entry[1])
+      if entry_type == 'dir':
+        safe_mkdir(path)
+        continue
+      safe_mkdir_for(path)
+      if replace:
+        # Replace any entries materialized by a previous attempt.
+        safe_delete(path)
+      if entry_type == 'symlink':
+        os.symlink(entry[2], path)
+      else:
+        self._copy_blob(self._blob_path(entry[2]), path)
+
+  def _copy_blob(self, blob_path, path):
+    with open(blob_path, 'rb') as src, open(path, 'wb') as dst:
+      try:
+        fcntl.ioctl(dst.fileno(), self._FICLONE, src.fileno())
+      except (IOError, OSError):
+        # Reflinks are unsupported by the platform or filesystem, or across filesystems.
+        shutil.copyfileobj(src, dst, self._BUFFER_SIZE)
+    # Unlike their blobs, materialized files are writable.
+    os.chmod(path, stat.S_IMODE(os.stat(blob_path).st_mode) | stat.S_IWUSR)
+
+  def recently_used(self, max_age_secs):
+    """Returns the hex fingerprints of the snapshots used within the last max_age_secs."""
+    cutoff = time.time() - max_age_secs
+    fingerprints = []
+    for root, _, files in os.walk(self._manifests_dir):
+      for fingerprint in files:
+        if self._is_tmp(fingerprint):
+          continue
+        try:
+          if os.path.getmtime(os.path.join(root, fingerprint)) >= cutoff:
+            fingerprints.append(fingerprint)
+        except OSError as e:
+          if e.errno != errno.ENOENT:
+            raise
+    return fingerprints
+
+  def garbage_collect(self, live_fingerprints):
+    """Removes the manifests of all snapshots not in live_fingerprints, and all unreferenced blobs.
+
+    :param live_fingerprints: The hex fingerprints of the snapshots to retain.
+    :returns: The number of blobs removed.
+    """
+    live_fingerprints = set(live_fingerprints)
+    live_blobs = set()
+    for root, _, files in os.walk(self._manifests_dir):
+      for fingerprint in files:
+        if self._is_tmp(fingerprint):
+          continue
+        manifest_path = os.path.join(root, fingerprint)
+        if fingerprint not in live_fingerprints:
+          safe_delete(manifest_path)
+          continue
+        with open(manifest_path, 'rb') as fp:
+          try:
+            entries = json.load(fp)
+          except ValueError:
+            entries = []
+        live_blobs.update(entry[2] for entry in entries if entry[0] == 'file')
+
+    removed = 0
+    for root, _, files in os.walk(self._blobs_dir):
+      for blob_key in files:
+        if blob_key not in live_blobs and not self._is_tmp(blob_key):
+          safe_delete(os.path.join(root, blob_key))
+          removed += 1
+    return removed
@@ -7,6 +7,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import cPickle as pickle
 import cStringIO as StringIO
+import errno
+import os
+import time
 from binascii import hexlify
 from collections import Counter
 from contextlib import closing
@@ -15,6 +18,7 @@ from struct import Struct as StdlibStruct
 
 from pants.engine.nodes import State
 from pants.engine.objects import SerializationError
+from pants.util.dirutil import read_file, safe_concurrent_creation, safe_file_dump, safe_mkdir
 
 
 class Key(object):
@@ -96,11 +100,15 @@ class Storage(object):
   """
 
   @classmethod
-  def create(cls, protocol=None):
+  def create(cls, protocol=None, path=None):
     """Create a content addressable Storage backed by a key value store.
 
     :param protocol: Serialization protocol for pickle, if not provided will use ASCII protocol.
+    :param path: If provided, a directory in which to persist content and key mappings across
+                 runs. See :class:`PersistentStorage`.
     """
+    if path is not None:
+      return PersistentStorage(path, protocol=protocol)
     return Storage(protocol=protocol)
 
   def __init__(self, protocol=None):
@@ -109,8 +117,8 @@ class Storage(object):
     self._key_mappings = dict()
     self._protocol = protocol if protocol is not None else pickle.HIGHEST_PROTOCOL
 
-  def put(self, obj):
-    """Serialize and hash something pickleable, returning a unique key to retrieve it later.
+  def _serialize(self, obj):
+    """Serialize something pickleable to a blob.
 
     NB: pickle by default memoizes objects by id and pickle repeated objects by references,
     for example, (A, A) uses less space than (A, A'), A and A' are equal but not identical.
@@ -122,20 +130,29 @@ class Storage(object):
         pickler = pickle.Pickler(buf, protocol=self._protocol)
         pickler.fast = 1
         pickler.dump(obj)
-        blob = buf.getvalue()
-
-        # Hash the blob and store it if it does not exist.
-        key = Key.create(blob)
-        if key not in self._objects:
-          self._objects[key] = obj
+        return buf.getvalue()
     except Exception as e:
       # Unfortunately, pickle can raise things other than PickleError instances.  For example it
       # will raise ValueError when handed a lambda; so we handle the otherwise overly-broad
       # `Exception` type here.
       raise SerializationError('Failed to pickle {}: {}'.format(obj, e), e)
 
+  def key_for(self, obj):
+    """Return the Key that `obj` would be stored under, without storing it."""
+    return Key.create(self._serialize(obj))
+
+  def put(self, obj):
+    """Serialize and hash something pickleable, returning a unique key to retrieve it later."""
+    blob = self._serialize(obj)
+    # Hash the blob and store it if it does not exist.
+    key = Key.create(blob)
+    if key not in self._objects:
+      self._store(key, obj, blob)
     return key
 
+  def _store(self, key, obj, blob):
+    self._objects[key] = obj
+
   def get(self, key):
     """Given a key, return its deserialized content.
 
@@ -175,6 +192,116 @@ class Storage(object):
     return self._key_mappings.get(from_key.digest)
 
 
+class PersistentStorage(Storage):
+  """A Storage that additionally persists content and key mappings to a directory.
+
+  Content is written to a file named for its Key digest, and mappings are written to a file named
+  for their `from_key` digest containing the digest of their `to_key`. Nothing is read eagerly:
+  entries are loaded from disk (and then memoized in memory) the first time they are requested,
+  so constructing a PersistentStorage over a large directory is cheap.
+
+  Because all entries are content addressed, a persisted entry is valid for exactly as long as the
+  inputs that were hashed to produce its Key are unchanged: callers should ensure that a request
+  Key covers the fingerprints of every input that was used to compute the mapped result.
+
+  Entries whose inputs changed are never requested again, so the modification time of an entry
+  records when it was last loaded, and `garbage_collect` removes entries that are no longer used.
+  """
+
+  _KINDS = ('objects', 'mappings')
+
+  def __init__(self, path, protocol=None):
+    """Not for direct use: construct a PersistentStorage via `Storage.create`."""
+    super(PersistentStorage, self).__init__(protocol=protocol)
+    self._path = path
+    safe_mkdir(self._path)
+
+  @property
+  def path(self):
+    return self._path
+
+  def _path_for(self, kind, key):
+    digest = hexlify(key.digest)
+    return os.path.join(self._path, kind, digest[:2], digest)
+
+  def _store(self, key, obj, blob):
+    super(PersistentStorage, self)._store(key, obj, blob)
+    path = self._path_for('objects', key)
+    if not os.path.exists(path):
+      with safe_concurrent_creation(path) as tmp_path:
+        safe_file_dump(tmp_path, blob)
+
+  def get(self, key):
+    obj = super(PersistentStorage, self).get(key)
+    if obj is None:
+      obj = self._load(key)
+    return obj
+
+  def _load(self, key):
+    path = self._path_for('objects', key)
+    if not os.path.exists(path):
+      return None
+    try:
+      obj = pickle.loads(read_file(path))
+    except Exception:
+      # The entry was truncated by a crash, or refers to a type that no longer exists: either way
+      # it is unusable, and will be recomputed and re-stored by the caller.
+      return None
+    self._objects[key] = obj
+    self._record_use(path)
+    return obj
+
+  @staticmethod
+  def _record_use(path):
+    try:
+      os.utime(path, None)
+    except OSError as e:
+      # Removed by a concurrent `garbage_collect`: the entry is already loaded.
+      if e.errno != errno.ENOENT:
+        raise
+
+  def add_mapping(self, from_key, to_key):
+    if from_key.digest in self._key_mappings:
+      return
+    super(PersistentStorage, self).add_mapping(from_key, to_key)
+    path = self._path_for('mappings', from_key)
+    if not os.path.exists(path):
+      with safe_concurrent_creation(path) as tmp_path:
+        safe_file_dump(tmp_path, to_key.digest)
+
+  def get_mapping(self, from_key):
+    to_key = super(PersistentStorage, self).get_mapping(from_key)
+    if to_key is None:
+      path = self._path_for('mappings', from_key)
+      if os.path.exists(path):
+        digest = read_file(path)
+        if len(digest) == Key._DIGEST_SIZE:
+          to_key = Key.create_from_digest(digest)
+          self._key_mappings[from_key.digest] = to_key
+          self._record_use(path)
+    return to_key
+
+  def garbage_collect(self, max_age_secs):
+    """Removes the persisted entries that have not been loaded or stored within max_age_secs.
+
+    :returns: The number of entries removed.
+    """
+    cutoff = time.time() - max_age_secs
+    removed = 0
+    for kind in self._KINDS:
+      for root, _, files in os.walk(os.path.join(self._path, kind)):
+        for name in files:
+          path = os.path.join(root, name)
+          try:
+            if os.path.getmtime(path) < cutoff:
+              os.unlink(path)
+              removed += 1
+          except OSError as e:
+            if e.errno != errno.ENOENT:
+              raise
+    return removed
+
+
 class Cache(object):
   """Cache the State resulting from a given Runnable."""
 
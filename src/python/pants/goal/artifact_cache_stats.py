@@ -25,6 +25,7 @@ class ArtifactCacheStats(object):
     def init_stat():
       return CacheStat([], [])
     self.stats_per_cache = defaultdict(init_stat)
+    self.read_stats_per_cache = {}
     self._dir = dir
     safe_mkdir(self._dir)
 
@@ -35,17 +36,34 @@ class ArtifactCacheStats(object):
   def add_misses(self, cache_name, targets, causes):
     self._add_stat(1, cache_name, targets, causes)
 
+  def add_read_stats(self, cache_name, read_stats):
+    """Accumulates the ReadStats of remote artifact reads for the given cache."""
+    previous = self.read_stats_per_cache.get(cache_name)
+    if previous:
+      read_stats = type(read_stats)(*[a + b for a, b in zip(previous, read_stats)])
+    self.read_stats_per_cache[cache_name] = read_stats
+
   def get_all(self):
     """Returns the cache stats as a list of dicts."""
     ret = []
     for cache_name, stat in self.stats_per_cache.items():
-      ret.append({
+      entry = {
         'cache_name': cache_name,
         'num_hits': len(stat.hit_targets),
         'num_misses': len(stat.miss_targets),
         'hits': stat.hit_targets,
         'misses': stat.miss_targets
-      })
+      }
+      read_stats = self.read_stats_per_cache.get(cache_name)
+      if read_stats and read_stats.requests:
+        entry.update({
+          'remote_requests': read_stats.requests,
+          'remote_bytes': read_stats.bytes,
+          'remote_mean_latency_secs': read_stats.latency_secs / read_stats.requests,
+          'remote_throughput_bytes_per_sec': (read_stats.bytes / read_stats.elapsed_secs
+                                              if read_stats.elapsed_secs else 0.0),
+        })
+      ret.append(entry)
     return ret
 
   # hit_or_miss is the appropriate index in CacheStat, i.e., 0 for hit, 1 for miss.
@@ -358,6 +358,19 @@ class RunTracker(Subsystem):
 
     return 1 if outcome in [WorkUnit.FAILURE, WorkUnit.ABORTED] else 0
 
+  def add_timing(self, name, secs):
+    """Records time spent on some part of the work of the current workunit.
+
+    The time is aggregated into the cumulative timings under `<current workunit path>:<name>`,
+    without the overhead of creating and reporting a workunit for it.
+
+    :API: public
+    """
+    parent = getattr(self._threadlocal, 'current_workunit', None)
+    label = '{}:{}'.format(parent.path(), name) if parent else name
+    with self._stats_lock:
+      self.cumulative_timings.add_timing(label, secs)
+
   def end_workunit(self, workunit):
     self.report.end_workunit(workunit)
     path, duration, self_time, is_tool = workunit.end()
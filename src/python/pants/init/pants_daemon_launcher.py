@@ -41,6 +41,10 @@ class PantsDaemonLauncher(object):
       register('--fs-event-workers', advanced=True, type=int, default=4,
                help='The number of workers to use for the filesystem event service executor pool.'
                     ' Experimental.')
+      register('--fs-event-settle-window', advanced=True, type=float, default=0.1,
+               help='The number of seconds to wait for further filesystem events after a first '
+                    'event, before invalidating all of the files they changed at once. '
+                    'Experimental.')
 
     @classmethod
     def subsystem_dependencies(cls):
@@ -63,6 +67,7 @@ class PantsDaemonLauncher(object):
                                  pailgun_port=options.pailgun_port,
                                  fs_event_enabled=options.fs_event_detection,
                                  fs_event_workers=options.fs_event_workers,
+                                 fs_event_settle_window=options.fs_event_settle_window,
                                  pants_ignore_patterns=options.pants_ignore,
                                  build_ignore_patterns=options.build_ignore,
                                  exclude_target_regexp=options.exclude_target_regexp,
@@ -78,6 +83,7 @@ class PantsDaemonLauncher(object):
                pailgun_port,
                fs_event_enabled,
                fs_event_workers,
+               fs_event_settle_window,
                pants_ignore_patterns,
                build_ignore_patterns,
                exclude_target_regexp,
@@ -93,6 +99,8 @@ class PantsDaemonLauncher(object):
     :param bool fs_event_enabled: Whether or not to enable fs event detection (Watchman) for graph
                                   invalidation.
     :param int fs_event_workers: The number of workers to use for processing the fs event queue.
+    :param float fs_event_settle_window: The number of seconds to coalesce fs events for before
+                                         invalidating the files they changed.
     :param list pants_ignore_patterns: A list of path ignore patterns for filesystem operations.
     :param list build_ignore_patterns: A list of path ignore patterns for BUILD file parsing.
     :param list exclude_target_regexp: A list of target exclude regexps.
@@ -108,6 +116,7 @@ class PantsDaemonLauncher(object):
     self._pailgun_port = pailgun_port
     self._fs_event_enabled = fs_event_enabled
     self._fs_event_workers = fs_event_workers
+    self._fs_event_settle_window = fs_event_settle_window
     self._pants_ignore_patterns = pants_ignore_patterns
     self._build_ignore_patterns = build_ignore_patterns
     self._exclude_target_regexp = exclude_target_regexp
@@ -149,7 +158,9 @@ class PantsDaemonLauncher(object):
         exclude_target_regexps=self._exclude_target_regexp,
         subproject_roots=self._subproject_roots,
       )
-      scheduler_service = SchedulerService(fs_event_service, legacy_graph_helper)
+      scheduler_service = SchedulerService(fs_event_service,
+                                           legacy_graph_helper,
+                                           settle_window=self._fs_event_settle_window)
       services.extend((fs_event_service, scheduler_service))
 
     pailgun_service = PailgunService(bind_addr=(self._pailgun_host, self._pailgun_port),
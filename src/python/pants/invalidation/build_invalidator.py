@@ -6,14 +6,17 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import errno
+import fcntl
 import hashlib
 import os
+import threading
 from collections import namedtuple
+from contextlib import contextmanager
 
 from pants.base.hash_utils import hash_all
 from pants.build_graph.target import Target
 from pants.fs.fs import safe_filename
-from pants.util.dirutil import safe_mkdir
+from pants.util.dirutil import safe_concurrent_creation, safe_mkdir
 
 
 # A CacheKey represents some version of a set of targets.
@@ -62,7 +65,7 @@ class CacheKeyGenerator(object):
     hasher.update(GLOBAL_CACHE_KEY_GEN_VERSION)
     for base_fingerprint_input in base_fingerprint_inputs:
       hasher.update(base_fingerprint_input)
-    self._base_hasher = hasher
+    self._key_suffix = hasher.hexdigest()[:12]
 
   def key_for_target(self, target, transitive=False, fingerprint_strategy=None):
     """Get a key representing the given target and its sources.
@@ -76,14 +79,13 @@ class CacheKeyGenerator(object):
       fingerprinting of a given Target.
     """
 
-    hasher = self._base_hasher.copy()
-    key_suffix = hasher.hexdigest()[:12]
     if transitive:
       target_key = target.transitive_invalidation_hash(fingerprint_strategy)
     else:
       target_key = target.invalidation_hash(fingerprint_strategy)
     if target_key is not None:
-      full_key = '{target_key}_{key_suffix}'.format(target_key=target_key, key_suffix=key_suffix)
+      full_key = '{target_key}_{key_suffix}'.format(target_key=target_key,
+                                                    key_suffix=self._key_suffix)
       return CacheKey(target.id, full_key)
     else:
       return None
@@ -93,10 +95,27 @@ class CacheKeyGenerator(object):
 # the inputs to the current version of that target set. That cache key can then be used
 # to look up build artifacts in an artifact cache.
 class BuildInvalidator(object):
-  """Invalidates build targets based on the SHA1 hash of source files and other inputs."""
+  """Invalidates build targets based on the SHA1 hash of source files and other inputs.
+
+  The valid cache key hashes are stored in a single append-only log of `id<TAB>hash` lines (where
+  an empty hash records a force-invalidation), which is read into memory on first use. Updates
+  are appended, so a crash can at most truncate the final line, which is then ignored. The log is
+  compacted when it is loaded if it has accumulated many superseded lines.
+
+  Lookups are served from memory: `refresh` folds in lines appended by concurrent processes.
+  """
+
+  _LOG_NAME = 'invalidation.log'
+
+  _LEGACY_EXTENSION = '.hash'
 
   def __init__(self, root):
     self._root = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION)
+    self._log = os.path.join(self._root, self._LOG_NAME)
+    # NB: The lock is kept outside of the root, which force_invalidate_all deletes.
+    self._log_lock_path = '{}.lock'.format(self._root)
+    self._lock = threading.RLock()
+    self._hashes = None
     safe_mkdir(self._root)
 
   def previous_key(self, cache_key):
@@ -123,38 +142,146 @@ class BuildInvalidator(object):
 
     :param cache_key: A CacheKey object (typically returned by CacheKeyGenerator.key_for()).
     """
-    self._write_sha(cache_key)
+    self._write_sha(cache_key.id, cache_key.hash)
 
   def force_invalidate_all(self):
     """Force-invalidates all cached items."""
-    safe_mkdir(self._root, clean=True)
+    with self._lock:
+      safe_mkdir(self._root, clean=True)
+      self._hashes = None
 
   def force_invalidate(self, cache_key):
     """Force-invalidate the cached item."""
-    try:
-      os.unlink(self._sha_file(cache_key))
-    except OSError as e:
-      if e.errno != errno.ENOENT:
-        raise
+    self._write_sha(cache_key.id, '')
 
-  def _sha_file(self, cache_key):
-    return self._sha_file_by_id(cache_key.id)
+  def refresh(self):
+    """Loads the log if it has not been loaded yet, or else folds in lines appended since."""
+    with self._lock:
+      if self._hashes is None or not self._fold_in_appended():
+        self._load()
 
-  def _sha_file_by_id(self, id):
-    return os.path.join(self._root, safe_filename(id, extension='.hash'))
+  @contextmanager
+  def _log_lock(self, exclusive=False):
+    """Locks the log across processes.
 
-  def _write_sha(self, cache_key):
-    with open(self._sha_file(cache_key), 'w') as fd:
-      fd.write(cache_key.hash)
+    Appends hold a shared lock, and compactions an exclusive one, so that no line appended by
+    another process can be lost by a compaction.
+    """
+    with open(self._log_lock_path, 'a') as fd:
+      fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+      try:
+        yield
+      finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
 
-  def _read_sha(self, cache_key):
-    return self._read_sha_by_id(cache_key.id)
+  def _fold_in_appended(self):
+    """Applies the lines appended to the log since it was loaded.
 
-  def _read_sha_by_id(self, id):
+    :returns: False if the log was replaced or removed by another process, and must be reloaded.
+    """
     try:
-      with open(self._sha_file_by_id(id), 'rb') as fd:
-        return fd.read().strip()
+      with open(self._log, 'rb') as fd:
+        if os.fstat(fd.fileno()).st_ino != self._log_inode:
+          return False
+        fd.seek(self._log_offset)
+        self._apply(fd.read())
+        return True
     except IOError as e:
       if e.errno != errno.ENOENT:
         raise
-      return None  # File doesn't exist.
+      return False
+
+  def _apply(self, data):
+    # Only consume complete lines: a partial last line is still being (or failed to be) written.
+    consumed = data.rfind(b'\n') + 1
+    for line in data[:consumed].decode('utf-8').splitlines():
+      fields = line.split('\t')
+      # NB: A line appended after a partially written one is joined to it, so it may have too many
+      # fields: skipping it forces an invalidation, which is always safe.
+      if len(fields) != 2:
+        continue
+      target_id, sha = fields
+      if sha:
+        self._hashes[target_id] = sha
+      else:
+        self._hashes.pop(target_id, None)
+      self._log_lines += 1
+    self._log_offset += consumed
+
+  def _load(self):
+    self._hashes = {}
+    self._log_lines = 0
+    self._log_offset = 0
+    self._log_inode = None
+    try:
+      with open(self._log, 'rb') as fd:
+        self._log_inode = os.fstat(fd.fileno()).st_ino
+        self._apply(fd.read())
+    except IOError as e:
+      if e.errno != errno.ENOENT:
+        raise
+      self._migrate_legacy_files()
+      return
+    if self._log_lines > 2 * len(self._hashes) + 1000:
+      self._compact()
+
+  def _migrate_legacy_files(self):
+    """Imports the hashes of the per-target files written by older versions, and removes them.
+
+    Legacy files whose names were shortened to a digest cannot be mapped back to a target id: those
+    targets are invalidated instead.
+    """
+    for filename in os.listdir(self._root):
+      if not filename.endswith(self._LEGACY_EXTENSION):
+        continue
+      path = os.path.join(self._root, filename)
+      target_id = filename[:-len(self._LEGACY_EXTENSION)]
+      if safe_filename(target_id, extension=self._LEGACY_EXTENSION) == filename:
+        with open(path, 'rb') as fd:
+          sha = fd.read().strip().decode('utf-8')
+        if sha:
+          self._hashes[target_id] = sha
+      os.unlink(path)
+    if self._hashes:
+      self._compact()
+
+  def _compact(self):
+    """Rewrites the log to contain one line per valid item."""
+    with self._log_lock(exclusive=True):
+      # Fold in the lines appended by other processes since the log was read. If the log was
+      # replaced by another compaction in the meantime, it is already compact.
+      if self._log_inode is not None and not self._fold_in_appended():
+        return
+      with safe_concurrent_creation(self._log) as tmp_path:
+        with open(tmp_path, 'wb') as fd:
+          for target_id, sha in self._hashes.items():
+            fd.write(self._format_line(target_id, sha))
+      with open(self._log, 'rb') as fd:
+        self._log_inode = os.fstat(fd.fileno()).st_ino
+        self._log_offset = os.fstat(fd.fileno()).st_size
+      self._log_lines = len(self._hashes)
+
+  @staticmethod
+  def _format_line(target_id, sha):
+    return '{}\t{}\n'.format(target_id, sha).encode('utf-8')
+
+  def _write_sha(self, target_id, sha):
+    with self._lock:
+      if self._hashes is None:
+        self._load()
+      # NB: Append mode uses O_APPEND, so lines appended by concurrent processes do not interleave.
+      with self._log_lock(), open(self._log, 'ab') as fd:
+        if self._log_inode is None:
+          # This append created the log: lines from the start of it are yet to be folded in.
+          self._log_inode = os.fstat(fd.fileno()).st_ino
+        fd.write(self._format_line(target_id, sha))
+      if sha:
+        self._hashes[target_id] = sha
+      else:
+        self._hashes.pop(target_id, None)
+
+  def _read_sha(self, cache_key):
+    with self._lock:
+      if self._hashes is None:
+        self._load()
+      return self._hashes.get(cache_key.id)
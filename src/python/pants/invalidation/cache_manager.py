@@ -8,6 +8,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 import shutil
 import sys
+import time
 from hashlib import sha1
 
 from pants.build_graph.build_graph import sort_targets
@@ -263,6 +264,7 @@ class InvalidationCacheManager(object):
     self._fingerprint_strategy = fingerprint_strategy
     self._artifact_write_callback = artifact_write_callback
     self.invalidation_report = invalidation_report
+    self._fingerprint_secs = 0.0
 
     # Create the task-versioned prefix of the results dir, and a stable symlink to it
     # (useful when debugging).
@@ -315,6 +317,11 @@ class InvalidationCacheManager(object):
   def task_name(self):
     return self._task_name
 
+  @property
+  def fingerprint_secs(self):
+    """The total time spent computing cache keys for targets, in seconds."""
+    return self._fingerprint_secs
+
   def results_dir_path(self, key, stable):
     """Return a results directory path for the given key.
 
@@ -344,9 +351,13 @@ class InvalidationCacheManager(object):
       else:
         sorted_targets = sorted(targets)
       for target in sorted_targets:
+        start = time.time()
         target_key = self._key_for(target)
+        self._fingerprint_secs += time.time() - start
         if target_key is not None:
           yield VersionedTarget(self, target, target_key)
+    # Pick up the results of any concurrent runs once, rather than per target.
+    self._invalidator.refresh()
     return list(vt_iter())
 
   def previous_key(self, cache_key):
@@ -44,6 +44,17 @@ class IvySubsystem(Subsystem):
              help='Location of XML configuration file for Ivy settings.')
     register('--bootstrap-ivy-settings', advanced=True,
              help='Bootstrap Ivy XML configuration file.')
+    register('--fetch-repository-url', advanced=True,
+             help='The url of a Maven layout repository, http(s) or file://, holding the artifacts '
+                  'of previous resolves. If set, re-fetching a previous resolve downloads its '
+                  'missing artifacts from this repository, with checksums verified, instead of '
+                  'running Ivy. Ivy still fetches them if any cannot be downloaded.')
+    register('--fetch-concurrency', type=int, advanced=True, default=8,
+             help='The maximum number of artifacts to download at once from the '
+                  '--fetch-repository-url.')
+    register('--fetch-timeout-secs', type=int, advanced=True, default=10,
+             help='Timeout a download from the --fetch-repository-url if the connection is idle '
+                  'for longer than this value.')
 
   @classmethod
   def subsystem_dependencies(cls):
@@ -71,6 +82,14 @@ class IvySubsystem(Subsystem):
       return os.getenv('https_proxy')
     return self.get_options().https_proxy
 
+  def proxies(self):
+    """Returns the proxy url to use for each url scheme that has one.
+
+    :rtype: dict of string to string
+    """
+    proxies = {'http': self.http_proxy(), 'https': self.https_proxy()}
+    return {scheme: proxy for scheme, proxy in proxies.items() if proxy}
+
   def extra_jvm_options(self):
     extra_options = []
     http_proxy = self.http_proxy()
@@ -12,7 +12,8 @@ import re
 import select
 import threading
 import time
-from contextlib import closing
+from collections import defaultdict
+from contextlib import closing, contextmanager
 
 from six import string_types
 from twitter.common.collections import maybe_list
@@ -22,6 +23,7 @@ from pants.java.executor import Executor, SubprocessExecutor
 from pants.java.nailgun_client import NailgunClient
 from pants.pantsd.process_manager import ProcessGroup, ProcessManager
 from pants.util.dirutil import safe_file_dump, safe_open
+from pants.util.memo import memoized_property
 
 
 logger = logging.getLogger(__name__)
@@ -57,6 +59,36 @@ class NailgunProcessGroup(ProcessGroup):
         proc.terminate()
 
 
+class NailgunPoolStats(object):
+  """Counts the runs of a nailgun executor, how many of them reused a running server, and the time
+  spent spawning servers for the others."""
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self.runs = 0
+    self.reuses = 0
+    self.spawn_secs = 0.0
+
+  def record_run(self, reused, spawn_secs=0.0):
+    with self._lock:
+      self.runs += 1
+      if reused:
+        self.reuses += 1
+      self.spawn_secs += spawn_secs
+
+  def add(self, other):
+    """Adds the counts of the other stats to these."""
+    with self._lock:
+      self.runs += other.runs
+      self.reuses += other.reuses
+      self.spawn_secs += other.spawn_secs
+
+  @property
+  def reuse_rate(self):
+    """The fraction of runs that reused a running server, or None if there have been no runs."""
+    return self.reuses / self.runs if self.runs else None
+
+
 # TODO: Once we integrate standard logging into our reporting framework, we can consider making
 # some of the log.debug() below into log.info(). Right now it just looks wrong on the console.
 class NailgunExecutor(Executor, ProcessManager):
@@ -64,6 +96,13 @@ class NailgunExecutor(Executor, ProcessManager):
 
      If a nailgun is not available for a given set of jvm args and classpath, one is launched and
      re-used for the given jvm args and classpath on subsequent runs.
+
+     Runs are spread over a pool of up to `pool_size` servers, the first of which is the server of
+     this executor itself. Each run checks out a server for its duration: preferably an unused one
+     already running with its jvm args and classpath, else an unused one that is not running, else
+     the least recently used unused one, which is restarted. When every server is in use, a run
+     shares a server running with its jvm args and classpath, or else waits for a server to be
+     checked in, so that a server is never restarted underneath the runs using it.
   """
 
   # 'NGServer 0.9.1 started on 127.0.0.1, port 53785.'
@@ -79,8 +118,21 @@ class NailgunExecutor(Executor, ProcessManager):
   _SELECT_WAIT = 1
   _PROCESS_NAME = b'java'
 
+  # The metadata key under which the time the server was last used is recorded.
+  _LAST_USED_KEY = 'last_used'
+
+  # The number of runs using each server, by server name, for all the executors in this process.
+  _CLIENTS_BY_SERVER = defaultdict(int)
+  # The number of checkouts and check-ins of each server, by server name: a change invalidates any
+  # probe of the server's state made before it.
+  _CHECKOUT_GENERATIONS = defaultdict(int)
+  # The names of servers that failed a run, and are to be terminated once no run is using them.
+  _BROKEN_SERVERS = set()
+  _CHECKOUT_CONDITION = threading.Condition()
+
   def __init__(self, identity, workdir, nailgun_classpath, distribution, ins=None,
-               connect_timeout=10, connect_attempts=5, metadata_base_dir=None):
+               connect_timeout=10, connect_attempts=5, metadata_base_dir=None, idle_timeout=None,
+               pool_size=1):
     Executor.__init__(self, distribution=distribution)
     ProcessManager.__init__(self,
                             name=identity,
@@ -98,6 +150,9 @@ class NailgunExecutor(Executor, ProcessManager):
     self._ins = ins
     self._connect_timeout = connect_timeout
     self._connect_attempts = connect_attempts
+    self._idle_timeout = idle_timeout
+    self._pool_size = max(1, pool_size)
+    self.stats = NailgunPoolStats()
 
   def __str__(self):
     return 'NailgunExecutor({identity}, dist={dist}, pid={pid} socket={socket})'.format(
@@ -114,6 +169,133 @@ class NailgunExecutor(Executor, ProcessManager):
     if self.cmdline:
       return self._parse_fingerprint(self.cmdline)
 
+  @property
+  def last_used(self):
+    """The time the nailgun server was last used by any pants run, or None if unknown."""
+    return self.read_metadata_by_name(self.name, self._LAST_USED_KEY, float)
+
+  def _mark_used(self):
+    self.write_metadata_by_name(self.name, self._LAST_USED_KEY, str(time.time()))
+
+  def is_idle(self):
+    """True if the nailgun server has been unused for longer than the idle timeout, if any."""
+    if self._idle_timeout is None:
+      return False
+    last_used = self.last_used
+    return last_used is not None and time.time() - last_used > self._idle_timeout
+
+  @memoized_property
+  def _pool(self):
+    """The servers runs are spread over: this executor's own, then those of its pool siblings."""
+    siblings = [NailgunExecutor('{}_{}'.format(self._identity, index),
+                                os.path.join(self._workdir, 'pool', str(index)),
+                                self._nailgun_classpath,
+                                self._distribution,
+                                ins=self._ins,
+                                connect_timeout=self._connect_timeout,
+                                connect_attempts=self._connect_attempts,
+                                metadata_base_dir=self._metadata_base_dir,
+                                idle_timeout=self._idle_timeout)
+                for index in range(1, self._pool_size)]
+    return [self] + siblings
+
+  def _probe_pool(self, fingerprint):
+    """Probes the servers of the pool for a run with the fingerprint.
+
+    Probing inspects processes and reads metadata, so it is done outside of the checkout lock.
+
+    :returns: A dict from server name to a tuple of whether the server is running, whether it must
+              be restarted to run with the fingerprint, and when it was last used.
+    """
+    states = {}
+    for server in self._pool:
+      running, updated = server._check_nailgun_state(fingerprint)
+      states[server.name] = running, updated, server.last_used
+    return states
+
+  def _select_server(self, states):
+    """Returns a server for a run given the probed states of the pool, and whether it is already
+    running with the run's fingerprint, or (None, False) if the run must wait for a server to be
+    checked in.
+
+    Must be called with the checkout lock held.
+    """
+    reusable = [server for server in self._pool
+                if states[server.name][0] and not states[server.name][1] and
+                server.name not in self._BROKEN_SERVERS]
+    unused = [server for server in self._pool if not self._CLIENTS_BY_SERVER[server.name]]
+    for server in unused:
+      if server in reusable:
+        return server, True
+    for server in unused:
+      if not states[server.name][0]:
+        return server, False
+    if unused:
+      # Reap the least recently used server to spawn one with the fingerprint.
+      return min(unused, key=lambda server: states[server.name][2] or 0), False
+    if reusable:
+      return min(reusable, key=lambda server: self._CLIENTS_BY_SERVER[server.name]), True
+    return None, False
+
+  @contextmanager
+  def _checkout_server(self, fingerprint):
+    """Checks out a server of the pool for a run with the fingerprint, for the duration of the
+    context.
+
+    :yields: The server, and whether it was already running with the fingerprint.
+    """
+    # Servers are probed and terminated outside of the lock, which only guards the choice of server
+    # and the bookkeeping of checkouts.
+    while True:
+      with self._CHECKOUT_CONDITION:
+        generations = {server.name: self._CHECKOUT_GENERATIONS[server.name] for server in self._pool}
+      states = self._probe_pool(fingerprint)
+      with self._CHECKOUT_CONDITION:
+        server, reused = self._select_server(states)
+        if server is None:
+          logger.debug('All {} nailgun servers of {} are in use, waiting for one to be checked in.'
+                       .format(self._pool_size, self._identity))
+          # Servers may also die while waiting, so re-check periodically.
+          self._CHECKOUT_CONDITION.wait(self._SELECT_WAIT)
+        elif generations[server.name] == self._CHECKOUT_GENERATIONS[server.name]:
+          self._check_out(server)
+          break
+        # Else the server was checked out or in since it was probed: probe again.
+    if not reused and states[server.name][0]:
+      # The server is unused, but running with another fingerprint or idle: restart it now, since
+      # once it is checked out it is no longer considered idle.
+      server.terminate()
+    try:
+      yield server, reused
+    finally:
+      with self._CHECKOUT_CONDITION:
+        # A broken server remains checked out (and so unused by other runs) until it is terminated.
+        terminate = (self._CLIENTS_BY_SERVER[server.name] == 1 and
+                     server.name in self._BROKEN_SERVERS)
+        if not terminate:
+          self._check_in(server)
+      if terminate:
+        try:
+          server.terminate()
+        finally:
+          with self._CHECKOUT_CONDITION:
+            self._BROKEN_SERVERS.discard(server.name)
+            self._check_in(server)
+
+  def _check_out(self, server):
+    self._CLIENTS_BY_SERVER[server.name] += 1
+    self._CHECKOUT_GENERATIONS[server.name] += 1
+
+  def _check_in(self, server):
+    self._CLIENTS_BY_SERVER[server.name] -= 1
+    self._CHECKOUT_GENERATIONS[server.name] += 1
+    self._CHECKOUT_CONDITION.notify_all()
+
+  def _mark_broken(self, server):
+    """Marks a checked out server to be terminated once the runs sharing it have checked it in."""
+    with self._CHECKOUT_CONDITION:
+      self._BROKEN_SERVERS.add(server.name)
+
   def _create_owner_arg(self, workdir):
     # Currently the owner is identified via the full path to the workdir.
     return '='.join((self._PANTS_OWNER_ARG_PREFIX, workdir))
@@ -151,26 +333,40 @@ class NailgunExecutor(Executor, ProcessManager):
         return list(command)
 
       def run(this, stdout=None, stderr=None, cwd=None):
-        nailgun = self._get_nailgun_client(jvm_options, classpath, stdout, stderr)
-        try:
-          logger.debug('Executing via {ng_desc}: {cmd}'.format(ng_desc=nailgun, cmd=this.cmd))
-          return nailgun.execute(main, cwd, *args)
-        except nailgun.NailgunError as e:
-          self.terminate()
-          raise self.Error('Problem launching via {ng_desc} command {main} {args}: {msg}'
-                           .format(ng_desc=nailgun, main=main, args=' '.join(args), msg=e))
+        fingerprint = self._fingerprint(jvm_options, self._nailgun_classpath + classpath,
+                                        self._distribution.version)
+        with self._checkout_server(fingerprint) as (server, reused):
+          start = time.time()
+          nailgun = server._get_nailgun_client(jvm_options, classpath, stdout, stderr)
+          self.stats.record_run(reused, spawn_secs=0.0 if reused else time.time() - start)
+          server._mark_used()
+          try:
+            logger.debug('Executing via {ng_desc}: {cmd}'.format(ng_desc=nailgun, cmd=this.cmd))
+            return nailgun.execute(main, cwd, *args)
+          except nailgun.NailgunError as e:
+            self._mark_broken(server)
+            raise self.Error('Problem launching via {ng_desc} command {main} {args}: {msg}'
+                             .format(ng_desc=nailgun, main=main, args=' '.join(args), msg=e))
+          finally:
+            server._mark_used()
 
     return Runner()
 
   def _check_nailgun_state(self, new_fingerprint):
     running = self.is_alive()
+    # NB: A server that has been idle for longer than the idle timeout is restarted, rather than
+    # reused, so that the heap growth and resident caches of a long-lived server are bounded. A
+    # server checked out by a run is in use, however long ago that run last marked it used.
     updated = running and (self.fingerprint != new_fingerprint or
-                           self.cmd != self._distribution.java)
+                           self.cmd != self._distribution.java or
+                           (self.is_idle() and not self._CLIENTS_BY_SERVER[self.name]))
     logging.debug('Nailgun {nailgun} state: updated={up!s} running={run!s} fingerprint={old_fp} '
-                  'new_fingerprint={new_fp} distribution={old_dist} new_distribution={new_dist}'
+                  'new_fingerprint={new_fp} distribution={old_dist} new_distribution={new_dist} '
+                  'last_used={last_used}'
                   .format(nailgun=self._identity, up=updated, run=running,
                           old_fp=self.fingerprint, new_fp=new_fingerprint,
-                          old_dist=self.cmd, new_dist=self._distribution.java))
+                          old_dist=self.cmd, new_dist=self._distribution.java,
+                          last_used=self.last_used))
     return running, updated
 
   def _get_nailgun_client(self, jvm_options, classpath, stdout, stderr):
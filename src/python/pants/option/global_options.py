@@ -177,6 +177,10 @@ class GlobalOptionsRegistrar(Optionable):
              help='Paths to ignore when identifying BUILD files. '
                   'This does not affect any other filesystem operations. '
                   'Patterns use the gitignore pattern syntax (https://git-scm.com/docs/gitignore).')
+    register('--build-file-cache', advanced=True, type=bool, default=False,
+             help='Persist parsed BUILD files in the pants workdir between runs, keyed by their '
+                  'content, so that runs without pantsd do not re-parse unchanged BUILD files. '
+                  'This currently only affects the v2 engine. (Beta)')
     register('--pants-ignore', advanced=True, type=list, fromfile=True, default=['.*', rel_distdir],
              help='Paths to ignore for all filesystem operations performed by pants '
                   '(e.g. BUILD file scanning, glob matching, etc). '
@@ -7,6 +7,9 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import logging
 import Queue
+import time
+
+from twitter.common.collections import OrderedSet
 
 from pants.pantsd.service.pants_service import PantsService
 
@@ -19,12 +22,15 @@ class SchedulerService(PantsService):
   in memory.
   """
 
-  def __init__(self, fs_event_service, legacy_graph_helper):
+  def __init__(self, fs_event_service, legacy_graph_helper, settle_window=0.1):
     """
     :param FSEventService fs_event_service: An unstarted FSEventService instance for setting up
                                             filesystem event handlers.
     :param LegacyGraphHelper legacy_graph_helper: The LegacyGraphHelper instance for graph
                                                   construction.
+    :param float settle_window: The number of seconds to wait for further filesystem events after
+                                a first event is received, before invalidating all files changed
+                                by the batch of events at once.
     """
     super(SchedulerService, self).__init__()
     self._fs_event_service = fs_event_service
@@ -33,13 +39,22 @@ class SchedulerService(PantsService):
     self._engine = legacy_graph_helper.engine
 
     self._logger = logging.getLogger(__name__)
-    self._event_queue = Queue.Queue(maxsize=64)
+    # NB: The queue is unbounded so that a storm of events (e.g. from a `git checkout`) never blocks
+    # the watchman reader: events are coalesced into batches as they are consumed.
+    self._event_queue = Queue.Queue()
+    self._settle_window = settle_window
+    self._stats = dict(batches=0, events=0, files=0, invalidated_nodes=0)
 
   @property
   def locked(self):
     """Surfaces the scheduler's `locked` method as part of the service's public API."""
     return self._scheduler.locked
 
+  @property
+  def stats(self):
+    """Returns cumulative counts of processed event batches, events, files and invalidated nodes."""
+    return dict(self._stats)
+
   @property
   def change_calculator(self):
     """Surfaces the change calculator."""
@@ -64,31 +79,66 @@ class SchedulerService(PantsService):
     self._logger.debug('handling change event for: %s', files)
     if not self._scheduler:
       self._logger.debug('no scheduler. ignoring event.')
-      return
+      return 0
 
-    self._scheduler.invalidate_files(files)
+    if self.change_calculator:
+      self.change_calculator.invalidate_files(files)
+    return self._scheduler.invalidate_files(files)
 
-  def _process_event_queue(self):
-    """File event notification queue processor."""
+  def _drain_event_queue(self):
+    """Returns all events received until the settle window after the first event elapses."""
     try:
-      event = self._event_queue.get(timeout=1)
+      events = [self._event_queue.get(timeout=1)]
     except Queue.Empty:
-      return
+      return []
+
+    deadline = time.time() + self._settle_window
+    while True:
+      try:
+        remaining = deadline - time.time()
+        if remaining > 0:
+          events.append(self._event_queue.get(timeout=remaining))
+        else:
+          events.append(self._event_queue.get_nowait())
+      except Queue.Empty:
+        return events
 
-    try:
-      subscription, is_initial_event, files = (event['subscription'],
-                                               event['is_fresh_instance'],
-                                               [f.decode('utf-8') for f in event['files']])
-    except (KeyError, UnicodeDecodeError) as e:
-      self._logger.warn('%r raised by invalid watchman event: %s', e, event)
-      return
+  def _process_event_queue(self):
+    """File event notification queue processor.
 
-    self._logger.debug('processing {} files for subscription {} (first_event={})'
-                       .format(len(files), subscription, is_initial_event))
+    Coalesces all events received within the settle window into a single invalidation of the
+    deduplicated set of changed files.
+    """
+    events = self._drain_event_queue()
+    if not events:
+      return
 
-    if not is_initial_event:  # Ignore the initial all files event from watchman.
-      self._handle_batch_event(files)
-    self._event_queue.task_done()
+    files = OrderedSet()
+    for event in events:
+      try:
+        subscription, is_initial_event, event_files = (event['subscription'],
+                                                       event['is_fresh_instance'],
+                                                       [f.decode('utf-8') for f in event['files']])
+      except (KeyError, UnicodeDecodeError) as e:
+        self._logger.warn('%r raised by invalid watchman event: %s', e, event)
+        continue
+
+      self._logger.debug('processing {} files for subscription {} (first_event={})'
+                         .format(len(event_files), subscription, is_initial_event))
+
+      if not is_initial_event:  # Ignore the initial all files event from watchman.
+        files.update(event_files)
+
+    invalidated = self._handle_batch_event(tuple(files)) if files else 0
+    self._logger.debug('invalidated {} nodes for {} files from a batch of {} events'
+                       .format(invalidated, len(files), len(events)))
+    self._stats['batches'] += 1
+    self._stats['events'] += len(events)
+    self._stats['files'] += len(files)
+    self._stats['invalidated_nodes'] += invalidated
+
+    for _ in events:
+      self._event_queue.task_done()
 
   def warm_product_graph(self, spec_roots):
     """Runs an execution request against the captive scheduler given a set of input specs to warm.
@@ -227,8 +227,7 @@ class PlainTextReporter(PlainTextReporterBase):
   def _format_artifact_cache_stats(self, artifact_cache_stats):
     stats = artifact_cache_stats.get_all()
     return b'No artifact cache reads.' if not stats else \
-    b'\n'.join([b'{cache_name} - Hits: {num_hits} Misses: {num_misses}'.format(**x)
-                for x in stats])
+    b'\n'.join([self._format_artifact_cache_stat(x) for x in stats])
 
   def _indent(self, workunit):
     return b'  ' * (len(workunit.ancestors()) - 1)
@@ -31,4 +31,11 @@ class PlainTextReporterBase(Reporter):
   def _format_artifact_cache_stats(self, artifact_cache_stats):
     stats = artifact_cache_stats.get_all()
     return b'No artifact cache reads.' if not stats else b'\n'.join(
-      [b'{cache_name} - Hits: {num_hits} Misses: {num_misses}'.format(**x) for x in stats])
+      [self._format_artifact_cache_stat(x) for x in stats])
+
+  def _format_artifact_cache_stat(self, stat):
+    ret = b'{cache_name} - Hits: {num_hits} Misses: {num_misses}'.format(**stat)
+    if 'remote_requests' in stat:
+      ret += (b' Remote requests: {remote_requests} Mean latency: {remote_mean_latency_secs:.3f}s '
+              b'Throughput: {remote_throughput_bytes_per_sec:.0f} bytes/s'.format(**stat))
+    return ret
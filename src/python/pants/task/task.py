@@ -340,6 +340,10 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
                                              artifact_write_callback=self.maybe_write_artifact)
 
     invalidation_check = cache_manager.check(targets, topological_order=topological_order)
+    self.context.run_tracker.add_timing('fingerprint', cache_manager.fingerprint_secs)
+    self.context.log.debug('Fingerprinted {} targets in {:.3f}s.'
+                           .format(len(invalidation_check.all_vts),
+                                   cache_manager.fingerprint_secs))
 
     self._maybe_create_results_dirs(invalidation_check.all_vts)
 
@@ -463,9 +467,17 @@ class TaskBase(SubsystemClientMixin, Optionable, AbstractClass):
       return [], [], []
 
     read_cache = self._cache_factory.get_read_cache()
-    items = [(read_cache, vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
-             for vt in vts]
-    res = self.context.subproc_map(call_use_cached_files, items)
+    if read_cache.batches_reads:
+      res = read_cache.use_cached_files_batch(
+        [(vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None) for vt in vts])
+      read_stats = read_cache.pop_read_stats()
+      if read_stats:
+        self.context.run_tracker.artifact_cache_stats.add_read_stats(type(self).__name__,
+                                                                     read_stats)
+    else:
+      items = [(read_cache, vt.cache_key, vt.current_results_dir if self.cache_target_dirs else None)
+               for vt in vts]
+      res = self.context.subproc_map(call_use_cached_files, items)
 
     cached_vts = []
     uncached_vts = []
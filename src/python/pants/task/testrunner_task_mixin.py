@@ -5,11 +5,16 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
 from abc import abstractmethod
+from collections import defaultdict
 from threading import Timer
 
 from pants.base.exceptions import ErrorWhileTesting
+from pants.util.durations import DurationHistory
+from pants.util.memo import memoized_property
 from pants.util.timeout import Timeout, TimeoutReached
+from pants.util.xml_parser import XmlParser
 
 
 class TestRunnerTaskMixin(object):
@@ -19,6 +24,9 @@ class TestRunnerTaskMixin(object):
   expressed can support both languages, and any additional languages that are added to pants.
   """
 
+  # The name of the file that test durations are recorded in under the workdir, by default.
+  _TEST_DURATIONS_FILE = 'test_durations.json'
+
   @classmethod
   def register_options(cls, register):
     super(TestRunnerTaskMixin, cls).register_options(register)
@@ -40,6 +48,13 @@ class TestRunnerTaskMixin(object):
     register('--timeout-terminate-wait', type=int, advanced=True, default=10,
              help='If a test does not terminate on a SIGTERM, how long to wait (in seconds) before '
                   'sending a SIGKILL.')
+    register('--test-durations-file', advanced=True, metavar='<FILE>',
+             help='Record the durations of tests in this file, and balance --test-shard shards by '
+                  'them, so that shards take similar amounts of time. All the shards of a test run '
+                  'must use the same copy of this file, or some tests may run in several shards or '
+                  'in none: while --test-shard is set, this file is only read, and durations are '
+                  'recorded under the workdir instead. If unset, durations are recorded under the '
+                  'workdir, and only used to balance batches of tests within a run.')
 
   def execute(self):
     """Run the task."""
@@ -63,6 +78,61 @@ class TestRunnerTaskMixin(object):
       all_targets = self._get_targets()
       self._execute(all_targets)
 
+  @memoized_property
+  def _test_durations(self):
+    """The durations of tests recorded by previous runs of this task.
+
+    :rtype: :class:`pants.util.durations.DurationHistory`
+    """
+    durations = DurationHistory(self.get_options().test_durations_file or
+                                os.path.join(self.workdir, self._TEST_DURATIONS_FILE))
+    durations.load()
+    return durations
+
+  @property
+  def _balance_shards_by_duration(self):
+    """True if --test-shard shards should be balanced by recorded test durations."""
+    return self.get_options().test_durations_file is not None
+
+  @memoized_property
+  def _recorded_test_durations(self):
+    """The history that the durations of tests run by this task are recorded to.
+
+    While running a --test-shard, the --test-durations-file determines which tests each shard runs,
+    so it must not change until all shards have run: durations are recorded under the workdir
+    instead.
+
+    :rtype: :class:`pants.util.durations.DurationHistory`
+    """
+    if self._balance_shards_by_duration and self.get_options().get('test_shard'):
+      durations = DurationHistory(os.path.join(self.workdir, self._TEST_DURATIONS_FILE))
+      durations.load()
+      return durations
+    return self._test_durations
+
+  def _record_test_durations(self, junit_xml_paths, key=None):
+    """Records the total durations of the tests in the given junit xml reports.
+
+    :param junit_xml_paths: The paths of junit xml reports.
+    :param key: A function from a testcase element to the key to record its duration under, or to
+                None to not record it. Defaults to the testcase's classname.
+    """
+    key = key or (lambda testcase: testcase.getAttribute('classname'))
+    durations = defaultdict(float)
+    for path in junit_xml_paths:
+      try:
+        xml = XmlParser.from_file(path)
+        for testcase in xml.parsed.getElementsByTagName('testcase'):
+          testcase_key = key(testcase)
+          if testcase_key:
+            durations[testcase_key] += float(testcase.getAttribute('time') or 0)
+      except (XmlParser.XmlError, ValueError) as e:
+        self.context.log.debug('Not recording test durations from {}: {}'.format(path, e))
+    if durations:
+      for testcase_key, secs in durations.items():
+        self._recorded_test_durations.record(testcase_key, secs)
+      self._recorded_test_durations.save()
+
   def _get_test_targets_for_spawn(self):
     """Invoked by _spawn_and_wait to know targets being executed. Defaults to _get_test_targets().
 
@@ -0,0 +1,116 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import heapq
+import json
+import logging
+import threading
+
+from pants.util.dirutil import safe_concurrent_creation
+
+
+logger = logging.getLogger(__name__)
+
+
+class DurationHistory(object):
+  """A persistent record of how long units of work (compiles, tests, ...) took in previous runs.
+
+  Durations are smoothed across runs with an exponentially weighted moving average, so that one
+  unusually slow or fast run does not dominate the prediction.
+  """
+
+  VERSION = 1
+
+  # The weight of the latest observation in the moving average.
+  _SMOOTHING = 0.5
+
+  def __init__(self, path):
+    """
+    :param string path: The file to persist durations to.
+    """
+    self._path = path
+    self._lock = threading.Lock()
+    # Key -> smoothed duration in seconds.
+    self._durations = {}
+
+  @property
+  def path(self):
+    return self._path
+
+  def load(self):
+    """Loads the persisted durations, if any."""
+    try:
+      with open(self._path, 'rb') as fp:
+        data = json.load(fp)
+    except (IOError, OSError, ValueError) as e:
+      logger.debug('not loading durations from {}: {!r}'.format(self._path, e))
+      return
+    if data.get('version') == self.VERSION:
+      with self._lock:
+        self._durations = data['durations']
+
+  def save(self):
+    with self._lock:
+      durations = dict(self._durations)
+    with safe_concurrent_creation(self._path) as tmp_path:
+      with open(tmp_path, 'wb') as fp:
+        json.dump(dict(version=self.VERSION, durations=durations), fp)
+
+  def get(self, key):
+    """Returns the predicted duration in seconds of the given key, or None if unknown."""
+    return self._durations.get(key)
+
+  def record(self, key, secs):
+    """Records an observed duration in seconds for the given key."""
+    with self._lock:
+      previous = self._durations.get(key)
+      if previous is None:
+        self._durations[key] = secs
+      else:
+        self._durations[key] = self._SMOOTHING * secs + (1 - self._SMOOTHING) * previous
+
+  def predict(self, keys):
+    """Returns a dict from each of the given keys to its predicted duration.
+
+    Keys without a recorded duration are predicted to take the mean duration of those with one, or
+    one second if none have one.
+    """
+    known = {key: self.get(key) for key in keys}
+    known = {key: secs for key, secs in known.items() if secs is not None}
+    default = sum(known.values()) / len(known) if known else 1.0
+    return {key: known.get(key, default) for key in keys}
+
+
+def balance_by_duration(items, num_partitions, durations, max_partition_size=None):
+  """Partitions items so that the partitions have similar total durations.
+
+  Uses the longest-processing-time-first heuristic: items are assigned in order of decreasing
+  duration to the partition with the least total duration so far. Ties are broken by the order of
+  the given items, so the result is deterministic for a given input.
+
+  :param list items: The items to partition.
+  :param int num_partitions: The number of partitions.
+  :param dict durations: A dict from each item to its (predicted) duration.
+  :param int max_partition_size: If set, the maximum number of items in a partition. Must be large
+                                 enough for the items to fit into num_partitions partitions.
+  :returns: A list of num_partitions lists of items, each in the order they were given in. Some may
+            be empty.
+  """
+  if max_partition_size is not None and max_partition_size * num_partitions < len(items):
+    raise ValueError('{} items do not fit in {} partitions of at most {}.'
+                     .format(len(items), num_partitions, max_partition_size))
+
+  order = {item: i for i, item in enumerate(items)}
+  partitions = [[] for _ in range(num_partitions)]
+  # A heap of (total duration, partition index) for the partitions that have room.
+  loads = [(0.0, i) for i in range(num_partitions)]
+  for item in sorted(items, key=lambda item: (-durations[item], order[item])):
+    load, i = heapq.heappop(loads)
+    partitions[i].append(item)
+    if max_partition_size is None or len(partitions[i]) < max_partition_size:
+      heapq.heappush(loads, (load + durations[item], i))
+  return [sorted(partition, key=order.get) for partition in partitions]
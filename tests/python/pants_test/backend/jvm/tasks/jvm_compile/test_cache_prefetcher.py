@@ -0,0 +1,85 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import threading
+import unittest
+
+import mock
+
+from pants.backend.jvm.tasks.jvm_compile.cache_prefetcher import CachePrefetcher
+from pants.goal.context import Context
+from pants.goal.run_tracker import RunTracker
+from pants.reporting.report import Report
+from pants_test.base_test import BaseTest
+from pants_test.subsystem.subsystem_util import global_subsystem_instance
+
+
+class CachePrefetcherTest(unittest.TestCase):
+
+  def test_results_are_fetched_once(self):
+    fetched = []
+    lock = threading.Lock()
+
+    def fetch(item):
+      with lock:
+        fetched.append(item)
+      return item * 2
+
+    prefetcher = CachePrefetcher(fetch, num_workers=2)
+    prefetcher.start(range(10))
+    results = [prefetcher.result(item)[0] for item in range(10)]
+    prefetcher.stop()
+    self.assertEqual([item * 2 for item in range(10)], results)
+    self.assertEqual(sorted(fetched), range(10))
+
+  def test_unstarted_item_is_fetched_by_consumer(self):
+    release = threading.Event()
+
+    def fetch(item):
+      if item == 'blocked':
+        release.wait()
+      return item
+
+    prefetcher = CachePrefetcher(fetch, num_workers=1)
+    prefetcher.start(['blocked', 'queued'])
+    # The only worker is blocked, so the consumer fetches the queued item itself.
+    self.assertEqual('queued', prefetcher.result('queued')[0])
+    release.set()
+    self.assertEqual('blocked', prefetcher.result('blocked')[0])
+    prefetcher.stop()
+
+  def test_fetch_errors_are_raised_to_consumer(self):
+    def fetch(item):
+      raise ValueError(item)
+
+    prefetcher = CachePrefetcher(fetch, num_workers=1)
+    prefetcher.start(['a'])
+    with self.assertRaises(ValueError):
+      prefetcher.result('a')
+    prefetcher.stop()
+
+
+class CachePrefetcherRunTrackerTest(BaseTest):
+
+  def test_fetches_may_log(self):
+    run_tracker = global_subsystem_instance(RunTracker)
+    run_tracker.report = mock.Mock()
+    parent_workunit = mock.Mock()
+    log = Context.Log(run_tracker)
+
+    def fetch(item):
+      log.debug('fetching {}'.format(item))
+      return item
+
+    prefetcher = CachePrefetcher(fetch, num_workers=2, run_tracker=run_tracker,
+                                 parent_workunit=parent_workunit)
+    prefetcher.start(['a', 'b'])
+    prefetcher.stop()
+    self.assertEqual(['a', 'b'], [prefetcher.result(item)[0] for item in ['a', 'b']])
+    self.assertEqual(sorted([mock.call(parent_workunit, Report.DEBUG, 'fetching a'),
+                             mock.call(parent_workunit, Report.DEBUG, 'fetching b')]),
+                     sorted(run_tracker.report.log.call_args_list))
@@ -0,0 +1,56 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.backend.jvm.tasks.jvm_compile.compile_durations import CompileDurations
+from pants.util.contextutil import temporary_dir
+
+
+class CompileDurationsTest(unittest.TestCase):
+
+  def test_record_is_smoothed_and_persisted(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = CompileDurations(path)
+      self.assertIsNone(durations.get('a'))
+      durations.record('a', 10.0)
+      durations.record('a', 20.0)
+      self.assertEqual(15.0, durations.get('a'))
+      durations.save()
+
+      loaded = CompileDurations(path)
+      loaded.load()
+      self.assertEqual(15.0, loaded.get('a'))
+
+  def test_load_missing_or_corrupt(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = CompileDurations(path)
+      durations.load()
+      with open(path, 'wb') as fp:
+        fp.write(b'not json')
+      durations.load()
+      self.assertIsNone(durations.get('a'))
+
+  def test_estimate_sizes_without_history(self):
+    durations = CompileDurations('unused')
+    self.assertEqual(({'a': 100, 'b': 50}, False), durations.estimate_sizes({'a': 100, 'b': 50}))
+
+  def test_estimate_sizes_scales_estimates(self):
+    durations = CompileDurations('unused')
+    durations.record('a', 4.0)
+    # 'a' took 4 seconds for 100 units, so 'b' is predicted to take 2 seconds for 50 units.
+    self.assertEqual(({'a': 4.0, 'b': 2.0}, True), durations.estimate_sizes({'a': 100, 'b': 50}))
+
+  def test_estimate_sizes_without_estimates(self):
+    durations = CompileDurations('unused')
+    durations.record('a', 4.0)
+    durations.record('b', 2.0)
+    self.assertEqual(({'a': 4.0, 'b': 2.0, 'c': 3.0}, True),
+                     durations.estimate_sizes({'a': 0, 'b': 0, 'c': 0}))
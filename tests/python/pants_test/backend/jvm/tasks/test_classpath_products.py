@@ -369,6 +369,50 @@ class ClasspathProductsTest(BaseTest):
                                             resolved_jar.cache_path)
     self.assertEqual([('fred-conf', expected_entry)], classpath_target_tuples)
 
+  def test_get_classpath_entries_for_targets_invalidated_by_changes(self):
+    b = self.make_target('b', JvmTarget, excludes=[Exclude('com.example', 'lib')])
+    a = self.make_target('a', JvmTarget, dependencies=[b])
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    resolved_jar = self.add_jar_classpath_element_for_path(classpath_product, a,
+                                                           self._example_jar_path())
+    a_closure = a.closure(bfs=True)
+    self.assertEqual([('default', resolved_jar.pants_path)],
+                     classpath_product.get_for_targets(a_closure))
+
+    classpath_product.add_for_target(b, [('default', self.path('b/path'))])
+    self.assertEqual([('default', resolved_jar.pants_path), ('default', self.path('b/path'))],
+                     classpath_product.get_for_targets(a_closure))
+
+    self.add_excludes_for_targets(classpath_product, b)
+    self.assertEqual([('default', self.path('b/path'))],
+                     classpath_product.get_for_targets(a_closure))
+
+    classpath_product.remove_for_target(b, [('default', self.path('b/path'))])
+    self.assertEqual([], classpath_product.get_for_targets(a_closure))
+
+  def test_get_classpath_entries_for_targets_returns_copies(self):
+    a = self.make_target('a', JvmTarget)
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    classpath_product.add_for_target(a, [('default', self.path('a/path'))])
+
+    classpath_product.get_classpath_entries_for_targets([a]).append('mutated')
+    classpath_product.get_product_target_mappings_for_targets([a]).append('mutated')
+    self.assertEqual([('default', ClasspathEntry(self.path('a/path')))],
+                     classpath_product.get_classpath_entries_for_targets([a]))
+    self.assertEqual([(('default', ClasspathEntry(self.path('a/path'))), a)],
+                     classpath_product.get_product_target_mappings_for_targets([a]))
+
+  def test_classpath_entries_interned(self):
+    b = self.make_target('b', JvmTarget)
+    a = self.make_target('a', JvmTarget)
+    classpath_product = ClasspathProducts(self.pants_workdir)
+    classpath_product.add_for_target(a, [('default', self.path('shared/path'))])
+    classpath_product.add_for_target(b, [('default', self.path('shared/path'))])
+
+    (a_entry,) = classpath_product.get_classpath_entries_for_targets([a])
+    (b_entry,) = classpath_product.get_classpath_entries_for_targets([b])
+    self.assertIs(a_entry, b_entry)
+
   def test_get_artifact_classpath_entries_for_targets(self):
     b = self.make_target('b', JvmTarget, excludes=[Exclude('com.example', 'lib')])
     a = self.make_target('a', JvmTarget, dependencies=[b])
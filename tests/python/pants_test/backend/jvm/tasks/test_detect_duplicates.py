@@ -190,6 +190,37 @@ class DuplicateDetectorTest(JvmTaskTestBase):
     conflicts_by_binary = task.execute()
     self.assertEqual({}, conflicts_by_binary)
 
+  def test_duplicate_found_multiple_binaries(self):
+    self.set_options(fail_fast=False)
+
+    conflicting_binary = self.make_target(spec='src/java/com/twitter:conflicting',
+                                          target_type=JvmBinary,
+                                          dependencies=[self.test_jarlib, self.dups_jarlib])
+    # Unique.class is in both dups.jar and no_dups.jar, but only no_dups.jar is on this classpath.
+    clean_binary = self.make_target(spec='src/java/com/twitter:clean',
+                                    target_type=JvmBinary,
+                                    dependencies=[self.test_jarlib, self.no_dups_jarlib])
+    context = self.context(target_roots=[conflicting_binary, clean_binary])
+    task = self.create_task(context)
+
+    classpath = self.get_runtime_classpath(context)
+    classpath.add_jars_for_targets([self.test_jarlib], 'default', [self.test_resolved_jar])
+    classpath.add_jars_for_targets([self.dups_jarlib], 'default', [self.dups_resolved_jar])
+    classpath.add_jars_for_targets([self.no_dups_jarlib], 'default', [self.no_dups_resolved_jar])
+
+    conflicts_by_binary = task.execute()
+
+    expected = {
+      conflicting_binary: {
+        ('org.example-dups-0.0.1.jar', 'org.example-test-0.0.1.jar'):
+          {'com/twitter/commons/Duplicate.class'}
+      }
+    }
+    self.assertEqual(expected, conflicts_by_binary)
+    self.assertEqual(conflicts_by_binary[conflicting_binary],
+                     task.detect_duplicates_for_target(conflicting_binary))
+    self.assertEqual({}, task.detect_duplicates_for_target(clean_binary))
+
   def test_fail_fast_error_raised(self):
     self.set_options(fail_fast=True)
 
@@ -5,17 +5,21 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import hashlib
 import json
 import os
+import shutil
 import xml.etree.ElementTree as ET
 from collections import namedtuple
 from textwrap import dedent
 
+import mock
 from twitter.common.collections import OrderedSet
 
 from pants.backend.jvm.ivy_utils import (FrozenResolution, IvyFetchStep, IvyInfo, IvyModule,
                                          IvyModuleRef, IvyResolveMappingError, IvyResolveResult,
                                          IvyResolveStep, IvyUtils)
+from pants.backend.jvm.maven_artifact_fetcher import MavenArtifactFetcher
 from pants.backend.jvm.register import build_file_aliases as register_jvm
 from pants.backend.jvm.subsystems.jar_dependency_management import JarDependencyManagement
 from pants.backend.jvm.targets.jar_library import JarLibrary
@@ -24,8 +28,9 @@ from pants.build_graph.register import build_file_aliases as register_core
 from pants.ivy.ivy_subsystem import IvySubsystem
 from pants.java.jar.exclude import Exclude
 from pants.java.jar.jar_dependency import JarDependency
-from pants.java.jar.jar_dependency_utils import M2Coordinate
+from pants.java.jar.jar_dependency_utils import M2Coordinate, ResolvedJar
 from pants.util.contextutil import temporary_dir, temporary_file, temporary_file_path
+from pants.util.dirutil import safe_file_dump
 from pants_test.base_test import BaseTest
 from pants_test.subsystem.subsystem_util import init_subsystem
 
@@ -530,6 +535,41 @@ class IvyUtilsGenerateIvyTest(IvyUtilsTestBase):
                                        ext=u'jar'),))},
       result)
 
+  def test_parse_xml_report_cached(self):
+    report = os.path.join('tests/python/pants_test/backend/jvm/tasks',
+                          'ivy_utils_resources/report_with_diamond.xml')
+    with temporary_dir() as temp_dir:
+      report_path = os.path.join(temp_dir, 'report.xml')
+      shutil.copy(report, report_path)
+      cache_path = IvyUtils.parsed_report_path(report_path)
+
+      parsed = IvyUtils.parse_xml_report('default', report_path, cache_path=cache_path)
+      self.assertTrue(os.path.isfile(cache_path))
+
+      with mock.patch.object(IvyUtils, '_parse_xml_report_modules') as parse:
+        cached = IvyUtils.parse_xml_report('default', report_path, cache_path=cache_path)
+        self.assertFalse(parse.called)
+      self.assertEqual(parsed.modules_by_ref, cached.modules_by_ref)
+      self.assertEqual(parsed._deps_by_caller, cached._deps_by_caller)
+      self.assertEqual(parsed._artifacts_by_ref, cached._artifacts_by_ref)
+
+      # A changed report is parsed again.
+      with open(report_path, 'a') as fp:
+        fp.write('\n')
+      with mock.patch.object(IvyUtils, '_parse_xml_report_modules', return_value=[]) as parse:
+        IvyUtils.parse_xml_report('default', report_path, cache_path=cache_path)
+        self.assertTrue(parse.called)
+
+  def test_ivy_info_parsed_once_per_conf(self):
+    report_path = os.path.join('tests/python/pants_test/backend/jvm/tasks',
+                               'ivy_utils_resources/report_with_diamond.xml')
+    result = IvyResolveResult([], {}, 'some-hash', {'default': report_path})
+    ivy_info = result._ivy_info_for('default')
+    with mock.patch.object(IvyUtils, 'parse_xml_report') as parse:
+      self.assertIs(ivy_info, result._ivy_info_for('default'))
+      self.assertFalse(parse.called)
+    self.assertFalse(os.path.exists(IvyUtils.parsed_report_path(report_path)))
+
   def test_fetch_ivy_xml_requests_url_for_dependency_containing_url(self):
     with temporary_dir() as temp_dir:
       ivyxml = os.path.join(temp_dir, 'ivy.xml')
@@ -617,6 +657,76 @@ class IvyUtilsResolveStepsTest(BaseTest):
     with self.assertRaises(IvyResolveMappingError):
       fetch.exec_and_load(None, None, [], None, None, None)
 
+  def _fetch_step_with_artifact_fetcher(self, repository, ivy_cache_dir, global_ivy_workdir):
+    fetcher = MavenArtifactFetcher('file://{}'.format(repository), ivy_cache_dir)
+    return IvyFetchStep(['default'],
+                        'hash_name',
+                        None,
+                        False,
+                        ivy_cache_dir,
+                        global_ivy_workdir,
+                        artifact_fetcher=fetcher)
+
+  def _freeze_resolution(self, fetch, target, coordinate, cache_path=None):
+    frozen_resolution = FrozenResolution()
+    frozen_resolution.add_resolved_jars(target, [ResolvedJar(coordinate, cache_path=cache_path)])
+    FrozenResolution.dump_to_file(fetch.frozen_resolve_file, {'default': frozen_resolution})
+
+  def test_fetch_without_ivy(self):
+    coordinate = M2Coordinate('org1', 'name1', '1.0')
+    target = self.make_target('t', JarLibrary, jars=[JarDependency('org1', 'name1', '1.0')])
+    with temporary_dir() as repository, temporary_dir() as ivy_cache_dir, \
+         temporary_dir() as global_ivy_workdir:
+      jar_path = os.path.join(repository, 'org1', 'name1', '1.0', 'name1-1.0.jar')
+      safe_file_dump(jar_path, 'jar')
+      safe_file_dump('{}.sha1'.format(jar_path), hashlib.sha1('jar').hexdigest())
+      fetch = self._fetch_step_with_artifact_fetcher(repository, ivy_cache_dir, global_ivy_workdir)
+      self._freeze_resolution(fetch, target, coordinate)
+
+      with mock.patch.object(fetch, '_do_fetch') as do_fetch:
+        result = fetch.exec_and_load(None, None, [target], None, None, None)
+      self.assertFalse(do_fetch.called)
+      self.assertTrue(fetch.required_load_files_exist())
+
+      resolved_jars = dict(result.resolved_jars_for_each_target('default', [target]))[target]
+      self.assertEqual([coordinate], [resolved_jar.coordinate for resolved_jar in resolved_jars])
+      self.assertEqual(os.path.join(ivy_cache_dir, 'org1', 'name1', 'jars', 'name1-1.0.jar'),
+                       resolved_jars[0].cache_path)
+
+  def test_fetch_without_ivy_by_resolved_type(self):
+    coordinate = M2Coordinate('org1', 'name1', '1.0')
+    target = self.make_target('t', JarLibrary, jars=[JarDependency('org1', 'name1', '1.0')])
+    with temporary_dir() as repository, temporary_dir() as ivy_cache_dir, \
+         temporary_dir() as global_ivy_workdir:
+      jar_path = os.path.join(repository, 'org1', 'name1', '1.0', 'name1-1.0.jar')
+      safe_file_dump(jar_path, 'jar')
+      safe_file_dump('{}.sha1'.format(jar_path), hashlib.sha1('jar').hexdigest())
+      fetch = self._fetch_step_with_artifact_fetcher(repository, ivy_cache_dir, global_ivy_workdir)
+      # The module is `bundle` packaged, so Ivy resolved its jar into the `bundles` directory.
+      bundle_path = os.path.join(ivy_cache_dir, 'org1', 'name1', 'bundles', 'name1-1.0.jar')
+      self._freeze_resolution(fetch, target, coordinate, cache_path=bundle_path)
+
+      with mock.patch.object(fetch, '_do_fetch') as do_fetch:
+        result = fetch.exec_and_load(None, None, [target], None, None, None)
+      self.assertFalse(do_fetch.called)
+
+      resolved_jars = dict(result.resolved_jars_for_each_target('default', [target]))[target]
+      self.assertEqual([bundle_path], [resolved_jar.cache_path for resolved_jar in resolved_jars])
+
+  def test_fetch_without_ivy_falls_back_to_ivy(self):
+    coordinate = M2Coordinate('org1', 'name1', '1.0')
+    target = self.make_target('t', JarLibrary, jars=[JarDependency('org1', 'name1', '1.0')])
+    with temporary_dir() as repository, temporary_dir() as ivy_cache_dir, \
+         temporary_dir() as global_ivy_workdir:
+      # The repository is empty, so the artifact must be fetched by ivy.
+      fetch = self._fetch_step_with_artifact_fetcher(repository, ivy_cache_dir, global_ivy_workdir)
+      self._freeze_resolution(fetch, target, coordinate)
+
+      with mock.patch.object(fetch, '_do_fetch') as do_fetch:
+        with mock.patch.object(fetch, '_load_from_fetch'):
+          fetch.exec_and_load(None, None, [target], None, None, None)
+      self.assertTrue(do_fetch.called)
+
   def test_missing_symlinked_jar_in_candidates(self):
     empty_symlink_map = {}
     result = IvyResolveResult(['non-existent-file-location'], empty_symlink_map, 'hash-name',
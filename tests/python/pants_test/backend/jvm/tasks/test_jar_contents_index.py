@@ -0,0 +1,51 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from mock import patch
+
+from pants.backend.jvm.tasks.classpath_util import ClasspathUtil
+from pants.backend.jvm.tasks.jar_contents_index import JarContentsIndex
+from pants.util.contextutil import open_zip, temporary_dir
+
+
+class JarContentsIndexTest(unittest.TestCase):
+
+  def _write_jar(self, path, *names):
+    with open_zip(path, 'w') as jar:
+      for name in names:
+        jar.writestr(name, b'')
+
+  def test_contents(self):
+    with temporary_dir() as tmpdir:
+      jar_path = os.path.join(tmpdir, 'a.jar')
+      self._write_jar(jar_path, 'com/', 'com/A.class', 'META-INF/MANIFEST.MF')
+      index = JarContentsIndex(os.path.join(tmpdir, 'index'))
+      self.assertEqual(('com/', 'com/A.class', 'META-INF/MANIFEST.MF'), index.contents(jar_path))
+
+  def test_contents_persisted(self):
+    with temporary_dir() as tmpdir:
+      jar_path = os.path.join(tmpdir, 'a.jar')
+      self._write_jar(jar_path, 'com/A.class')
+      index_dir = os.path.join(tmpdir, 'index')
+      JarContentsIndex(index_dir).contents(jar_path)
+
+      with patch.object(ClasspathUtil, 'classpath_entries_contents') as listing:
+        self.assertEqual(('com/A.class',), JarContentsIndex(index_dir).contents(jar_path))
+        self.assertFalse(listing.called)
+
+  def test_contents_invalidated_by_change(self):
+    with temporary_dir() as tmpdir:
+      jar_path = os.path.join(tmpdir, 'a.jar')
+      self._write_jar(jar_path, 'com/A.class')
+      index_dir = os.path.join(tmpdir, 'index')
+      JarContentsIndex(index_dir).contents(jar_path)
+
+      self._write_jar(jar_path, 'com/A.class', 'com/B.class')
+      self.assertEqual(('com/A.class', 'com/B.class'), JarContentsIndex(index_dir).contents(jar_path))
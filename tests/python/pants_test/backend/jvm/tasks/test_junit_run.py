@@ -22,8 +22,10 @@ from pants.ivy.bootstrapper import Bootstrapper
 from pants.ivy.ivy_subsystem import IvySubsystem
 from pants.java.distribution.distribution import DistributionLocator
 from pants.java.executor import SubprocessExecutor
-from pants.util.contextutil import environment_as
-from pants.util.dirutil import safe_file_dump
+from pants.java.junit.junit_xml_parser import Test
+from pants.util.contextutil import environment_as, temporary_dir
+from pants.util.dirutil import read_file, safe_file_dump
+from pants.util.durations import DurationHistory
 from pants.util.timeout import TimeoutReached
 from pants_test.jvm.jvm_tool_task_test_base import JvmToolTaskTestBase
 from pants_test.subsystem.subsystem_util import global_subsystem_instance, init_subsystem
@@ -80,6 +82,48 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
 
     self.assertEqual([t.name for t in cm.exception.failed_targets], ['foo_test'])
 
+  def test_test_shards_run_each_class_once(self):
+    classnames = ['org.pantsbuild.Test{}'.format(n) for n in range(8)]
+    tests_by_properties = {(): tuple(Test(classname) for classname in classnames)}
+    with temporary_dir() as tmpdir:
+      durations_file = os.path.join(tmpdir, 'durations.json')
+      durations = DurationHistory(durations_file)
+      for n, classname in enumerate(classnames):
+        durations.record(classname, n + 1)
+      durations.save()
+
+      ran = []
+      for shard in ('0/2', '1/2'):
+        self.set_options(test_durations_file=durations_file, test_shard=shard)
+        task = self.create_task(self.context())
+        shard_classnames = [test.classname
+                            for tests in task._shard_by_duration(tests_by_properties).values()
+                            for test in tests]
+        ran.extend(shard_classnames)
+
+        # The shard observes very different durations than were recorded for the tests it ran.
+        report = os.path.join(tmpdir, 'TEST-shard.xml')
+        safe_file_dump(report, '<testsuite>{}</testsuite>'.format(''.join(
+          '<testcase classname="{}" name="test" time="{}"/>'.format(classname, 100 * (n + 1))
+          for n, classname in enumerate(shard_classnames))))
+        task._record_test_durations([report])
+
+      self.assertEqual(sorted(classnames), sorted(ran))
+
+  def test_merge_fork_outputs_collisions(self):
+    with temporary_dir() as output_dir:
+      forks_dir = os.path.join(output_dir, '_forks')
+      for fork in range(11):
+        safe_file_dump(os.path.join(forks_dir, str(fork), 'TEST-Foo.xml'), str(fork))
+      safe_file_dump(os.path.join(forks_dir, '1', 'TEST-Bar.xml'), 'bar')
+
+      JUnitRun._merge_fork_outputs(forks_dir, output_dir)
+
+      expected = {'TEST-Foo.xml': '0', 'TEST-Bar.xml': 'bar'}
+      expected.update(('TEST-Foo.fork{}.xml'.format(fork), str(fork)) for fork in range(1, 11))
+      self.assertEqual(expected, {name: read_file(os.path.join(output_dir, name))
+                                  for name in os.listdir(output_dir)})
+
   def test_junit_runner_error(self):
     with self.assertRaises(TaskError) as cm:
       self._execute_junit_runner(
@@ -207,7 +251,7 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
     self.populate_runtime_classpath(context=context, classpath=[test_classes_abs_path])
 
     # Finally execute the task.
-    self.execute(context)
+    return self.execute(context)
 
   def test_junit_runner_raises_no_error_on_non_junit_target(self):
     """Run pants against a `python_tests` target, but set an option for the `test.junit` task. This
@@ -410,3 +454,45 @@ class JUnitRunnerTest(JvmToolTaskTestBase):
     self.set_options(max_subprocess_args=max_subprocess_args)
 
     self._execute_junit_runner(list_of_filename_content_tuples, target_name='foo:foo_test')
+
+  def _fork_test_sources(self, num_of_classes, failing_classes=()):
+    list_of_filename_content_tuples = []
+    for n in range(num_of_classes):
+      filename = 'FooTest{}.java'.format(n)
+      content = dedent("""
+          import org.junit.Test;
+          import static org.junit.Assert.assertTrue;
+          public class FooTest{}{{
+          @Test
+            public void testFoo() {{
+              assertTrue({});
+            }}
+          }}""".format(n, 'false' if n in failing_classes else 'true'))
+      list_of_filename_content_tuples.append((filename, content))
+
+    self.make_target(
+      spec='foo:foo_test',
+      target_type=JUnitTests,
+      sources=[name for name, _ in list_of_filename_content_tuples],
+    )
+    return list_of_filename_content_tuples
+
+  def test_junit_runner_forks(self):
+    list_of_filename_content_tuples = self._fork_test_sources(4)
+    self.set_options(batch_size=1, forks=2)
+
+    task = self._execute_junit_runner(list_of_filename_content_tuples, target_name='foo:foo_test')
+
+    # The reports of each fork are merged into the output directory.
+    for n in range(4):
+      self.assertTrue(os.path.exists(os.path.join(task.workdir, 'TEST-FooTest{}.xml'.format(n))))
+    self.assertFalse(os.path.exists(os.path.join(task.workdir, '_forks')))
+
+  def test_junit_runner_forks_failure(self):
+    list_of_filename_content_tuples = self._fork_test_sources(4, failing_classes=(2,))
+    self.set_options(batch_size=1, forks=2)
+
+    with self.assertRaises(TaskError) as cm:
+      self._execute_junit_runner(list_of_filename_content_tuples, target_name='foo:foo_test')
+
+    self.assertEqual([t.name for t in cm.exception.failed_targets], ['foo_test'])
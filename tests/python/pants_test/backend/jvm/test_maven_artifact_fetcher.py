@@ -0,0 +1,100 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import hashlib
+import os
+import unittest
+
+from pants.backend.jvm.maven_artifact_fetcher import MavenArtifactFetcher
+from pants.java.jar.jar_dependency_utils import M2Coordinate
+from pants.util.dirutil import safe_file_dump, safe_mkdtemp, safe_rmtree, touch
+
+
+class MavenArtifactFetcherTest(unittest.TestCase):
+
+  def setUp(self):
+    self.repository = self._temporary_dir()
+    self.ivy_cache_dir = self._temporary_dir()
+    self.fetcher = MavenArtifactFetcher('file://{}'.format(self.repository), self.ivy_cache_dir,
+                                        concurrency=2)
+
+  def _temporary_dir(self):
+    path = safe_mkdtemp()
+    self.addCleanup(safe_rmtree, path)
+    return path
+
+  def publish(self, coordinate, content, sha1=None):
+    path = os.path.join(self.repository,
+                        os.path.relpath(self.fetcher.artifact_url(coordinate),
+                                        'file://{}'.format(self.repository)))
+    safe_file_dump(path, content)
+    safe_file_dump('{}.sha1'.format(path),
+                   '{}  {}\n'.format(sha1 or hashlib.sha1(content).hexdigest(),
+                                     os.path.basename(path)))
+
+  def test_artifact_url(self):
+    self.assertEqual('file://{}/org/example/lib/1.0/lib-1.0-sources.jar'.format(self.repository),
+                     self.fetcher.artifact_url(M2Coordinate('org.example', 'lib', '1.0',
+                                                            classifier='sources')))
+
+  def test_cache_path(self):
+    self.assertEqual(os.path.join(self.ivy_cache_dir, 'org.example', 'lib', 'jars',
+                                  'lib-1.0.jar'),
+                     self.fetcher.cache_path(M2Coordinate('org.example', 'lib', '1.0')))
+    self.assertEqual(os.path.join(self.ivy_cache_dir, 'org.example', 'lib', 'sources',
+                                  'lib-1.0-sources.jar'),
+                     self.fetcher.cache_path(M2Coordinate('org.example', 'lib', '1.0',
+                                                          classifier='sources')))
+    self.assertEqual(os.path.join(self.ivy_cache_dir, 'org.example', 'lib', 'test-jars',
+                                  'lib-1.0-tests.jar'),
+                     self.fetcher.cache_path(M2Coordinate('org.example', 'lib', '1.0',
+                                                          classifier='tests')))
+    # The type of an artifact of a `bundle` packaged module is not that of its extension.
+    self.assertEqual(os.path.join(self.ivy_cache_dir, 'org.example', 'lib', 'bundles',
+                                  'lib-1.0.jar'),
+                     self.fetcher.cache_path(M2Coordinate('org.example', 'lib', '1.0'),
+                                             artifact_type='bundle'))
+
+  def test_fetch_by_type(self):
+    coordinate = M2Coordinate('org.example', 'lib', '1.0')
+    self.publish(coordinate, 'bundle')
+    cache_paths = self.fetcher.fetch([coordinate], types_by_coordinate={coordinate: 'bundle'})
+    self.assertEqual([self.fetcher.cache_path(coordinate, artifact_type='bundle')],
+                     list(cache_paths.values()))
+
+  def test_fetch(self):
+    coordinates = [M2Coordinate('org.example', 'lib{}'.format(i), '1.0') for i in range(5)]
+    for coordinate in coordinates:
+      self.publish(coordinate, coordinate.name)
+
+    cache_paths = self.fetcher.fetch(coordinates)
+
+    self.assertEqual(coordinates, list(cache_paths.keys()))
+    for coordinate, path in cache_paths.items():
+      self.assertEqual(self.fetcher.cache_path(coordinate), path)
+      with open(path) as fp:
+        self.assertEqual(coordinate.name, fp.read())
+
+  def test_fetch_skips_cached_artifacts(self):
+    coordinate = M2Coordinate('org.example', 'lib', '1.0')
+    touch(self.fetcher.cache_path(coordinate))
+
+    # The artifact is not in the repository, so fetching it would fail.
+    self.assertEqual([self.fetcher.cache_path(coordinate)],
+                     list(self.fetcher.fetch([coordinate]).values()))
+
+  def test_fetch_missing_artifact(self):
+    with self.assertRaises(MavenArtifactFetcher.Error):
+      self.fetcher.fetch([M2Coordinate('org.example', 'lib', '1.0')])
+
+  def test_fetch_checksum_mismatch(self):
+    coordinate = M2Coordinate('org.example', 'lib', '1.0')
+    self.publish(coordinate, 'corrupt', sha1=hashlib.sha1('original').hexdigest())
+
+    with self.assertRaises(MavenArtifactFetcher.Error):
+      self.fetcher.fetch([coordinate])
+    self.assertEqual([], os.listdir(os.path.dirname(self.fetcher.cache_path(coordinate))))
@@ -0,0 +1,38 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+
+from pants.backend.python.subsystems.python_setup import PythonSetup
+from pants.backend.python.tasks2.clean_installed_distributions import CleanInstalledDistributions
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import touch
+from pants_test.tasks.task_test_base import TaskTestBase
+
+
+class CleanInstalledDistributionsTest(TaskTestBase):
+  @classmethod
+  def task_type(cls):
+    return CleanInstalledDistributions
+
+  def execute_task(self, installed_distributions_dir):
+    self.set_options_for_scope(PythonSetup.options_scope,
+                               installed_distributions_dir=installed_distributions_dir)
+    self.create_task(self.context()).execute()
+
+  def test_removes_store_outside_workdir(self):
+    with temporary_dir() as tmpdir:
+      store_dir = os.path.join(tmpdir, 'installed_distributions')
+      touch(os.path.join(store_dir, 'entry', 'pex_hash'))
+      self.execute_task(store_dir)
+      self.assertFalse(os.path.exists(store_dir))
+
+  def test_leaves_store_under_workdir(self):
+    store_dir = os.path.join(self.pants_workdir, 'python-setup', 'installed_distributions')
+    touch(os.path.join(store_dir, 'entry', 'pex_hash'))
+    self.execute_task(store_dir)
+    self.assertTrue(os.path.isdir(store_dir))
@@ -0,0 +1,92 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import subprocess
+import unittest
+
+from pex.interpreter import PythonInterpreter
+from pex.pex import PEX
+from pex.pex_builder import PEXBuilder
+from pex.pex_info import PexInfo
+from pex.util import CacheHelper
+from pkg_resources import Distribution
+
+from pants.backend.python.tasks2.distribution_store import DistributionStore
+from pants.util.contextutil import open_zip, pushd, temporary_dir, temporary_file
+
+
+class DistributionStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    self.interpreter = PythonInterpreter.get()
+
+  def make_wheel(self, directory, name, version):
+    path = os.path.join(directory, '{}-{}-py2.py3-none-any.whl'.format(name, version))
+    dist_info = '{}-{}.dist-info'.format(name, version)
+    with open_zip(path, 'w') as zf:
+      zf.writestr('{}.py'.format(name), 'VERSION = {!r}\n'.format(version))
+      zf.writestr('{}/METADATA'.format(dist_info),
+                  'Metadata-Version: 2.0\nName: {}\nVersion: {}\n'.format(name, version))
+      zf.writestr('{}/WHEEL'.format(dist_info),
+                  'Wheel-Version: 1.0\nRoot-Is-Purelib: true\nTag: py2.py3-none-any\n')
+      zf.writestr('{}/RECORD'.format(dist_info), '')
+    return Distribution(location=path, project_name=name, version=version)
+
+  def build_pex(self, path, store, dists):
+    builder = PEXBuilder(path=path, interpreter=self.interpreter)
+    for dist in dists:
+      builder.add_requirement(dist.project_name)
+      store.add_to_pex(builder, self.interpreter, dist)
+    builder.freeze()
+    return PEX(path, interpreter=self.interpreter)
+
+  def test_install_once(self):
+    with temporary_dir() as wheels, temporary_dir() as store_dir:
+      store = DistributionStore(store_dir)
+      dist = self.make_wheel(wheels, 'lib', '1.0')
+
+      path = store.install(self.interpreter, dist)
+      self.assertEqual(path, store.install(self.interpreter, dist))
+      self.assertEqual([os.path.basename(path)],
+                       os.listdir(os.path.join(store_dir, str(self.interpreter.identity))))
+      self.assertTrue(os.path.isfile(os.path.join(path, os.path.basename(dist.location),
+                                                  'lib.py')))
+
+  def test_relative_root_dir(self):
+    with temporary_dir() as wheels, temporary_dir() as cwd, pushd(cwd), temporary_dir() as pexes:
+      store = DistributionStore('store')
+      dist = self.make_wheel(wheels, 'rellib', '1.0')
+
+      self.assertEqual(os.path.join(os.path.realpath(cwd), 'store'),
+                       os.path.dirname(os.path.dirname(store.install(self.interpreter, dist))))
+      self.build_pex(os.path.join(pexes, 'pex'), store, [dist])
+
+  def test_pexes_share_installed_distributions(self):
+    with temporary_dir() as wheels, temporary_dir() as store_dir, temporary_dir() as pexes:
+      store = DistributionStore(store_dir)
+      common = self.make_wheel(wheels, 'storea', '1.0')
+      extra = self.make_wheel(wheels, 'storeb', '2.0')
+
+      self.build_pex(os.path.join(pexes, 'first'), store, [common])
+      pex = self.build_pex(os.path.join(pexes, 'second'), store, [common, extra])
+
+      common_name = os.path.basename(common.location)
+      self.assertEqual(os.path.realpath(os.path.join(pexes, 'first', '.deps', common_name)),
+                       os.path.realpath(os.path.join(pexes, 'second', '.deps', common_name)))
+      with open_zip(common.location) as zf:
+        self.assertEqual(CacheHelper.zip_hash(zf),
+                         PexInfo.from_pex(pex.path()).distributions[common_name])
+
+      with temporary_file() as script:
+        script.write('import storea, storeb; print(storea.VERSION + " " + storeb.VERSION)')
+        script.close()
+        process = pex.run(args=[script.name], blocking=False,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        stdout, stderr = process.communicate()
+      self.assertEqual(0, process.returncode, stderr)
+      self.assertEqual('1.0 2.0', stdout.decode('utf-8').strip())
@@ -48,6 +48,31 @@ class GatherSourcesTest(TaskTestBase):
         content = infile.read()
       self.assertEquals(expected_content, content)
 
+  def test_gather_sources_incrementally(self):
+    self.create_file('src/python/foo.py', 'foo_py_content')
+    self.create_file('src/python/bar.py', 'bar_py_content')
+    pex_root1 = self._gather_sources(self._make_foo_and_bar()).cmdline()[1]
+
+    self.create_file('src/python/bar.py', 'new_bar_py_content')
+    # Targets memoize their fingerprints, so the edited sources need new targets.
+    self.reset_build_graph()
+    pex_root2 = self._gather_sources(self._make_foo_and_bar()).cmdline()[1]
+
+    self.assertNotEqual(pex_root1, pex_root2)
+    # The sources of the unchanged target are linked from the same copy of them.
+    self.assertEquals(os.stat(os.path.join(pex_root1, 'src/python/foo.py')).st_ino,
+                      os.stat(os.path.join(pex_root2, 'src/python/foo.py')).st_ino)
+    with open(os.path.join(pex_root1, 'src/python/bar.py')) as infile:
+      self.assertEquals('bar_py_content', infile.read())
+    with open(os.path.join(pex_root2, 'src/python/bar.py')) as infile:
+      self.assertEquals('new_bar_py_content', infile.read())
+
+  def _make_foo_and_bar(self):
+    return [self.make_target(spec='//:foo_tgt', target_type=PythonLibrary,
+                             sources=['src/python/foo.py']),
+            self.make_target(spec='//:bar_tgt', target_type=PythonLibrary,
+                             sources=['src/python/bar.py'])]
+
   def _gather_sources(self, target_roots):
     context = self.context(target_roots=target_roots, for_subsystems=[PythonSetup, PythonRepos])
 
@@ -318,6 +318,26 @@ class PytestTest(PytestTestBase):
                            fail_fast=True,
                            fast=True)
 
+  def test_parallel(self):
+    self.run_failing_tests(targets=[self.red, self.green, self.error],
+                           failed_targets=[self.red, self.error],
+                           fast=False,
+                           parallelism=2)
+
+  def test_parallel_coverage(self):
+    coverage_output_dir = os.path.join(self.build_root, 'coverage_reports')
+    self.run_failing_tests(targets=[self.green, self.red], failed_targets=[self.red],
+                           fast=False,
+                           parallelism=2,
+                           coverage='auto',
+                           coverage_output_dir=coverage_output_dir)
+
+    # Concurrent runs keep their coverage data apart, rather than sharing one in the buildroot.
+    self.assertFalse(os.path.isfile(self.coverage_data_file()))
+    for target in (self.green, self.red):
+      self.assertTrue(os.path.isfile(os.path.join(coverage_output_dir, target.id,
+                                                  'coverage.xml')))
+
   def test_red_test_in_class(self):
     # for test in a class, the failure line is in the following format
     # F testprojects/tests/python/pants/constants_only/test_fail.py::TestClassName::test_boom
@@ -426,6 +446,15 @@ class PytestTest(PytestTestBase):
     self.run_failing_tests(targets=[self.red, self.green], failed_targets=[self.red],
                            test_shard='1/2')
 
+  def test_sharding_balanced_by_duration(self):
+    durations_file = os.path.join(self.build_root, 'test_durations.json')
+    # Without recorded durations, the sorted sources are assigned to the shards in turn.
+    self.run_tests(targets=[self.red, self.green], test_shard='0/2',
+                   test_durations_file=durations_file)
+    self.run_failing_tests(targets=[self.red, self.green], failed_targets=[self.red],
+                           test_shard='1/2', test_durations_file=durations_file)
+    self.assertTrue(os.path.exists(durations_file))
+
   def test_sharding_single(self):
     self.run_failing_tests(targets=[self.red], failed_targets=[self.red], test_shard='0/1')
 
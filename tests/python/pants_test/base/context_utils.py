@@ -53,8 +53,14 @@ class TestContext(Context):
 
       def add_misses(self, cache_name, targets, causes): pass
 
+      def add_read_stats(self, cache_name, read_stats): pass
+
     artifact_cache_stats = DummyArtifactCacheStats()
 
+    def add_timing(self, name, secs): pass
+
+    def register_thread(self, parent_workunit): pass
+
   @contextmanager
   def new_workunit(self, name, labels=None, cmd='', log_config=None):
     """
@@ -183,3 +183,28 @@ class TargetTest(BaseTest):
     target_hash = target_c.invalidation_hash(fingerprint_strategy=fingerprint_strategy)
     hash_value = '{}.{}'.format(target_hash, dep_hash)
     self.assertEqual(hash_value, target_c.transitive_invalidation_hash(fingerprint_strategy=fingerprint_strategy))
+
+  def test_mark_invalidation_hash_dirty_invalidates_dependees(self):
+    versions = {}
+
+    class VersionedFingerprintStrategy(DefaultFingerprintStrategy):
+      def compute_fingerprint(self, target):
+        return sha1(target.address.spec + str(versions.get(target, 0))).hexdigest()
+
+    fingerprint_strategy = VersionedFingerprintStrategy()
+    target_a = self.make_target('a', Target)
+    target_b = self.make_target('b', Target, dependencies=[target_a])
+    target_c = self.make_target('c', Target, dependencies=[target_b])
+    target_d = self.make_target('d', Target)
+
+    b_hash = target_b.transitive_invalidation_hash(fingerprint_strategy)
+    c_hash = target_c.transitive_invalidation_hash(fingerprint_strategy)
+    d_hash = target_d.transitive_invalidation_hash(fingerprint_strategy)
+
+    # Memoized fingerprints are stale until the changed target is marked dirty.
+    versions[target_a] = 1
+    self.assertEqual(c_hash, target_c.transitive_invalidation_hash(fingerprint_strategy))
+    target_a.mark_invalidation_hash_dirty()
+    self.assertNotEqual(b_hash, target_b.transitive_invalidation_hash(fingerprint_strategy))
+    self.assertNotEqual(c_hash, target_c.transitive_invalidation_hash(fingerprint_strategy))
+    self.assertEqual(d_hash, target_d.transitive_invalidation_hash(fingerprint_strategy))
@@ -8,9 +8,10 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 import unittest
 
-from pants.cache.artifact import DirectoryArtifact, TarballArtifact
+from pants.cache.artifact import (ARTIFACT_FORMATS, ArtifactError, DirectoryArtifact,
+                                  TarballArtifact, create_artifact)
 from pants.util.contextutil import temporary_dir
-from pants.util.dirutil import safe_mkdir, safe_open
+from pants.util.dirutil import chmod_plus_x, safe_mkdir, safe_open, safe_rmtree
 
 
 class TarballArtifactTest(unittest.TestCase):
@@ -75,3 +76,51 @@ class DirectoryArtifactTest(unittest.TestCase):
 
       artifact = DirectoryArtifact(artifact_root, artifact_dir)
       self.assertFalse(artifact.exists())
+
+
+class ArtifactFormatsTest(unittest.TestCase):
+  def test_round_trip(self):
+    for artifact_format in ARTIFACT_FORMATS:
+      with temporary_dir() as tmpdir:
+        artifact_root = os.path.join(tmpdir, 'artifacts')
+        artifact_path = os.path.join(tmpdir, 'cache', 'some.{}'.format(artifact_format))
+        safe_mkdir(os.path.dirname(artifact_path))
+
+        with safe_open(os.path.join(artifact_root, 'classes', 'a', 'A.class'), 'w') as f:
+          f.write('A')
+        with safe_open(os.path.join(artifact_root, 'run.sh'), 'w') as f:
+          f.write('#!/bin/sh')
+        chmod_plus_x(os.path.join(artifact_root, 'run.sh'))
+        safe_mkdir(os.path.join(artifact_root, 'classes', 'empty'))
+        # An even mtime, because zip stores modification times with a resolution of two seconds.
+        mtime = 1000000000
+        for path in ('classes/a/A.class', 'classes/a', 'classes/empty', 'run.sh'):
+          os.utime(os.path.join(artifact_root, path), (mtime, mtime))
+
+        artifact = create_artifact(artifact_format, artifact_root, artifact_path)
+        artifact.collect([os.path.join(artifact_root, 'classes'),
+                          os.path.join(artifact_root, 'run.sh')])
+        self.assertTrue(artifact.exists())
+        safe_rmtree(artifact_root)
+
+        create_artifact(artifact_format, artifact_root, artifact_path).extract()
+        with open(os.path.join(artifact_root, 'classes', 'a', 'A.class')) as f:
+          self.assertEqual('A', f.read(), artifact_format)
+        self.assertTrue(os.access(os.path.join(artifact_root, 'run.sh'), os.X_OK), artifact_format)
+        self.assertTrue(os.path.isdir(os.path.join(artifact_root, 'classes', 'empty')),
+                        artifact_format)
+        for path in ('classes/a/A.class', 'classes/a', 'classes/empty', 'run.sh'):
+          self.assertEqual(mtime, os.path.getmtime(os.path.join(artifact_root, path)),
+                           '{}: {}'.format(artifact_format, path))
+
+  def test_corrupt_zip(self):
+    with temporary_dir() as tmpdir:
+      artifact_path = os.path.join(tmpdir, 'some.zip')
+      with open(artifact_path, 'w') as f:
+        f.write('not a zip')
+      with self.assertRaises(ArtifactError):
+        create_artifact('zip', os.path.join(tmpdir, 'artifacts'), artifact_path).extract()
+
+  def test_unknown_format(self):
+    with self.assertRaises(ValueError):
+      create_artifact('rar', 'artifacts', 'some.rar')
@@ -6,12 +6,15 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import time
 import unittest
 from contextlib import contextmanager
 
+from pants.cache.artifact import ARTIFACT_FORMATS
 from pants.cache.artifact_cache import (NonfatalArtifactCacheError, call_insert,
                                         call_use_cached_files)
 from pants.cache.local_artifact_cache import LocalArtifactCache, TempLocalArtifactCache
+from pants.cache.local_artifact_cache_index import LocalArtifactCacheIndex
 from pants.cache.pinger import BestUrlSelector, InvalidRESTfulCacheProtoError
 from pants.cache.restful_artifact_cache import RESTfulArtifactCache
 from pants.invalidation.build_invalidator import CacheKey
@@ -56,6 +59,19 @@ class TestArtifactCache(unittest.TestCase):
     with self.setup_local_cache() as artifact_cache:
       self.do_test_artifact_cache(artifact_cache)
 
+  def test_artifact_formats(self):
+    for artifact_format in ARTIFACT_FORMATS:
+      with temporary_dir() as artifact_root:
+        with temporary_dir() as cache_root:
+          local = LocalArtifactCache(artifact_root, cache_root, compression=1,
+                                     artifact_format=artifact_format)
+          self.do_test_artifact_cache(local)
+          with self.setup_server() as server:
+            tmp = TempLocalArtifactCache(artifact_root, 1, artifact_format=artifact_format)
+            self.do_test_artifact_cache(RESTfulArtifactCache(artifact_root,
+                                                             BestUrlSelector([server.url]),
+                                                             tmp))
+
   def test_restful_cache(self):
     with self.assertRaises(InvalidRESTfulCacheProtoError):
       RESTfulArtifactCache('foo', BestUrlSelector(['ftp://localhost/bar']), 'foo')
@@ -179,6 +195,29 @@ class TestArtifactCache(unittest.TestCase):
             self.assertTrue(os.path.exists(results_dir))
             self.assertTrue(len(os.listdir(results_dir)) == 0)
 
+  def test_restful_cache_batch(self):
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(3)]
+
+    with self.setup_local_cache() as local:
+      with self.setup_rest_cache(local=local) as cache:
+        with self.setup_test_file(cache.artifact_root) as path:
+          # Insert the first two keys, and then remove one of them from the local cache, so that it
+          # is only available remotely.
+          cache.insert(keys[0], [path])
+          cache.insert(keys[1], [path])
+          local.delete(keys[1])
+          cache.pop_read_stats()
+
+          results = cache.use_cached_files_batch([(key, None) for key in keys])
+          self.assertEquals([True, True, False], [bool(r) for r in results])
+          # The remotely fetched artifact was backfilled to the local cache.
+          self.assertTrue(local.has(keys[1]))
+
+          read_stats = cache.pop_read_stats()
+          self.assertEquals(2, read_stats.requests)
+          self.assertGreater(read_stats.bytes, 0)
+          self.assertEquals(0, cache.pop_read_stats().requests)
+
   def test_multiproc(self):
     key = CacheKey('muppet_key', 'fake_hash')
 
@@ -254,3 +293,27 @@ class TestArtifactCache(unittest.TestCase):
 
         self.assertFalse(artifact_cache.use_cached_files(key))
         self.assertFalse(os.path.exists(tarfile))
+
+  def test_local_cache_evicts_least_recently_used(self):
+    keys = [CacheKey('muppet_key{}'.format(i), 'fake_hash') for i in range(3)]
+    with temporary_dir() as artifact_root:
+      with temporary_dir() as cache_root:
+        index = LocalArtifactCacheIndex(cache_root)
+        unbounded = LocalArtifactCache(artifact_root, cache_root, compression=1, index=index)
+        with self.setup_test_file(artifact_root) as path:
+          # NB: Sleep between operations so that their journalled timestamps differ.
+          unbounded.insert(keys[0], [path])
+          time.sleep(0.01)
+          unbounded.insert(keys[1], [path])
+          time.sleep(0.01)
+          self.assertTrue(unbounded.use_cached_files(keys[0]))
+
+          # Allow room for two artifacts only: inserting a third evicts the least recently used.
+          artifact_size = os.path.getsize(unbounded._cache_file_for_key(keys[0]))
+          bounded = LocalArtifactCache(artifact_root, cache_root, compression=1, index=index,
+                                       max_size_bytes=int(artifact_size * 2.5))
+          bounded.insert(keys[2], [path])
+          self.assertTrue(bounded.has(keys[0]))
+          self.assertFalse(bounded.has(keys[1]))
+          self.assertTrue(bounded.has(keys[2]))
+          self.assertEquals(2, len(index))
@@ -76,6 +76,11 @@ class TestCacheSetup(BaseTest):
     options.read_from = [self.EMPTY_URI]
     options.write_to = [self.EMPTY_URI]
     options.compression_level = 1
+    options.remote_timeout = 4.0
+    options.remote_read_parallelism = 8
+    options.artifact_format = 'tgz'
+    options.local_max_size_mb = None
+    options.local_max_age_days = None
     self.cache_factory = CacheFactory(options=options, log=MockLogger(),
                                  stable_name='test', resolver=self.resolver)
 
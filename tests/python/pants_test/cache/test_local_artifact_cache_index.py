@@ -0,0 +1,82 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import time
+import unittest
+
+from pants.cache.local_artifact_cache_index import LocalArtifactCacheIndex
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import safe_file_dump
+
+
+class LocalArtifactCacheIndexTest(unittest.TestCase):
+
+  def _write(self, root, relpath, size):
+    path = os.path.join(root, relpath)
+    safe_file_dump(path, b'x' * size)
+    return path
+
+  def test_size_eviction_is_lru(self):
+    with temporary_dir() as root:
+      index = LocalArtifactCacheIndex(root)
+      paths = [self._write(root, 'task/target/{}.tgz'.format(i), 100) for i in range(4)]
+      for path in paths:
+        index.record_insert(path)
+        time.sleep(0.01)
+      index.record_access(paths[0])
+      self.assertEquals(400, index.total_size)
+
+      evicted, reclaimed = index.evict(max_size_bytes=300)
+      # Evicts down to the low water mark of 270 bytes: the two least recently used artifacts.
+      self.assertEquals((2, 200), (evicted, reclaimed))
+      self.assertEquals([True, False, False, True], [os.path.exists(p) for p in paths])
+      self.assertEquals(200, index.total_size)
+
+  def test_within_budget_is_noop(self):
+    with temporary_dir() as root:
+      index = LocalArtifactCacheIndex(root)
+      index.record_insert(self._write(root, 'a.tgz', 10))
+      self.assertEquals((0, 0), index.evict(max_size_bytes=100))
+      self.assertEquals((0, 0), index.evict())
+
+  def test_age_eviction(self):
+    with temporary_dir() as root:
+      index = LocalArtifactCacheIndex(root)
+      old = self._write(root, 'old.tgz', 10)
+      index.record_insert(old)
+      time.sleep(0.05)
+      new = self._write(root, 'new.tgz', 10)
+      index.record_insert(new)
+
+      self.assertEquals((1, 10), index.evict(max_age_secs=0.025, force_age_check=True))
+      self.assertFalse(os.path.exists(old))
+      self.assertTrue(os.path.exists(new))
+
+  def test_shared_between_instances(self):
+    with temporary_dir() as root:
+      writer = LocalArtifactCacheIndex(root)
+      reader = LocalArtifactCacheIndex(root)
+      path = self._write(root, 'a.tgz', 10)
+      writer.record_insert(path)
+      self.assertEquals(10, reader.total_size)
+      writer.record_delete(path)
+      self.assertEquals(0, reader.total_size)
+
+  def test_rebuild(self):
+    with temporary_dir() as root:
+      index = LocalArtifactCacheIndex(root)
+      indexed = self._write(root, 'indexed.tgz', 10)
+      index.record_insert(indexed)
+      self._write(root, 'unindexed.tgz', 20)
+      os.unlink(indexed)
+
+      index.rebuild()
+      self.assertEquals(1, len(index))
+      self.assertEquals(20, index.total_size)
+      # A fresh instance sees the compacted journal.
+      self.assertEquals(20, LocalArtifactCacheIndex(root).total_size)
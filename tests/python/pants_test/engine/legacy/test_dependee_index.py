@@ -0,0 +1,152 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+import mock
+
+from pants.base.specs import DescendantAddresses
+from pants.build_graph.address import Address
+from pants.engine.legacy.change_calculator import EngineChangeCalculator
+from pants.engine.legacy.dependee_index import DependeeIndex
+from pants.scm.scm import Scm
+from pants.util.contextutil import temporary_dir
+
+
+A = Address.parse('a:a')
+B = Address.parse('b:b')
+C = Address.parse('c:c')
+C2 = Address.parse('c:c2')
+
+
+class DependeeIndexTest(unittest.TestCase):
+
+  def _index(self, path=None):
+    index = DependeeIndex(path)
+    index.update_all({A: [], B: [A], C: [B], C2: [A]})
+    return index
+
+  def test_dependees(self):
+    index = self._index()
+    self.assertEqual({B, C2}, index.dependees_of(A))
+    self.assertEqual(set(), index.dependees_of(C))
+    self.assertEqual({A, B, C, C2}, index.transitive_dependees_of([A]))
+    self.assertEqual({B, C}, index.transitive_dependees_of([B]))
+
+  def test_update(self):
+    index = self._index()
+    # `c:c2` is removed, and `c:c` now depends on `a:a` directly.
+    index.update(['c'], {C: [A], A: [B]})
+    # The entry for `a:a` is left untouched, because `a` was not updated.
+    self.assertEqual({B, C}, index.dependees_of(A))
+    self.assertEqual(set(), index.dependees_of(B))
+
+  def test_persistence(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'index.json')
+      self.assertFalse(DependeeIndex(path).load())
+
+      index = self._index(path)
+      index.invalidate_dirs(['b'])
+      index.mark_up_to_date('rev1', ['b/BUILD'])
+
+      loaded = DependeeIndex(path)
+      self.assertTrue(loaded.load())
+      self.assertTrue(loaded.is_populated)
+      self.assertEqual('rev1', loaded.revision)
+      self.assertEqual({'b/BUILD'}, loaded.uncommitted_files)
+      self.assertEqual({A, B, C, C2}, loaded.transitive_dependees_of([A]))
+
+  def test_fingerprint_mismatch_is_not_loaded(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'index.json')
+      index = DependeeIndex(path, fingerprint='aliases1')
+      index.update_all({A: [], B: [A]})
+      index.mark_up_to_date('rev1', [])
+
+      self.assertTrue(DependeeIndex(path, fingerprint='aliases1').load())
+      changed = DependeeIndex(path, fingerprint='aliases2')
+      self.assertFalse(changed.load())
+      self.assertFalse(changed.is_populated)
+
+  def test_dirty_dirs_are_consumed_once_across_instances(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'index.json')
+      # As under pantsd: one instance (the daemon) invalidates, and another (a forked client that
+      # shares the index path) consumes.
+      invalidator = DependeeIndex(path)
+      consumer = DependeeIndex(path)
+      invalidator.invalidate_dirs(['b', ''])
+      invalidator.invalidate_dirs(['c'])
+      self.assertEqual({'b', '', 'c'}, consumer.consume_dirty_dirs())
+      self.assertEqual(set(), invalidator.consume_dirty_dirs())
+      self.assertEqual([], os.listdir(tmpdir))
+
+  def test_in_memory_dirty_dirs(self):
+    index = self._index()
+    index.invalidate_dirs(['b'])
+    self.assertEqual({'b'}, index.consume_dirty_dirs())
+    self.assertEqual(set(), index.consume_dirty_dirs())
+
+
+class EngineChangeCalculatorDependeeIndexTest(unittest.TestCase):
+
+  def setUp(self):
+    self.scm = mock.Mock()
+    self.scm.commit_id = 'rev1'
+    self.scm.changed_files.return_value = set()
+    self.scm.changes_in.return_value = set()
+    self.index = DependeeIndex()
+    self.calculator = EngineChangeCalculator(mock.Mock(), mock.Mock(), mock.Mock(), self.scm,
+                                             dependee_index=self.index)
+    self.calculator._has_build_files = lambda spec_path: True
+
+  def test_incremental_update(self):
+    with mock.patch.object(self.calculator, '_dependencies_by_address',
+                           return_value={A: [], B: [A], C: [B]}) as parse:
+      self.calculator._up_to_date_dependee_index()
+      self.assertEqual(1, parse.call_count)
+
+      # Nothing changed: no parsing is necessary.
+      self.calculator._up_to_date_dependee_index()
+      self.assertEqual(1, parse.call_count)
+
+      # A new commit changing only `b/BUILD`, and a pantsd invalidation for `c/BUILD`: only
+      # those directories are re-parsed.
+      self.scm.commit_id = 'rev2'
+      self.scm.changes_in.return_value = {'b/BUILD', 'b/B.java'}
+      self.calculator.invalidate_files(['c/BUILD.extra', 'c/C.java'])
+      parse.return_value = {A: [], B: [], C: [B]}
+      index = self.calculator._up_to_date_dependee_index()
+      self.assertEqual(2, parse.call_count)
+      self.assertEqual({'b', 'c'}, set(spec.directory for spec in parse.call_args[0][0]))
+      self.scm.changes_in.assert_called_with('rev1..rev2', relative_to=mock.ANY)
+
+    self.assertEqual(set(), index.dependees_of(A))
+    self.assertEqual({C}, index.dependees_of(B))
+
+  def test_unknown_revision_rebuilds(self):
+    with mock.patch.object(self.calculator, '_dependencies_by_address',
+                           return_value={A: [], B: [A]}) as parse:
+      self.calculator._up_to_date_dependee_index()
+
+      # The indexed revision is gone (e.g. rebased away): the whole index is recomputed.
+      self.scm.commit_id = 'rev2'
+      self.scm.changes_in.side_effect = Scm.LocalException('unknown revision rev1')
+      parse.return_value = {A: [], B: [], C: [A]}
+      index = self.calculator._up_to_date_dependee_index()
+      self.assertEqual(2, parse.call_count)
+      self.assertEqual([DescendantAddresses('')], parse.call_args[0][0])
+
+    self.assertEqual('rev2', index.revision)
+    self.assertEqual({C}, index.dependees_of(A))
+
+  def test_configured_build_patterns(self):
+    calculator = EngineChangeCalculator(mock.Mock(), mock.Mock(), mock.Mock(), self.scm,
+                                        build_patterns=('TARGETS',))
+    self.assertEqual({'a'}, calculator._build_file_dirs(['a/TARGETS', 'b/BUILD']))
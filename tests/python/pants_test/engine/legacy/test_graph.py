@@ -16,6 +16,7 @@ from pants.bin.engine_initializer import EngineInitializer, LegacySymbolTable
 from pants.build_graph.address import Address
 from pants.build_graph.build_file_aliases import BuildFileAliases, TargetMacro
 from pants.build_graph.target import Target
+from pants.engine.legacy.graph import LegacyBuildGraph
 from pants.init.target_roots import TargetRoots
 from pants.util.contextutil import temporary_dir
 from pants_test.engine.util import init_native
@@ -92,6 +93,23 @@ class GraphInvalidationTest(unittest.TestCase):
         node_count, last_node_count = scheduler.node_count(), node_count
         self.assertLess(node_count, last_node_count)
 
+  def test_chunked_hydration(self):
+    with self.open_scheduler(['3rdparty/python::']) as (graph, addresses, scheduler):
+      self.assertGreater(len(addresses), 2)
+      target_types = LegacyBuildGraph._get_target_types(LegacySymbolTable)
+      chunked_graph = LegacyBuildGraph(scheduler,
+                                       graph._engine,
+                                       target_types,
+                                       hydration_chunk_size=2)
+      chunked_addresses = tuple(chunked_graph.inject_specs_closure(
+        TargetRoots.create(options=self._make_setup_args(['3rdparty/python::'])).as_specs()))
+
+      self.assertEquals(set(addresses), set(chunked_addresses))
+      self.assertEquals(len(addresses), len(chunked_addresses))
+      for address in addresses:
+        self.assertEquals(graph.get_target(address).address,
+                          chunked_graph.get_target(address).address)
+
   def test_sources_ordering(self):
     spec = 'testprojects/src/resources/org/pantsbuild/testproject/ordering'
     with self.open_scheduler([spec]) as (graph, _, _):
@@ -8,15 +8,23 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import os
 import unittest
 
+import mock
+
+from pants.base.project_tree import Dir
 from pants.build_graph.address import Address
 from pants.engine.addressable import (Exactly, SubclassesOf, addressable, addressable_dict,
                                       addressable_list)
-from pants.engine.build_files import ResolvedTypeMismatchError, create_graph_rules
+from pants.engine.build_files import (BuildFiles, ResolvedTypeMismatchError, _build_file_storage,
+                                      create_graph_rules, parse_address_family)
 from pants.engine.engine import LocalSerialEngine
+from pants.engine.fs import FileContent, FilesContent
 from pants.engine.mapper import AddressMapper, ResolveError
 from pants.engine.nodes import Return, Throw
+from pants.engine.objects import SerializationError
 from pants.engine.parser import SymbolTable
+from pants.engine.storage import Storage
 from pants.engine.struct import HasProducts, Struct, StructWithDeps
+from pants.util.contextutil import temporary_dir
 from pants_test.engine.examples.parsers import (JsonParser, PythonAssignmentsParser,
                                                 PythonCallbacksParser)
 from pants_test.engine.scheduler_test_base import SchedulerTestBase
@@ -88,6 +96,88 @@ class TestTable(SymbolTable):
             'Target': Target}
 
 
+class MutableTable(SymbolTable):
+  extra = {}
+
+  @classmethod
+  def table(cls):
+    return dict(TestTable.table(), **cls.extra)
+
+
+class CountingJsonParser(JsonParser):
+  parse_count = 0
+
+  @classmethod
+  def parse(cls, filepath, filecontent, symbol_table_cls):
+    cls.parse_count += 1
+    return super(CountingJsonParser, cls).parse(filepath, filecontent, symbol_table_cls)
+
+
+class BuildFileCacheTest(unittest.TestCase):
+  def setUp(self):
+    CountingJsonParser.parse_count = 0
+    MutableTable.extra = {}
+
+  def parse(self, address_mapper, content):
+    build_files = BuildFiles(FilesContent([FileContent('a/BUILD.json', content)]))
+    return parse_address_family(address_mapper, Dir('a'), build_files)
+
+  def test_cached_across_runs(self):
+    content = b'{"type_alias": "Struct", "name": "b"}'
+    with temporary_dir() as cache_dir:
+      address_mapper = AddressMapper(symbol_table_cls=TestTable,
+                                     parser_cls=CountingJsonParser,
+                                     build_file_cache_dir=cache_dir)
+      family = self.parse(address_mapper, content)
+      self.assertEquals(1, CountingJsonParser.parse_count)
+
+      # Simulate a fresh run by dropping the in-memory Storage.
+      _build_file_storage.forget(cache_dir)
+      self.assertEquals(family.objects_by_name, self.parse(address_mapper, content).objects_by_name)
+      self.assertEquals(1, CountingJsonParser.parse_count)
+
+      # Changed content is a cache miss.
+      self.parse(address_mapper, b'{"type_alias": "Struct", "name": "c"}')
+      self.assertEquals(2, CountingJsonParser.parse_count)
+
+  def test_alias_change_reparses(self):
+    content = b'{"type_alias": "Struct", "name": "b"}'
+    with temporary_dir() as cache_dir:
+      address_mapper = AddressMapper(symbol_table_cls=MutableTable,
+                                     parser_cls=CountingJsonParser,
+                                     build_file_cache_dir=cache_dir)
+      self.parse(address_mapper, content)
+      _build_file_storage.forget(cache_dir)
+      self.parse(address_mapper, content)
+      self.assertEquals(1, CountingJsonParser.parse_count)
+
+      # A newly registered alias, e.g. from a plugin, is a cache miss.
+      MutableTable.extra = {'Other': Target}
+      _build_file_storage.forget(cache_dir)
+      self.parse(address_mapper, content)
+      self.assertEquals(2, CountingJsonParser.parse_count)
+
+  def test_unpicklable_parse_is_not_cached(self):
+    content = b'{"type_alias": "Struct", "name": "b"}'
+    with temporary_dir() as cache_dir:
+      address_mapper = AddressMapper(symbol_table_cls=TestTable,
+                                     parser_cls=CountingJsonParser,
+                                     build_file_cache_dir=cache_dir)
+      with mock.patch.object(Storage, 'put', side_effect=SerializationError('unpicklable')):
+        family = self.parse(address_mapper, content)
+      self.assertEquals(['b'], [address.target_name for address in family.addressables])
+      _build_file_storage.forget(cache_dir)
+      self.parse(address_mapper, content)
+      self.assertEquals(2, CountingJsonParser.parse_count)
+
+  def test_uncached(self):
+    content = b'{"type_alias": "Struct", "name": "b"}'
+    address_mapper = AddressMapper(symbol_table_cls=TestTable, parser_cls=CountingJsonParser)
+    self.parse(address_mapper, content)
+    self.parse(address_mapper, content)
+    self.assertEquals(2, CountingJsonParser.parse_count)
+
+
 class GraphTestBase(unittest.TestCase, SchedulerTestBase):
   def setUp(self):
     super(GraphTestBase, self).setUp()
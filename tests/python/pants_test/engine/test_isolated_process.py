@@ -7,14 +7,21 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 
 import os
 import tarfile
+import time
 import unittest
 
+from mock import patch
+
 from pants.engine.engine import LocalSerialEngine
 from pants.engine.fs import PathGlobs, Snapshot
-from pants.engine.isolated_process import Binary, SnapshottedProcess, SnapshottedProcessRequest
+from pants.engine.isolated_process import (Binary, SnapshottedProcess, SnapshottedProcessRequest,
+                                           _execute_process, _sandbox_lock, _snapshot_path,
+                                           garbage_collect)
 from pants.engine.nodes import Return, Throw
 from pants.engine.rules import SingletonRule
 from pants.engine.selectors import Select
+from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import chmod_plus_x, safe_file_dump
 from pants.util.objects import datatype
 from pants_test.engine.scheduler_test_base import SchedulerTestBase
 
@@ -104,6 +111,140 @@ class SnapshottedProcessRequestTest(SchedulerTestBase, unittest.TestCase):
       SnapshottedProcessRequest(args=('1',), directories_to_create=[])
 
 
+class ShellCountRuns(Binary):
+  def prefix_of_command(self):
+    return tuple(['sh', '-c', 'echo ran >> "$0"; cat a.txt; echo out > outfile'])
+
+
+class ScriptBinary(Binary):
+  def __init__(self, path):
+    self._path = path
+
+  @property
+  def bin_path(self):
+    return self._path
+
+
+class ExecuteProcessTest(unittest.TestCase):
+  def _mk_snapshot(self, archive_root, content):
+    snapshot = Snapshot(content.encode('utf-8'), tuple())
+    with temporary_dir() as src_dir:
+      safe_file_dump(os.path.join(src_dir, 'a.txt'), content)
+      with tarfile.open(_snapshot_path(snapshot, archive_root), 'w') as tar:
+        tar.add(os.path.join(src_dir, 'a.txt'), arcname='a.txt')
+    return snapshot
+
+  def test_identical_requests_are_cached(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      runs_file = os.path.join(work_dir, 'runs')
+      snapshot = self._mk_snapshot(archive_root, 'hello')
+      request = SnapshottedProcessRequest(args=(runs_file,), snapshots=(snapshot,))
+
+      result, sandbox_dir = _execute_process(archive_root, ShellCountRuns(), request)
+      self.assertEqual(0, result.exit_code)
+      self.assertEqual('hello', result.stdout)
+      self.assertTrue(os.path.isfile(os.path.join(sandbox_dir, 'outfile')))
+
+      cached_result, cached_sandbox_dir = _execute_process(archive_root, ShellCountRuns(), request)
+      self.assertEqual(result, cached_result)
+      self.assertEqual(sandbox_dir, cached_sandbox_dir)
+      with open(runs_file) as f:
+        self.assertEqual(['ran'], f.read().splitlines())
+
+      # A request with different inputs runs again, in a different sandbox.
+      other_snapshot = self._mk_snapshot(archive_root, 'goodbye')
+      other_request = SnapshottedProcessRequest(args=(runs_file,), snapshots=(other_snapshot,))
+      other_result, other_sandbox_dir = _execute_process(archive_root, ShellCountRuns(), other_request)
+      self.assertEqual('goodbye', other_result.stdout)
+      self.assertNotEqual(sandbox_dir, other_sandbox_dir)
+      with open(runs_file) as f:
+        self.assertEqual(['ran', 'ran'], f.read().splitlines())
+
+  def test_changed_executable_or_environment_is_not_cached(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      script = os.path.join(work_dir, 'tool')
+      safe_file_dump(script, '#!/bin/sh\necho one\n')
+      chmod_plus_x(script)
+      request = SnapshottedProcessRequest(args=tuple())
+
+      result, _ = _execute_process(archive_root, ScriptBinary(script), request)
+      self.assertEqual('one\n', result.stdout)
+
+      # An upgraded tool, at the same path.
+      safe_file_dump(script, '#!/bin/sh\necho two\n')
+      result, sandbox_dir = _execute_process(archive_root, ScriptBinary(script), request)
+      self.assertEqual('two\n', result.stdout)
+
+      # Only the allowlisted environment variables that processes run with affect their results.
+      with patch.dict(os.environ, {'PANTS_TEST_PROCESS_ENV': '1'}):
+        _, other_env_sandbox_dir = _execute_process(archive_root, ScriptBinary(script), request)
+      self.assertEqual(sandbox_dir, other_env_sandbox_dir)
+      with patch.dict(os.environ, {'LC_ALL': 'pants-test'}):
+        _, env_sandbox_dir = _execute_process(archive_root, ScriptBinary(script), request)
+      self.assertNotEqual(sandbox_dir, env_sandbox_dir)
+
+  def test_process_environment(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      script = os.path.join(work_dir, 'tool')
+      safe_file_dump(script, '#!/bin/sh\necho "$LC_ALL:$PANTS_TEST_PROCESS_ENV"\n')
+      chmod_plus_x(script)
+      with patch.dict(os.environ, {'LC_ALL': 'C', 'PANTS_TEST_PROCESS_ENV': '1'}):
+        result, _ = _execute_process(archive_root, ScriptBinary(script),
+                                     SnapshottedProcessRequest(args=tuple()))
+      self.assertEqual('C:\n', result.stdout)
+
+  def test_garbage_collect_sandboxes(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      runs_file = os.path.join(work_dir, 'runs')
+      old = SnapshottedProcessRequest(args=(runs_file,),
+                                      snapshots=(self._mk_snapshot(archive_root, 'old'),))
+      new = SnapshottedProcessRequest(args=(runs_file,),
+                                      snapshots=(self._mk_snapshot(archive_root, 'new'),))
+      _, old_sandbox_dir = _execute_process(archive_root, ShellCountRuns(), old)
+      _, new_sandbox_dir = _execute_process(archive_root, ShellCountRuns(), new)
+      an_hour_ago = time.time() - 3600
+      os.utime(old_sandbox_dir + '.result', (an_hour_ago, an_hour_ago))
+
+      _, removed_sandboxes = garbage_collect(work_dir, 60)
+      self.assertEqual(1, removed_sandboxes)
+      self.assertFalse(os.path.exists(old_sandbox_dir))
+      self.assertTrue(os.path.exists(new_sandbox_dir))
+
+      # The collected execution runs again.
+      self.assertEqual('old', _execute_process(archive_root, ShellCountRuns(), old)[0].stdout)
+      with open(runs_file) as f:
+        self.assertEqual(['ran', 'ran', 'ran'], f.read().splitlines())
+
+  def test_garbage_collect_retains_sandboxes_in_use(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      runs_file = os.path.join(work_dir, 'runs')
+      request = SnapshottedProcessRequest(args=(runs_file,),
+                                          snapshots=(self._mk_snapshot(archive_root, 'used'),))
+      _, sandbox_dir = _execute_process(archive_root, ShellCountRuns(), request)
+      fingerprint = os.path.basename(sandbox_dir)
+
+      with _sandbox_lock(archive_root, fingerprint):
+        self.assertEqual(0, garbage_collect(work_dir, 0)[1])
+        self.assertTrue(os.path.isfile(os.path.join(sandbox_dir, 'outfile')))
+      self.assertEqual(1, garbage_collect(work_dir, 0)[1])
+      self.assertFalse(os.path.exists(sandbox_dir))
+      self.assertFalse(os.path.exists(sandbox_dir + '.result'))
+
+  def test_failed_request_is_not_cached(self):
+    with temporary_dir() as work_dir:
+      archive_root = os.path.join(work_dir, 'snapshots')
+      request = SnapshottedProcessRequest(args=tuple())
+      with self.assertRaises(Exception):
+        _execute_process(archive_root, ShellFailCommand(), request)
+      process_dir = os.path.join(work_dir, 'processes')
+      self.assertEqual([], [files for _, _, files in os.walk(process_dir) if files])
+
+
 class IsolatedProcessTest(SchedulerTestBase, unittest.TestCase):
 
   def test_integration_concat_with_snapshot_subjects_test(self):
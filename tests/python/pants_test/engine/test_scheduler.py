@@ -6,6 +6,7 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import os
+import threading
 import unittest
 
 from pants.base.cmd_line_spec_parser import CmdLineSpecParser
@@ -76,6 +77,38 @@ class SchedulerTest(unittest.TestCase):
     root, = self.build(build_request)
     self.assert_root(root, self.guava, Classpath(creator='ivy_resolve'))
 
+  def test_interleaved_requests(self):
+    guava_request = self.request(['compile'], self.guava)
+    java_request = self.request(['compile'], self.consumes_resources)
+    self.scheduler.schedule(guava_request)
+    self.scheduler.schedule(java_request)
+
+    # The roots of the first request are no longer loaded, but are still available.
+    root, = self.scheduler.root_entries(guava_request).items()
+    self.assert_root(root, self.guava, Classpath(creator='ivy_resolve'))
+    root, = self.scheduler.root_entries(java_request).items()
+    self.assert_root(root, self.consumes_resources, Classpath(creator='javac'))
+
+  def test_concurrent_requests(self):
+    subjects = [self.guava, self.consumes_resources, self.inferred_deps]
+    requests = [self.request(['compile'], subject) for subject in subjects]
+    results = {}
+
+    def run(request):
+      self.scheduler.schedule(request)
+      results[request] = self.scheduler.root_entries(request)
+
+    threads = [threading.Thread(target=run, args=(request,)) for request in requests]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+    for subject, request in zip(subjects, requests):
+      (root_subject, _), state = results[request].items()[0]
+      self.assertEquals(subject, root_subject)
+      self.assertEquals(Return, type(state))
+
   @unittest.skip('Skipped to expedite landing #3821; see: #4027.')
   def test_compile_only_3rdparty_internal(self):
     build_request = self.request(['compile'], '3rdparty/jvm:guava')
@@ -0,0 +1,139 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import tarfile
+import time
+import unittest
+
+from pants.engine.snapshot_store import SnapshotStore
+from pants.util.dirutil import chmod_plus_x, safe_file_dump, safe_mkdir, safe_mkdtemp, safe_rmtree
+
+
+class SnapshotStoreTest(unittest.TestCase):
+
+  def setUp(self):
+    self.work_dir = safe_mkdtemp()
+    self.addCleanup(safe_rmtree, self.work_dir)
+    self.store = SnapshotStore(os.path.join(self.work_dir, 'store'))
+
+  def _mk_archive(self, name, files, executables=(), symlinks=None, hardlinks=None):
+    src_dir = os.path.join(self.work_dir, 'src', name)
+    for path, content in files.items():
+      safe_file_dump(os.path.join(src_dir, path), content)
+    for path in executables:
+      chmod_plus_x(os.path.join(src_dir, path))
+    for path, target in (symlinks or {}).items():
+      os.symlink(target, os.path.join(src_dir, path))
+    for path, target in (hardlinks or {}).items():
+      os.link(os.path.join(src_dir, target), os.path.join(src_dir, path))
+    safe_mkdir(os.path.join(src_dir, 'empty'))
+    archive_path = os.path.join(self.work_dir, '{}.tar'.format(name))
+    with tarfile.open(archive_path, 'w') as tar:
+      for entry in sorted(os.listdir(src_dir)):
+        tar.add(os.path.join(src_dir, entry), arcname=entry)
+    return archive_path
+
+  def _blob_count(self):
+    return sum(len(files) for _, _, files in os.walk(os.path.join(self.work_dir, 'store', 'blobs')))
+
+  def test_materialize(self):
+    archive = self._mk_archive('one',
+                               {'a.txt': 'a', 'b/c.sh': 'c'},
+                               executables=['b/c.sh'],
+                               symlinks={'d': 'a.txt'})
+    dest_dir = os.path.join(self.work_dir, 'dest')
+    self.store.materialize('aa01', archive, dest_dir)
+
+    with open(os.path.join(dest_dir, 'a.txt')) as f:
+      self.assertEqual('a', f.read())
+    with open(os.path.join(dest_dir, 'b', 'c.sh')) as f:
+      self.assertEqual('c', f.read())
+    self.assertTrue(os.access(os.path.join(dest_dir, 'b', 'c.sh'), os.X_OK))
+    self.assertFalse(os.access(os.path.join(dest_dir, 'a.txt'), os.X_OK))
+    self.assertEqual('a.txt', os.readlink(os.path.join(dest_dir, 'd')))
+    self.assertTrue(os.path.isdir(os.path.join(dest_dir, 'empty')))
+
+  def test_materialize_hardlinks(self):
+    archive = self._mk_archive('one', {'a.txt': 'a'}, hardlinks={'b.txt': 'a.txt'})
+    with tarfile.open(archive) as tar:
+      self.assertTrue(tar.getmember('b.txt').islnk())
+    dest_dir = os.path.join(self.work_dir, 'dest')
+    self.store.materialize('aa01', archive, dest_dir)
+
+    with open(os.path.join(dest_dir, 'b.txt')) as f:
+      self.assertEqual('a', f.read())
+
+  def test_modified_inputs_do_not_corrupt_blobs(self):
+    archive = self._mk_archive('one', {'a.txt': 'a'})
+    dest_dir = os.path.join(self.work_dir, 'dest')
+    self.store.materialize('aa01', archive, dest_dir)
+    path = os.path.join(dest_dir, 'a.txt')
+    os.chmod(path, 0o644)
+    with open(path, 'w') as f:
+      f.write('modified')
+
+    other_dest_dir = os.path.join(self.work_dir, 'other_dest')
+    self.store.materialize('aa01', archive, other_dest_dir)
+    with open(os.path.join(other_dest_dir, 'a.txt')) as f:
+      self.assertEqual('a', f.read())
+
+  def test_materialize_after_concurrent_garbage_collect(self):
+    archive = self._mk_archive('one', {'a.txt': 'a'})
+    self.store.manifest('aa01', archive)
+    # Blobs are removed, but the manifest is retained, as if it was used during the collection.
+    for root, _, files in os.walk(os.path.join(self.work_dir, 'store', 'blobs')):
+      for blob in files:
+        os.unlink(os.path.join(root, blob))
+
+    dest_dir = os.path.join(self.work_dir, 'dest')
+    self.store.materialize('aa01', archive, dest_dir)
+    with open(os.path.join(dest_dir, 'a.txt')) as f:
+      self.assertEqual('a', f.read())
+
+  def test_manifest_is_reused(self):
+    archive = self._mk_archive('one', {'a.txt': 'a'})
+    manifest = self.store.manifest('aa01', archive)
+    os.unlink(archive)
+    self.assertEqual(manifest, self.store.manifest('aa01', archive))
+
+  def test_shared_files_share_blobs(self):
+    one = self._mk_archive('one', {'a.txt': 'shared', 'b.txt': 'one'})
+    two = self._mk_archive('two', {'a.txt': 'shared', 'c.txt': 'two'})
+    self.store.manifest('aa01', one)
+    self.assertEqual(2, self._blob_count())
+    self.store.manifest('bb02', two)
+    self.assertEqual(3, self._blob_count())
+
+  def test_garbage_collect(self):
+    one = self._mk_archive('one', {'a.txt': 'shared', 'b.txt': 'one'})
+    two = self._mk_archive('two', {'a.txt': 'shared', 'c.txt': 'two'})
+    self.store.manifest('aa01', one)
+    self.store.manifest('bb02', two)
+
+    self.assertEqual(1, self.store.garbage_collect(['bb02']))
+    self.assertEqual(2, self._blob_count())
+
+    dest_dir = os.path.join(self.work_dir, 'dest')
+    os.unlink(two)
+    self.store.materialize('bb02', two, dest_dir)
+    self.assertEqual(['a.txt', 'c.txt', 'empty'], sorted(os.listdir(dest_dir)))
+
+    self.assertEqual(2, self.store.garbage_collect([]))
+    self.assertEqual(0, self._blob_count())
+
+  def test_recently_used(self):
+    self.store.manifest('aa01', self._mk_archive('one', {'a.txt': 'a'}))
+    self.store.manifest('bb02', self._mk_archive('two', {'b.txt': 'b'}))
+    old = time.time() - 3600
+    for fingerprint in ('aa01', 'bb02'):
+      os.utime(self.store._manifest_path(fingerprint), (old, old))
+
+    # Using a snapshot marks it as recently used.
+    self.store.manifest('bb02', None)
+    self.assertEqual(['bb02'], self.store.recently_used(60))
+    self.assertEqual(['aa01', 'bb02'], sorted(self.store.recently_used(2 * 3600)))
@@ -5,11 +5,14 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import os
+import time
 import unittest
 
 from pants.base.project_tree import Dir, File
 from pants.engine.nodes import Runnable
-from pants.engine.storage import Cache, InvalidKeyError, Storage
+from pants.engine.storage import Cache, InvalidKeyError, PersistentStorage, Storage
+from pants.util.contextutil import temporary_dir
 
 
 def _runnable(an_arg):
@@ -52,6 +55,67 @@ class StorageTest(unittest.TestCase):
     self.assertIsNone(self.storage.get_mapping(key2))
 
 
+class PersistentStorageTest(unittest.TestCase):
+  TEST_PATH = File('/foo')
+  TEST_PATH2 = Dir('/bar')
+
+  def test_create(self):
+    with temporary_dir() as tmpdir:
+      self.assertIsInstance(Storage.create(path=tmpdir), PersistentStorage)
+
+  def test_key_for(self):
+    with temporary_dir() as tmpdir:
+      storage = Storage.create(path=tmpdir)
+      key = storage.key_for(self.TEST_PATH)
+      self.assertIsNone(storage.get(key))
+      self.assertEquals(key, storage.put(self.TEST_PATH))
+
+  def test_persisted_across_instances(self):
+    with temporary_dir() as tmpdir:
+      storage = Storage.create(path=tmpdir)
+      key1 = storage.put(self.TEST_PATH)
+      key2 = storage.put(self.TEST_PATH2)
+      storage.add_mapping(key1, key2)
+
+      reloaded = Storage.create(path=tmpdir)
+      self.assertEquals(self.TEST_PATH, reloaded.get(key1))
+      self.assertEquals(key2, reloaded.get_mapping(key1))
+      self.assertIsNone(reloaded.get_mapping(key2))
+
+  def test_corrupt_entry_is_a_miss(self):
+    with temporary_dir() as tmpdir:
+      storage = Storage.create(path=tmpdir)
+      key = storage.put(self.TEST_PATH)
+      for root, _, files in os.walk(os.path.join(tmpdir, 'objects')):
+        for f in files:
+          with open(os.path.join(root, f), 'wb') as fp:
+            fp.write(b'truncated')
+
+      self.assertIsNone(Storage.create(path=tmpdir).get(key))
+
+  def test_garbage_collect(self):
+    with temporary_dir() as tmpdir:
+      storage = Storage.create(path=tmpdir)
+      key1 = storage.put(self.TEST_PATH)
+      key2 = storage.put(self.TEST_PATH2)
+      storage.add_mapping(key1, key2)
+      old = time.time() - 3600
+      for root, _, files in os.walk(tmpdir):
+        for f in files:
+          os.utime(os.path.join(root, f), (old, old))
+
+      # Loading entries records their use.
+      reloaded = Storage.create(path=tmpdir)
+      self.assertEquals(key2, reloaded.get_mapping(key1))
+      self.assertEquals(self.TEST_PATH2, reloaded.get(key2))
+
+      self.assertEquals(1, reloaded.garbage_collect(60))
+      reloaded = Storage.create(path=tmpdir)
+      self.assertIsNone(reloaded.get(key1))
+      self.assertEquals(key2, reloaded.get_mapping(key1))
+      self.assertEquals(self.TEST_PATH2, reloaded.get(key2))
+
+
 class CacheTest(unittest.TestCase):
 
   def setUp(self):
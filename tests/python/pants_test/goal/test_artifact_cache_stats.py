@@ -11,7 +11,7 @@ from contextlib import contextmanager
 import requests
 
 from pants.cache.artifact import ArtifactError
-from pants.cache.artifact_cache import NonfatalArtifactCacheError, UnreadableArtifact
+from pants.cache.artifact_cache import NonfatalArtifactCacheError, ReadStats, UnreadableArtifact
 from pants.goal.artifact_cache_stats import ArtifactCacheStats
 from pants.util.contextutil import temporary_dir
 from pants_test.base_test import BaseTest
@@ -72,6 +72,32 @@ class ArtifactCacheStatsTest(BaseTest):
       artifact_cache_stats.add_misses(self.TEST_CACHE_NAME_2, [self.target_a],
                                       [self.TEST_LOCAL_ERROR])
 
+  def test_add_read_stats(self):
+    expected_stats = [
+      {
+        'cache_name': self.TEST_CACHE_NAME_1,
+        'num_hits': 1,
+        'num_misses': 0,
+        'hits': [(self.TEST_SPEC_B, '')],
+        'misses': [],
+        'remote_requests': 4,
+        'remote_bytes': 400,
+        'remote_mean_latency_secs': 0.5,
+        'remote_throughput_bytes_per_sec': 200.0,
+      },
+    ]
+
+    expected_hit_or_miss_files = {
+      '{}.hits'.format(self.TEST_CACHE_NAME_1): '{}\n'.format(self.TEST_SPEC_B),
+    }
+
+    with self.mock_artifact_cache_stats(expected_stats,
+                                        expected_hit_or_miss_files=expected_hit_or_miss_files)\
+        as artifact_cache_stats:
+      artifact_cache_stats.add_hits(self.TEST_CACHE_NAME_1, [self.target_b])
+      artifact_cache_stats.add_read_stats(self.TEST_CACHE_NAME_1, ReadStats(1, 100, 0.5, 0.5))
+      artifact_cache_stats.add_read_stats(self.TEST_CACHE_NAME_1, ReadStats(3, 300, 1.5, 1.5))
+
   @contextmanager
   def mock_artifact_cache_stats(self,
                                 expected_stats,
@@ -8,10 +8,14 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
 import hashlib
 import os
 import tempfile
+import unittest
 from contextlib import contextmanager
 
-from pants.invalidation.build_invalidator import BuildInvalidator, CacheKeyGenerator
+from pants.fs.fs import safe_filename
+from pants.invalidation.build_invalidator import (GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator,
+                                                  CacheKey, CacheKeyGenerator)
 from pants.util.contextutil import temporary_dir
+from pants.util.dirutil import read_file, safe_file_dump
 
 
 TEST_CONTENT = 'muppet'
@@ -58,3 +62,91 @@ def test_env(content=TEST_CONTENT):
 #     assert cache.needs_update(key)
 #     cache.update(key)
 #     assert not cache.needs_update(key)
+
+
+class BuildInvalidatorTest(unittest.TestCase):
+
+  def test_update_and_previous_key(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root)
+      key = CacheKey('a.b', 'hash1')
+      self.assertTrue(invalidator.needs_update(key))
+      self.assertIsNone(invalidator.previous_key(key))
+
+      invalidator.update(key)
+      self.assertFalse(invalidator.needs_update(key))
+      self.assertEqual(key, invalidator.previous_key(CacheKey('a.b', 'hash2')))
+      # A fresh instance reads the update from the log.
+      reader = BuildInvalidator(root)
+      self.assertFalse(reader.needs_update(key))
+      self.assertTrue(reader.needs_update(CacheKey('a.b', 'hash2')))
+
+  def test_force_invalidate(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root)
+      key = CacheKey('a.b', 'hash1')
+      invalidator.update(key)
+      invalidator.force_invalidate(key)
+      self.assertTrue(invalidator.needs_update(key))
+      self.assertTrue(BuildInvalidator(root).needs_update(key))
+
+      invalidator.update(key)
+      invalidator.force_invalidate_all()
+      self.assertTrue(invalidator.needs_update(key))
+      self.assertTrue(BuildInvalidator(root).needs_update(key))
+
+  def test_refresh_sees_concurrent_updates(self):
+    with temporary_dir() as root:
+      reader = BuildInvalidator(root)
+      key = CacheKey('a.b', 'hash1')
+      self.assertTrue(reader.needs_update(key))
+      BuildInvalidator(root).update(key)
+      reader.refresh()
+      self.assertFalse(reader.needs_update(key))
+
+  def test_truncated_line_is_ignored(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root)
+      invalidator.update(CacheKey('a.b', 'hash1'))
+      log = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator._LOG_NAME)
+      with open(log, 'ab') as fd:
+        fd.write(b'c.d\thas')
+      invalidator = BuildInvalidator(root)
+      self.assertFalse(invalidator.needs_update(CacheKey('a.b', 'hash1')))
+      self.assertTrue(invalidator.needs_update(CacheKey('c.d', 'has')))
+
+  def test_compaction(self):
+    with temporary_dir() as root:
+      invalidator = BuildInvalidator(root)
+      for i in range(1100):
+        invalidator.update(CacheKey('a.b', 'hash{}'.format(i)))
+      log = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION, BuildInvalidator._LOG_NAME)
+      self.assertEqual(1100, len(read_file(log).splitlines()))
+
+      invalidator = BuildInvalidator(root)
+      self.assertFalse(invalidator.needs_update(CacheKey('a.b', 'hash1099')))
+      self.assertEqual(['a.b\thash1099'], read_file(log).splitlines())
+
+  def test_compaction_keeps_concurrently_appended_lines(self):
+    with temporary_dir() as root:
+      compactor = BuildInvalidator(root)
+      compactor.update(CacheKey('a.b', 'hash1'))
+      BuildInvalidator(root).force_invalidate(CacheKey('a.b', 'hash1'))
+      BuildInvalidator(root).update(CacheKey('c.d', 'hash2'))
+      compactor._compact()
+
+      invalidator = BuildInvalidator(root)
+      self.assertTrue(invalidator.needs_update(CacheKey('a.b', 'hash1')))
+      self.assertFalse(invalidator.needs_update(CacheKey('c.d', 'hash2')))
+
+  def test_migrates_legacy_hash_files(self):
+    with temporary_dir() as root:
+      legacy_dir = os.path.join(root, GLOBAL_CACHE_KEY_GEN_VERSION)
+      safe_file_dump(os.path.join(legacy_dir, 'a.b.hash'), 'hash1')
+      long_id = 'c' * 300
+      safe_file_dump(os.path.join(legacy_dir, safe_filename(long_id, extension='.hash')), 'hash2')
+
+      invalidator = BuildInvalidator(root)
+      self.assertFalse(invalidator.needs_update(CacheKey('a.b', 'hash1')))
+      self.assertTrue(invalidator.needs_update(CacheKey(long_id, 'hash2')))
+      self.assertEqual([BuildInvalidator._LOG_NAME], os.listdir(legacy_dir))
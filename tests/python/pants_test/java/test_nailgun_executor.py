@@ -5,10 +5,13 @@
 from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
                         unicode_literals, with_statement)
 
+import threading
+import time
+
 import mock
 import psutil
 
-from pants.java.nailgun_executor import NailgunExecutor
+from pants.java.nailgun_executor import NailgunExecutor, NailgunPoolStats
 from pants_test.base_test import BaseTest
 
 
@@ -51,3 +54,188 @@ class NailgunExecutorTest(BaseTest):
       )
       self.assertFalse(self.executor.is_alive())
       mock_as_process.assert_called_with(self.executor)
+
+  def test_is_idle_without_timeout(self):
+    self.executor._mark_used()
+    self.assertFalse(self.executor.is_idle())
+
+  def test_is_idle(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               idle_timeout=60)
+    self.assertIsNone(executor.last_used)
+    self.assertFalse(executor.is_idle())
+
+    executor._mark_used()
+    self.assertFalse(executor.is_idle())
+
+    executor.write_metadata_by_name(executor.name, executor._LAST_USED_KEY, str(time.time() - 61))
+    self.assertTrue(executor.is_idle())
+
+  def test_idle_server_is_updated(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               idle_timeout=60)
+    with mock.patch.object(NailgunExecutor, 'is_alive', **PATCH_OPTS) as mock_is_alive, \
+         mock.patch.object(NailgunExecutor, 'fingerprint', 'fp'), \
+         mock.patch.object(NailgunExecutor, 'cmd', executor._distribution.java):
+      mock_is_alive.return_value = True
+      executor._mark_used()
+      self.assertEqual((True, False), executor._check_nailgun_state('fp'))
+
+      executor.write_metadata_by_name(executor.name, executor._LAST_USED_KEY, str(time.time() - 61))
+      self.assertEqual((True, True), executor._check_nailgun_state('fp'))
+
+  def test_checked_out_server_is_not_idle(self):
+    executor = NailgunExecutor(identity='test',
+                               workdir='/__non_existent_dir',
+                               nailgun_classpath=[],
+                               distribution=mock.Mock(),
+                               metadata_base_dir=self.subprocess_dir,
+                               idle_timeout=60)
+    with mock.patch.object(NailgunExecutor, 'is_alive', **PATCH_OPTS) as mock_is_alive, \
+         mock.patch.object(NailgunExecutor, 'terminate', **PATCH_OPTS) as mock_terminate, \
+         mock.patch.object(NailgunExecutor, 'fingerprint', 'fp'), \
+         mock.patch.object(NailgunExecutor, 'cmd', executor._distribution.java):
+      mock_is_alive.return_value = True
+      executor._mark_used()
+      with executor._checkout_server('fp') as (_, reused):
+        self.assertTrue(reused)
+        # A long run outlasts the idle timeout: the server is still shared rather than restarted.
+        executor.write_metadata_by_name(executor.name, executor._LAST_USED_KEY,
+                                        str(time.time() - 61))
+        self.assertEqual((True, False), executor._check_nailgun_state('fp'))
+        with executor._checkout_server('fp') as (_, reused):
+          self.assertTrue(reused)
+      self.assertFalse(mock_terminate.called)
+
+      # Once checked in, the idle server is restarted by the next run.
+      with executor._checkout_server('fp') as (_, reused):
+        self.assertFalse(reused)
+      self.assertEqual(1, mock_terminate.call_count)
+
+
+class NailgunExecutorPoolTest(BaseTest):
+  def pool(self, size, fingerprint_by_running_server):
+    """Returns an executor with a pool of the given size, whose servers are running with the given
+    fingerprints, by server name."""
+    def check_nailgun_state(server, fingerprint):
+      running = server.name in fingerprint_by_running_server
+      return running, running and fingerprint_by_running_server[server.name] != fingerprint
+
+    def is_alive(server):
+      return server.name in fingerprint_by_running_server
+
+    self.terminated = []
+
+    for name, side_effect in (('_check_nailgun_state', check_nailgun_state),
+                              ('is_alive', is_alive),
+                              ('terminate', lambda server: self.terminate(server))):
+      patcher = mock.patch.object(NailgunExecutor, name, side_effect=side_effect, **PATCH_OPTS)
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+    return NailgunExecutor(identity='test',
+                           workdir='/__non_existent_dir',
+                           nailgun_classpath=[],
+                           distribution=mock.Mock(),
+                           metadata_base_dir=self.subprocess_dir,
+                           pool_size=size)
+
+  def terminate(self, server):
+    self.terminated.append(server.name)
+
+  def checked_out_name(self, executor, fingerprint):
+    with executor._checkout_server(fingerprint) as (server, reused):
+      return server.name, reused
+
+  def test_reuses_server_running_with_fingerprint(self):
+    executor = self.pool(3, {'test': 'other', 'test_2': 'fp'})
+    self.assertEqual(('test_2', True), self.checked_out_name(executor, 'fp'))
+
+  def test_spawns_server_when_running_one_is_in_use(self):
+    executor = self.pool(3, {'test': 'fp'})
+    with executor._checkout_server('fp') as (server, reused):
+      self.assertEqual(('test', True), (server.name, reused))
+      self.assertEqual(('test_1', False), self.checked_out_name(executor, 'fp'))
+
+  def test_reaps_least_recently_used_server(self):
+    executor = self.pool(3, {'test': 'a', 'test_1': 'b', 'test_2': 'c'})
+    for index, server in enumerate(executor._pool):
+      server.write_metadata_by_name(server.name, server._LAST_USED_KEY, str(100 - index))
+    self.assertEqual(('test_2', False), self.checked_out_name(executor, 'fp'))
+    self.assertEqual(['test_2'], self.terminated)
+
+  def test_shares_server_when_all_are_in_use(self):
+    executor = self.pool(1, {'test': 'fp'})
+    with executor._checkout_server('fp'):
+      self.assertEqual(('test', True), self.checked_out_name(executor, 'fp'))
+
+  def test_broken_server_is_terminated_once_checked_in(self):
+    executor = self.pool(1, {'test': 'fp'})
+    with executor._checkout_server('fp') as (server, _):
+      with executor._checkout_server('fp') as (shared, reused):
+        self.assertEqual((server.name, True), (shared.name, reused))
+        executor._mark_broken(shared)
+      # The other run is still using the server.
+      self.assertEqual([], self.terminated)
+    self.assertEqual(['test'], self.terminated)
+    self.assertNotIn('test', executor._BROKEN_SERVERS)
+
+  def test_terminates_outside_of_checkout_lock(self):
+    executor = self.pool(1, {'test': 'other'})
+    lock_free = []
+
+    def try_acquire():
+      if NailgunExecutor._CHECKOUT_CONDITION.acquire(False):
+        NailgunExecutor._CHECKOUT_CONDITION.release()
+        lock_free.append(True)
+
+    def terminate(server):
+      # The lock is reentrant, so try to acquire it from another thread.
+      thread = threading.Thread(target=try_acquire)
+      thread.start()
+      thread.join(5)
+      self.terminated.append(server.name)
+
+    self.terminate = terminate
+    with executor._checkout_server('fp') as (server, reused):
+      self.assertFalse(reused)
+      executor._mark_broken(server)
+    self.assertEqual(['test', 'test'], self.terminated)
+    self.assertEqual([True, True], lock_free)
+
+  def test_waits_for_server_to_be_checked_in(self):
+    executor = self.pool(1, {'test': 'other'})
+    checked_out = threading.Event()
+    results = []
+
+    def checkout():
+      with executor._checkout_server('fp') as (server, reused):
+        checked_out.set()
+        results.append((server.name, reused))
+
+    with executor._checkout_server('other'):
+      thread = threading.Thread(target=checkout)
+      thread.start()
+      # The server is running with another fingerprint, so it must not be restarted while in use.
+      self.assertFalse(checked_out.wait(0.1))
+    thread.join(5)
+    self.assertEqual([('test', False)], results)
+
+  def test_stats(self):
+    stats = NailgunPoolStats()
+    self.assertIsNone(stats.reuse_rate)
+    stats.record_run(reused=False, spawn_secs=1.5)
+    stats.record_run(reused=True)
+
+    total = NailgunPoolStats()
+    total.add(stats)
+    self.assertEqual((2, 1, 1.5, 0.5),
+                     (total.runs, total.reuses, total.spawn_secs, total.reuse_rate))
@@ -0,0 +1,48 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import mock
+
+from pants.pantsd.service.scheduler_service import SchedulerService
+from pants_test.base_test import BaseTest
+
+
+class TestSchedulerService(BaseTest):
+
+  def setUp(self):
+    BaseTest.setUp(self)
+    self.mock_graph_helper = mock.Mock()
+    self.mock_scheduler = self.mock_graph_helper.scheduler
+    self.mock_scheduler.invalidate_files.return_value = 3
+    self.service = SchedulerService(mock.Mock(), self.mock_graph_helper, settle_window=0.01)
+
+  def _event(self, files, is_fresh_instance=False):
+    return dict(subscription='all_files', is_fresh_instance=is_fresh_instance, files=files)
+
+  def test_coalesces_pending_events(self):
+    self.service._enqueue_fs_event(self._event([b'a/BUILD', b'b/BUILD']))
+    self.service._enqueue_fs_event(self._event([b'b/BUILD', b'c/BUILD']))
+    self.service._enqueue_fs_event(self._event([b'c/BUILD']))
+
+    self.service._process_event_queue()
+
+    self.mock_scheduler.invalidate_files.assert_called_once_with(('a/BUILD', 'b/BUILD', 'c/BUILD'))
+    self.assertEqual(dict(batches=1, events=3, files=3, invalidated_nodes=3), self.service.stats)
+
+  def test_ignores_initial_and_invalid_events(self):
+    self.service._enqueue_fs_event(self._event([b'a/BUILD'], is_fresh_instance=True))
+    self.service._enqueue_fs_event(dict(subscription='all_files', files=[b'b/BUILD']))
+
+    self.service._process_event_queue()
+
+    self.assertFalse(self.mock_scheduler.invalidate_files.called)
+    self.assertEqual(dict(batches=1, events=2, files=0, invalidated_nodes=0), self.service.stats)
+
+  def test_empty_queue(self):
+    self.service._process_event_queue()
+    self.assertFalse(self.mock_scheduler.invalidate_files.called)
+    self.assertEqual(0, self.service.stats['batches'])
@@ -6,12 +6,15 @@ from __future__ import (absolute_import, division, generators, nested_scopes, pr
                         unicode_literals, with_statement)
 
 import collections
+import os
 
 from mock import patch
 
 from pants.base.exceptions import ErrorWhileTesting
 from pants.task.task import TaskBase
 from pants.task.testrunner_task_mixin import TestRunnerTaskMixin
+from pants.util.contextutil import temporary_dir
+from pants.util.durations import DurationHistory
 from pants.util.process_handler import ProcessHandler
 from pants.util.timeout import TimeoutReached
 from pants_test.tasks.task_test_base import TaskTestBase
@@ -365,3 +368,55 @@ class TestRunnerTaskMixinMultipleTargets(TaskTestBase):
         task.execute()
       self.assertEqual(len(cm.exception.failed_targets), 1)
       self.assertEqual(cm.exception.failed_targets[0].address.spec, 'TargetB')
+
+
+class TestRunnerTaskMixinDurationsTest(TaskTestBase):
+
+  @classmethod
+  def task_type(cls):
+    class TestRunnerTaskMixinDurationsTask(TestRunnerTaskMixin, TaskBase):
+      def _execute(self, all_targets):
+        pass
+
+      def _spawn(self, *args, **kwargs):
+        pass
+
+      def _test_target_filter(self):
+        return lambda target: True
+
+      def _validate_target(self, target):
+        pass
+
+      def _get_targets(self):
+        return []
+
+    return TestRunnerTaskMixinDurationsTask
+
+  def test_record_test_durations(self):
+    with temporary_dir() as tmpdir:
+      durations_file = os.path.join(tmpdir, 'durations.json')
+      report = os.path.join(tmpdir, 'TEST-report.xml')
+      with open(report, 'w') as fp:
+        fp.write("""<testsuite>
+                      <testcase classname="org.pantsbuild.AllTest" name="a" time="1.5"/>
+                      <testcase classname="org.pantsbuild.AllTest" name="b" time="0.5"/>
+                      <testcase classname="org.pantsbuild.OtherTest" name="c" time="3"/>
+                      <testcase name="unnamed" time="10"/>
+                    </testsuite>""")
+
+      self.set_options(test_durations_file=durations_file)
+      task = self.create_task(self.context())
+      self.assertTrue(task._balance_shards_by_duration)
+      task._record_test_durations([report, os.path.join(tmpdir, 'missing.xml')])
+
+      durations = DurationHistory(durations_file)
+      durations.load()
+      self.assertEqual(2.0, durations.get('org.pantsbuild.AllTest'))
+      self.assertEqual(3.0, durations.get('org.pantsbuild.OtherTest'))
+      self.assertIsNone(durations.get(''))
+
+  def test_durations_default_to_workdir(self):
+    task = self.create_task(self.context())
+    self.assertFalse(task._balance_shards_by_duration)
+    self.assertEqual(os.path.join(task.workdir, task._TEST_DURATIONS_FILE),
+                     task._test_durations.path)
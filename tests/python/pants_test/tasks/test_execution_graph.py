@@ -249,6 +249,30 @@ class ExecutionGraphTest(unittest.TestCase):
     self.execute(exec_graph)
     self.assertEqual(self.jobs_run, ["A", "D", "B", "C", "E"])
 
+  def test_critical_path_length(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, [], 1),
+                                 self.job("B", passing_fn, ["A"], 2),
+                                 self.job("C", passing_fn, ["B"], 4),
+                                 self.job("D", passing_fn, ["A"], 8),
+                                 self.job("E", passing_fn, ["C", "D"], 16)])
+    self.assertEqual(25, exec_graph.critical_path_length())
+    self.assertEqual(7, exec_graph.critical_path_length({"A": 1, "B": 2, "C": 4}))
+
+  def test_job_keys_by_priority(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, [], 1),
+                                 self.job("B", passing_fn, ["A"], 2),
+                                 self.job("C", passing_fn, ["B"], 4),
+                                 self.job("D", passing_fn, ["A"], 8),
+                                 self.job("E", passing_fn, ["C", "D"], 16)])
+    self.assertEqual(["A", "D", "B", "C", "E"], exec_graph.job_keys_by_priority())
+
+  def test_job_durations_are_recorded(self):
+    exec_graph = ExecutionGraph([self.job("A", passing_fn, []),
+                                 self.job("B", raising_fn, ["A"])])
+    with self.assertRaises(ExecutionFailure):
+      self.execute(exec_graph)
+    self.assertEqual({"A", "B"}, set(exec_graph.job_durations))
+
   def test_jobs_not_canceled_multiple_times(self):
     failures = list()
 
@@ -0,0 +1,63 @@
+# coding=utf-8
+# Copyright 2017 Pants project contributors (see CONTRIBUTORS.md).
+# Licensed under the Apache License, Version 2.0 (see LICENSE).
+
+from __future__ import (absolute_import, division, generators, nested_scopes, print_function,
+                        unicode_literals, with_statement)
+
+import os
+import unittest
+
+from pants.util.contextutil import temporary_dir
+from pants.util.durations import DurationHistory, balance_by_duration
+
+
+class DurationHistoryTest(unittest.TestCase):
+
+  def test_save_and_load(self):
+    with temporary_dir() as tmpdir:
+      path = os.path.join(tmpdir, 'durations.json')
+      durations = DurationHistory(path)
+      durations.record('a', 10.0)
+      durations.save()
+
+      loaded = DurationHistory(path)
+      loaded.load()
+      self.assertEqual(10.0, loaded.get('a'))
+
+  def test_predict(self):
+    durations = DurationHistory('unused')
+    self.assertEqual({'a': 1.0, 'b': 1.0}, durations.predict(['a', 'b']))
+
+    durations.record('a', 2.0)
+    durations.record('b', 4.0)
+    self.assertEqual({'a': 2.0, 'b': 4.0, 'c': 3.0}, durations.predict(['a', 'b', 'c']))
+
+
+class BalanceByDurationTest(unittest.TestCase):
+
+  def test_longest_first(self):
+    durations = {'a': 5, 'b': 4, 'c': 3, 'd': 3, 'e': 3}
+    # a -> 0, b -> 1, c -> 1 (4 < 5), d -> 0, e -> 1 (7 < 8).
+    self.assertEqual([['a', 'd'], ['b', 'c', 'e']],
+                     balance_by_duration(['a', 'b', 'c', 'd', 'e'], 2, durations))
+
+  def test_ties_are_deterministic(self):
+    durations = {'a': 1, 'b': 1, 'c': 1, 'd': 1}
+    self.assertEqual([['a', 'c'], ['b', 'd']],
+                     balance_by_duration(['a', 'b', 'c', 'd'], 2, durations))
+
+  def test_more_partitions_than_items(self):
+    self.assertEqual([['a'], [], []], balance_by_duration(['a'], 3, {'a': 1}))
+
+  def test_max_partition_size(self):
+    durations = {'a': 10, 'b': 1, 'c': 1, 'd': 1}
+    # Without a maximum size, all of the short items would be partitioned together.
+    self.assertEqual([['a'], ['b', 'c', 'd']],
+                     balance_by_duration(['a', 'b', 'c', 'd'], 2, durations))
+    self.assertEqual([['a', 'd'], ['b', 'c']],
+                     balance_by_duration(['a', 'b', 'c', 'd'], 2, durations, max_partition_size=2))
+
+  def test_max_partition_size_too_small(self):
+    with self.assertRaises(ValueError):
+      balance_by_duration(['a', 'b', 'c'], 2, {'a': 1, 'b': 1, 'c': 1}, max_partition_size=1)